@@ -1,4 +1,8 @@
+import threading
+import time
+
 import matplotlib
+import numpy as np
 
 matplotlib.use("QtAgg")
 
@@ -9,12 +13,35 @@ from matplotlib.backends.backend_qt5agg import (
     NavigationToolbar2QT as NavigationToolbar,
 )
 from matplotlib.figure import Figure
+from PyQt6.QtCore import QTimer, pyqtSignal
 
 
 class MplCanvas(FigureCanvasQTAgg):
-    def __init__(self, parent=None, width=5, height=4, dpi=100):
+    """Matplotlib canvas for plugin plots.
+
+    Live plots: request_draw may be called from any thread (e.g. a measurement loop). Requests are coalesced and the plot
+    is rendered in the GUI thread not more often than max_fps. Artists registered with add_live_artist are drawn with blitting
+    over a cached background, the full figure is redrawn only if axes limits changed or the background is not valid.
+    """
+
+    _draw_requested = pyqtSignal()
+
+    def __init__(self, parent=None, width=5, height=4, dpi=100, max_fps=30):
         self.fig = Figure(figsize=(width, height), dpi=dpi)
         super().__init__(self.fig)
+        self.max_fps = max_fps
+        self._live_artists = []
+        self._background = None
+        self._limits = None
+        self._pending = False
+        self._pending_lock = threading.Lock()
+        self._last_frame = 0.0
+        self._frame_timer = QTimer(self)
+        self._frame_timer.setSingleShot(True)
+        self._frame_timer.timeout.connect(self._render)
+        # signal is emitted from worker threads, the connection is queued to the GUI thread
+        self._draw_requested.connect(self._schedule_render)
+        self.mpl_connect("draw_event", self._on_draw)
 
     def _create_toolbar(self, parentWindow):
         ########### changing the color in toolbar has bug due to change in the PyQT6 opion convention  https://github.com/matplotlib/matplotlib/issues/22471/
@@ -23,3 +50,153 @@ class MplCanvas(FigureCanvasQTAgg):
 
         ###it is related to modifying QtWidgets.QColorDialog.ShowAlphaChannel to QtWidgets.QColorDialog.ColorDialogOption.ShowAlphaChannel
         return NavigationToolbar(self, parentWindow)
+
+    ########Functions
+    ########live plot
+
+    def add_live_artist(self, artist):
+        """Registers an artist that is updated during a measurement (e.g. a line updated with set_data). It is drawn with blitting.
+
+        Returns:
+            the artist
+        """
+        artist.set_animated(True)
+        self._live_artists.append(artist)
+        self._background = None
+        return artist
+
+    def clear_live_artists(self):
+        """Unregisters all live artists, should be called when the axes are cleared."""
+        for artist in self._live_artists:
+            artist.set_animated(False)
+        self._live_artists = []
+        self._background = None
+
+    def request_draw(self):
+        """Requests an update of the plot. May be called from any thread, does not wait for the rendering."""
+        with self._pending_lock:
+            if self._pending:
+                return
+            self._pending = True
+        self._draw_requested.emit()
+
+    def _schedule_render(self):
+        delay = max(0.0, 1 / self.max_fps - (time.monotonic() - self._last_frame))
+        self._frame_timer.start(int(delay * 1000))
+
+    def _axes_limits(self):
+        return tuple((tuple(axes.get_xlim()), tuple(axes.get_ylim())) for axes in self.fig.axes)
+
+    def _render(self):
+        with self._pending_lock:
+            self._pending = False
+        self._last_frame = time.monotonic()
+        # artists removed from the figure (e.g. by axes.cla()) are not drawn anymore
+        self._live_artists = [artist for artist in self._live_artists if artist.figure is not None]
+        if not self._live_artists or self._background is None or self._axes_limits() != self._limits:
+            self.draw()
+            return
+        self.restore_region(self._background)
+        self._draw_live_artists()
+        self.blit(self.fig.bbox)
+
+    def _draw_live_artists(self):
+        for artist in self._live_artists:
+            if artist.figure is not None:
+                self.fig.draw_artist(artist)
+
+    def _on_draw(self, event):
+        """Caches the background (figure without live artists) after every full draw, and draws the live artists over it"""
+        if event is not None and event.canvas is not self:
+            return
+        self._background = self.copy_from_bbox(self.fig.bbox)
+        self._limits = self._axes_limits()
+        self._draw_live_artists()
+
+    def print_figure(self, *args, **kwargs):
+        # live artists are animated and skipped in a normal draw, they should be present in a saved figure
+        for artist in self._live_artists:
+            artist.set_animated(False)
+        try:
+            return super().print_figure(*args, **kwargs)
+        finally:
+            for artist in self._live_artists:
+                artist.set_animated(True)
+            # printing may draw the figure with another size, the cached background is not valid
+            self._background = None
+
+
+class LiveTrace:
+    """Preallocated data buffer for a line in a live plot of a long measurement.
+
+    Samples are collected in bins of `stride` samples, every bin is stored as its minimum and maximum (in the order of x),
+    so spikes stay visible. When the buffer is full, neighbouring bins are merged in place and the stride is doubled.
+    The line never has more than `capacity` points (about 2 points per screen pixel), so the cost of a plot update
+    does not grow with the length of the run.
+    """
+
+    def __init__(self, capacity: int = 2000):
+        """
+        Args:
+            capacity (int, optional): maximum number of points, e.g. 2 * width of the axes in pixels. Rounded up to a multiple of 4. Defaults to 2000.
+        """
+        self.capacity = max(4, -(-int(capacity) // 4) * 4)
+        self.x = np.empty(self.capacity)
+        self.y = np.empty(self.capacity)
+        self.n = 0  # number of stored points
+        self.stride = 1  # number of samples in a bin
+        self._bin = np.empty(4)  # x of min, y of min, x of max, y of max of the current bin
+        self._bin_count = 0
+        self.count = 0  # number of appended samples
+
+    def append(self, x: float, y: float) -> None:
+        if self._bin_count == 0:
+            self._bin[:] = (x, y, x, y)
+        elif y < self._bin[1]:
+            self._bin[0:2] = (x, y)
+        elif y > self._bin[3]:
+            self._bin[2:4] = (x, y)
+        self._bin_count += 1
+        self.count += 1
+        if self._bin_count == self.stride:
+            if self.n == self.capacity:
+                self._decimate()
+            # bin is stored as 2 points in x order
+            if self._bin[0] <= self._bin[2]:
+                self.x[self.n : self.n + 2] = self._bin[0::2]
+                self.y[self.n : self.n + 2] = self._bin[1::2]
+            else:
+                self.x[self.n : self.n + 2] = self._bin[2::-2]
+                self.y[self.n : self.n + 2] = self._bin[3::-2]
+            self.n += 2
+            self._bin_count = 0
+
+    def extend(self, x, y) -> None:
+        for x_value, y_value in zip(x, y):
+            self.append(x_value, y_value)
+
+    def _decimate(self) -> None:
+        """Merges pairs of bins: of the 4 points the minimum and the maximum are kept in their order."""
+        x = self.x[: self.n].reshape(-1, 4)
+        y = self.y[: self.n].reshape(-1, 4)
+        imin = np.argmin(y, axis=1)
+        imax = np.argmax(y, axis=1)
+        keep = np.sort(np.stack((imin, imax), axis=1), axis=1)
+        half = self.n // 2
+        self.x[:half] = np.take_along_axis(x, keep, axis=1).ravel()
+        self.y[:half] = np.take_along_axis(y, keep, axis=1).ravel()
+        self.n = half
+        self.stride *= 2
+
+    def data(self) -> tuple[np.ndarray, np.ndarray]:
+        """Returns copies of x and y of the line, including the incomplete last bin."""
+        if self._bin_count == 0:
+            return self.x[: self.n].copy(), self.y[: self.n].copy()
+        order = np.argsort(self._bin[0::2], kind="stable")
+        return np.concatenate((self.x[: self.n], self._bin[0::2][order])), np.concatenate((self.y[: self.n], self._bin[1::2][order]))
+
+    def clear(self) -> None:
+        self.n = 0
+        self.stride = 1
+        self._bin_count = 0
+        self.count = 0
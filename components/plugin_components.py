@@ -25,6 +25,8 @@ This file includes:
 - filter_to_valid_methods: Function to filter a function dictionary to only include valid methods based on required functions.
 - PyIVLSReturnCode: Enum for standard return codes for pyIVLS plugins.
 - FileManager: Class for handling file operations for plugins, including creating headers for CSV files and spectrometer files.
+- DataFileWriter: Class for writing measurement data incrementally, appends rows to an open file instead of rewriting it.
+- IntegrationTimeSolver: Class for finding a spectrometer integration time that puts the spectrum peak into a target window.
 - DependencyManager: Class to handle dependencies between plugins, including checking for missing dependencies and handling dependency-related GUI changes
 - LoggingHelper: Class for logging messages with different severity levels
 
@@ -35,11 +37,14 @@ import inspect
 import logging
 import os
 import sys
+import time
 import traceback
+from collections import OrderedDict
 from datetime import datetime
 from enum import Enum
 from typing import Any, Literal, overload
 
+import numpy as np
 from PyQt6 import uic
 from PyQt6.QtCore import QObject, pyqtSignal
 from PyQt6.QtGui import QColor as Qcolor
@@ -438,6 +443,212 @@ class FileManager:
         return comment
 
 
+class DataFileWriter:
+    """Component that writes measurement data to a file as it is acquired. The file is opened once, the header is written
+    on open and new rows are appended, so the cost of a save does not grow with the length of the measurement.
+    Rows are written in the same format as pd.DataFrame.to_csv(float_format="%.12e") used for the complete files.
+
+    Data is flushed to the OS after every flush_every appends, and synced to the disk (os.fsync) at most every sync_interval seconds,
+    so a crash of the program loses at most flush_every chunks. Use as a context manager or call close() at the end.
+    """
+
+    def __init__(self, address: str, header: str, flush_every: int = 1, sync_interval: float | None = None, float_format: str = "%.12e", separator: str = ","):
+        """
+        Args:
+            address (str): full address of the file, an existing file is overwritten
+            header (str): file header, e.g. from FileManager.create_file_header
+            flush_every (int, optional): number of appends between flushes. Defaults to 1.
+            sync_interval (float | None, optional): minimum time between syncs to the disk in s, None - sync only on close. Defaults to None.
+            float_format (str, optional): format of the values. Defaults to "%.12e".
+            separator (str, optional): value separator. Defaults to ",".
+        """
+        self.address = address
+        self.flush_every = max(int(flush_every), 1)
+        self.sync_interval = sync_interval
+        self.float_format = float_format
+        self.separator = separator
+        self.rows = 0
+        self._appends = 0
+        self._file = open(address, "w")
+        self._file.write(header + "\n")
+        self._last_sync = time.monotonic()
+        self.flush(sync=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def append(self, rows) -> None:
+        """Appends rows to the file.
+
+        Args:
+            rows (array_like): a row or 2D array of rows, columns are written in the given order
+        """
+        data = np.atleast_2d(np.asarray(rows, dtype=float))
+        if data.size == 0:
+            return
+        np.savetxt(self._file, data, fmt=self.float_format, delimiter=self.separator, newline="\n")
+        self.rows += len(data)
+        self._appends += 1
+        if self._appends >= self.flush_every:
+            sync = self.sync_interval is not None and (time.monotonic() - self._last_sync) >= self.sync_interval
+            self.flush(sync=sync)
+
+    def flush(self, sync: bool = False) -> None:
+        """Flushes the written data to the OS, and to the disk if sync is True."""
+        self._file.flush()
+        self._appends = 0
+        if sync:
+            os.fsync(self._file.fileno())
+            self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        """Flushes, syncs and closes the file. May be called more than once."""
+        if self._file.closed:
+            return
+        try:
+            self.flush(sync=True)
+        finally:
+            self._file.close()
+
+
+class IntegrationTimeSolver:
+    """Component that finds an integration time for which the spectrum peak is between value_min and value_max.
+
+    Below saturation the detector signal is roughly proportional to the integration time, so the next guess is
+    taken from that model: proportional scaling after one exposure, a secant through the last two unsaturated
+    exposures after that. A saturated exposure only says that the time is too long, then the solver falls back
+    to bisection (in log scale) of the bracket of times known to be too short and too long. Every guess is kept
+    inside that bracket, so the solver never does worse than bisection.
+
+    The signal per second of a successful solve is cached per sample and key (e.g. the SMU set value) to seed the next
+    solve. The cache keeps the max_cached most recently used entries.
+
+    Usage:
+        guess = solver.start(initial_guess, key=smu_value, sample=sample_name)
+        while ...:
+            measure the peak with guess
+            status, guess = solver.update(guess, peak)  # status is "done", "next", "too high" or "too low"
+    """
+
+    def __init__(self, t_min: float, t_max: float, value_min: float, value_max: float, saturation: float = 0.98, max_cached: int = 256):
+        """
+        Args:
+            t_min (float): shortest allowed integration time in s
+            t_max (float): longest allowed integration time in s
+            value_min (float): lower limit for the spectrum peak
+            value_max (float): upper limit for the spectrum peak
+            saturation (float, optional): peak value from which the exposure is treated as saturated. Defaults to 0.98.
+            max_cached (int, optional): number of cached signal rates. Defaults to 256.
+        """
+        self.t_min = t_min
+        self.t_max = t_max
+        self.value_min = value_min
+        self.value_max = value_max
+        self.saturation = saturation
+        self.target = (value_min + value_max) / 2
+        self.max_cached = max_cached
+        # (sample, key) -> signal per second, least recently used first
+        self.cache = OrderedDict()
+        # sample -> last cached signal per second, used for keys not cached yet
+        self._last_rate = OrderedDict()
+        self._key = None
+        self._sample = None
+        self._too_short = None
+        self._too_long = None
+        self._points = []
+
+    def _clamp(self, t: float) -> float:
+        return min(max(t, self.t_min), self.t_max)
+
+    def start(self, guess: float, key=None, sample=None) -> float:
+        """Starts a new solve.
+
+        Args:
+            guess (float): initial guess in s, used if nothing is cached
+            key (hashable, optional): cache key, e.g. the SMU set value. If it is not cached, the last cached value of the sample is used.
+            sample (hashable, optional): sample name, rates are not shared between samples
+
+        Returns:
+            float: integration time for the first exposure in s
+        """
+        self._key = key
+        self._sample = sample
+        self._too_short = None
+        self._too_long = None
+        self._points = []
+        cps = None
+        if key is not None and (sample, key) in self.cache:
+            self.cache.move_to_end((sample, key))
+            cps = self.cache[(sample, key)]
+        elif sample in self._last_rate:
+            cps = self._last_rate[sample]
+        if cps:
+            guess = self.target / cps
+        return self._clamp(guess)
+
+    def _cache_rate(self, cps: float):
+        for cache, key in ((self.cache, (self._sample, self._key)), (self._last_rate, self._sample)):
+            cache[key] = cps
+            cache.move_to_end(key)
+            if len(cache) > self.max_cached:
+                cache.popitem(last=False)
+
+    def update(self, t: float, peak: float) -> tuple[str, float]:
+        """Takes the peak measured with integration time t and returns the next step.
+
+        Returns:
+            tuple[str, float]: ("done", t) if the peak is in range, ("next", new time) for another exposure,
+                ("too high", t) if the peak is too low at t_max, ("too low", t) if the peak is too high at t_min
+        """
+        if self.value_min <= peak <= self.value_max:
+            if t > 0 and peak > 0:
+                self._cache_rate(peak / t)
+            return "done", t
+        if peak < self.value_min:
+            if t >= self.t_max:
+                return "too high", t
+            self._too_short = t if self._too_short is None else max(self._too_short, t)
+        else:
+            if t <= self.t_min:
+                return "too low", t
+            self._too_long = t if self._too_long is None else min(self._too_long, t)
+
+        candidate = None
+        if peak >= self.saturation:
+            # the real peak is unknown, only bisection of the bracket is safe
+            candidate = None
+        else:
+            self._points.append((t, peak))
+            if len(self._points) >= 2:
+                (t1, p1), (t2, p2) = self._points[-2:]
+                if t2 != t1 and (p2 - p1) / (t2 - t1) > 0:
+                    candidate = t2 + (self.target - p2) * (t2 - t1) / (p2 - p1)
+            if candidate is None and peak > 0:
+                candidate = t * self.target / peak
+
+        low = self.t_min if self._too_short is None else self._too_short
+        high = self.t_max if self._too_long is None else self._too_long
+        if candidate is not None and np.isfinite(candidate):
+            candidate = self._clamp(candidate)
+            # measured bracket ends are excluded, the limits themselves may still be tried
+            if (self._too_short is None or candidate > low) and (self._too_long is None or candidate < high):
+                return "next", candidate
+        candidate = float(np.sqrt(low * high))
+        # log scale bisection only approaches the limits, try them directly when close
+        if self._too_short is None and candidate < 2 * self.t_min:
+            candidate = self.t_min
+        elif self._too_long is None and candidate > self.t_max / 2:
+            candidate = self.t_max
+        return "next", candidate
+
+
 class DataOrder(Enum):
     """Enum for data ordering."""
 
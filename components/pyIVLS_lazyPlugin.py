@@ -0,0 +1,218 @@
+"""
+Stand-in for a plugin that is imported on first use.
+
+A plugin section with lazy = True in the .ini file is registered as a LazyPlugin. The plugin module is not imported
+and its widgets are not built at startup. The plugin is loaded when its settings tab is shown, when another plugin or
+the sequence builder calls one of its public functions, or when load() is called.
+
+Until then the hooks are answered from what is known without importing the plugin: the public function names come
+from the signature table that the plugin registry saved when the plugin was last loaded, and the settings from the
+settings section of the .ini file. The log, info and close lock signals of the plugin are forwarded through signals of
+the LazyPlugin, so they can be connected before the plugin is loaded. Plugins are always loaded in the GUI thread, calls
+from other threads wait for it.
+
+This file includes:
+- LazyPlugin: pluggy plugin that loads the real plugin on first use
+"""
+
+import logging
+
+import pluggy
+from PyQt6.QtCore import QObject, Qt, QThread, QTimer, pyqtSignal, pyqtSlot
+from PyQt6.QtWidgets import QLabel, QVBoxLayout, QWidget
+
+logger = logging.getLogger(__name__)
+
+
+class _PlaceholderWidget(QWidget):
+    """Settings tab of a plugin that is not loaded yet. Loads the plugin when shown."""
+
+    def __init__(self, lazy_plugin: "LazyPlugin"):
+        super().__init__()
+        self.lazy_plugin = lazy_plugin
+        self.label = QLabel(f"Loading {lazy_plugin.name}...")
+        self.label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.label)
+        self._filled = False
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self._filled:
+            self._filled = True
+            # let the tab paint the label before the plugin is imported
+            QTimer.singleShot(0, self._fill)
+
+    def _fill(self):
+        try:
+            widget = self.lazy_plugin.setup_widget()
+        except Exception as e:
+            self.label.setText(f"Failed to load {self.lazy_plugin.name}: {e}")
+            return
+        self.label.hide()
+        self.layout().addWidget(widget)
+
+
+class LazyPlugin(QObject):
+    """Registered in the plugin manager instead of a plugin that is loaded on first use.
+
+    Args:
+        name (str): plugin name
+        function (str): plugin function from the .ini file
+        functions (list[str]): names of the public functions of the plugin, empty if not known
+        settings (dict): settings of the plugin from the .ini file
+        factory (callable): imports the plugin and returns an instance of the plugin class
+        on_loaded (callable, optional): called in the GUI thread as on_loaded(lazy_plugin, missing) after the plugin
+            was loaded, missing is the return value of its set_function hook
+    """
+
+    hookimpl = pluggy.HookimplMarker("pyIVLS")
+
+    log_signal = pyqtSignal(str)
+    info_signal = pyqtSignal(str)
+    closeLock = pyqtSignal(bool)
+    _load_request = pyqtSignal()
+
+    def __init__(self, name: str, function: str, functions: list[str], settings: dict, factory, on_loaded=None):
+        super().__init__()
+        self.name = name
+        self.function = function
+        self.function_names = list(functions)
+        self.settings = dict(settings)
+        self._factory = factory
+        self._on_loaded = on_loaded
+        self.instance = None
+        self.load_error: Exception | None = None
+        self._plugin_data = None
+        self._function_dict = None
+        self._functions = {}
+        self._stubs = {function_name: self._stub(function_name) for function_name in self.function_names}
+        # loads from other threads wait for the GUI thread
+        self._load_request.connect(self._load, type=Qt.ConnectionType.BlockingQueuedConnection)
+
+    @property
+    def loaded(self) -> bool:
+        return self.instance is not None
+
+    def load(self):
+        """Import and instantiate the plugin if it is not loaded yet.
+
+        Returns:
+            object: the plugin instance
+
+        Raises:
+            Exception: whatever importing or instantiating the plugin raised
+        """
+        if self.instance is None:
+            if QThread.currentThread() is self.thread():
+                self._load()
+            else:
+                self._load_request.emit()
+        if self.instance is None:
+            raise self.load_error if self.load_error is not None else RuntimeError(f"Plugin {self.name} is not loaded")
+        return self.instance
+
+    @pyqtSlot()
+    def _load(self):
+        if self.instance is not None:
+            return
+        try:
+            instance = self._factory()
+        except Exception as e:
+            logger.error(f"Failed to load plugin {self.name}: {e}")
+            self.load_error = e
+            return
+        self.load_error = None
+        for hook, signal in (("get_log", self.log_signal), ("get_info", self.info_signal), ("get_closeLock", self.closeLock)):
+            if hasattr(instance, hook):
+                ret = getattr(instance, hook)()
+                if ret:
+                    ret[self.name].connect(signal)
+        if hasattr(instance, "get_functions"):
+            self._functions = (instance.get_functions() or {}).get(self.name, {})
+        self.instance = instance
+        missing = None
+        if self._function_dict is not None and hasattr(instance, "set_function"):
+            missing = instance.set_function(function_dict=self._function_dict)
+        if self._on_loaded is not None:
+            self._on_loaded(self, missing)
+
+    def setup_widget(self):
+        """Load the plugin and return its settings widget."""
+        instance = self.load()
+        return instance.get_setup_interface(plugin_data=self._plugin_data)[self.name]
+
+    def _stub(self, function_name: str):
+        def call(*args, **kwargs):
+            try:
+                self.load()
+            except Exception as e:
+                return (3, {"Error message": f"Plugin {self.name} failed to load: {e}"})
+            if function_name not in self._functions:
+                return (3, {"Error message": f"Plugin {self.name} has no public function {function_name}"})
+            return self._functions[function_name](*args, **kwargs)
+
+        call.__name__ = function_name
+        return call
+
+    def _matches(self, args) -> bool:
+        return args is None or args.get("function") == self.function
+
+    @hookimpl
+    def get_setup_interface(self, plugin_data: dict) -> dict:
+        self._plugin_data = plugin_data
+        self.settings = dict(plugin_data.get(self.name, {}).get("settings", self.settings))
+        if self.loaded:
+            return self.instance.get_setup_interface(plugin_data=plugin_data)
+        return {self.name: _PlaceholderWidget(self)}
+
+    @hookimpl
+    def get_MDI_interface(self, args=None):
+        # the MDI window is added when the plugin is loaded
+        if self.loaded and hasattr(self.instance, "get_MDI_interface"):
+            return self.instance.get_MDI_interface(args)
+
+    @hookimpl
+    def get_functions(self, args=None):
+        if self.loaded:
+            return self.instance.get_functions(args) if hasattr(self.instance, "get_functions") else None
+        if not self._matches(args):
+            return None
+        if not self.function_names:
+            # the function names are not known before the plugin has been loaded once
+            try:
+                self.load()
+            except Exception:
+                return None
+            return self.get_functions(args)
+        return {self.name: dict(self._stubs)}
+
+    @hookimpl
+    def set_function(self, function_dict):
+        self._function_dict = function_dict
+        if self.loaded and hasattr(self.instance, "set_function"):
+            return self.instance.set_function(function_dict=function_dict)
+
+    @hookimpl
+    def get_log(self, args=None):
+        if self._matches(args):
+            return {self.name: self.log_signal}
+
+    @hookimpl
+    def get_info(self, args=None):
+        if self._matches(args):
+            return {self.name: self.info_signal}
+
+    @hookimpl
+    def get_closeLock(self, args=None):
+        if self._matches(args):
+            return {self.name: self.closeLock}
+
+    @hookimpl
+    def get_plugin_settings(self, args=None):
+        if self.loaded:
+            return self.instance.get_plugin_settings(args) if hasattr(self.instance, "get_plugin_settings") else None
+        if self._matches(args):
+            # nothing was changed in the widgets, the settings are the ones from the .ini file
+            return (self.name, 0, dict(self.settings))
@@ -0,0 +1,158 @@
+"""
+Cached registry of plugin metadata and public functions.
+
+The plugin list is read again whenever the plugin loader refreshes, and the public functions are collected again
+whenever a plugin is registered or unregistered. The registry keeps what was read, so that only the plugins that
+changed are read again:
+- the metadata of a plugin from the .ini file, keyed on a hash of the plugin and settings sections
+- the public functions of a registered plugin instance, collected once per instance
+- the signature table of the public functions, keyed on the modification time of the plugin folder. The table is saved
+  to a file, so that plugins loaded on first use know their public functions after a restart.
+
+This file includes:
+- PluginRegistry: cache of plugin metadata and public functions
+"""
+
+import hashlib
+import inspect
+import json
+import logging
+import os
+from configparser import ConfigParser
+
+logger = logging.getLogger(__name__)
+
+
+class PluginRegistry:
+    """Cache of plugin metadata and public functions.
+
+    Args:
+        cache_file (str): file where the signature tables are saved
+    """
+
+    def __init__(self, cache_file: str):
+        self.cache_file = cache_file
+        # plugin name -> {"folder": mtime of the plugin folder, "signatures": {function name: signature}}, saved to cache_file
+        self._tables: dict[str, dict] = {}
+        # plugin name -> (hash of the ini sections, metadata)
+        self._metadata: dict[str, tuple[str, dict]] = {}
+        # plugin name -> (plugin instance, return value of its get_functions hook)
+        self._functions: dict[str, tuple[object, dict | None]] = {}
+        self._changed = False
+        self.load()
+
+    def load(self) -> None:
+        """Reads the saved signature tables. A missing or broken file leaves the registry empty."""
+        try:
+            with open(self.cache_file) as cache:
+                tables = json.load(cache)
+        except (OSError, ValueError) as e:
+            logger.debug(f"No plugin registry read from {self.cache_file}: {e}")
+            return
+        if isinstance(tables, dict):
+            self._tables = tables
+
+    def save(self) -> None:
+        """Writes the signature tables if they have changed."""
+        if not self._changed:
+            return
+        try:
+            with open(self.cache_file, "w") as cache:
+                json.dump(self._tables, cache, indent=1, sort_keys=True)
+            self._changed = False
+        except OSError as e:
+            logger.warning(f"Failed to write the plugin registry {self.cache_file}: {e}")
+
+    @staticmethod
+    def ini_hash(config: ConfigParser, plugin_name: str) -> str:
+        """Hash of the plugin and settings sections of a plugin."""
+        digest = hashlib.sha1()
+        for section in (f"{plugin_name}_plugin", f"{plugin_name}_settings"):
+            if config.has_section(section):
+                digest.update(repr(sorted(config.items(section, raw=True))).encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    @staticmethod
+    def folder_mtime(folder: str) -> int:
+        """Latest modification time of a plugin folder and the files in it, in ns. Editing a file does not change the
+        modification time of the folder, so the files are checked as well. 0 if the folder does not exist."""
+        try:
+            mtime = os.stat(folder).st_mtime_ns
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        mtime = max(mtime, entry.stat().st_mtime_ns)
+        except OSError:
+            return 0
+        return mtime
+
+    def metadata(self, config: ConfigParser, plugin_name: str, build) -> dict:
+        """Metadata of a plugin, built again only if its .ini sections have changed.
+
+        Args:
+            config (ConfigParser): the plugin configuration
+            plugin_name (str): plugin name
+            build (callable): returns the metadata of the plugin, called without arguments
+
+        Returns:
+            dict: a copy of the metadata, the settings are copied as well
+        """
+        ini_hash = self.ini_hash(config, plugin_name)
+        cached = self._metadata.get(plugin_name)
+        if cached is None or cached[0] != ini_hash:
+            cached = (ini_hash, build())
+            self._metadata[plugin_name] = cached
+        metadata = dict(cached[1])
+        if "settings" in metadata:
+            metadata["settings"] = dict(metadata["settings"])
+        return metadata
+
+    def functions(self, plugin_name: str, plugin_instance, folder: str, save_signatures: bool = True) -> dict | None:
+        """Public functions of a registered plugin, collected only once per plugin instance.
+
+        Args:
+            plugin_name (str): plugin name
+            plugin_instance (object): the registered plugin
+            folder (str): plugin folder, the signature table is keyed on its modification time
+            save_signatures (bool): update the signature table. False when the functions are stand-ins, for example of a
+                plugin that is not loaded yet.
+
+        Returns:
+            dict | None: return value of the get_functions hook of the plugin
+        """
+        cached = self._functions.get(plugin_name)
+        if cached is not None and cached[0] is plugin_instance:
+            return cached[1]
+        functions = plugin_instance.get_functions() if hasattr(plugin_instance, "get_functions") else None
+        self._functions[plugin_name] = (plugin_instance, functions)
+        if save_signatures and functions:
+            self._update_signatures(plugin_name, folder, functions.get(plugin_name, {}))
+        return functions
+
+    def forget(self, plugin_name: str) -> None:
+        """Drops the collected public functions of a plugin, for example when it is unregistered or was loaded."""
+        self._functions.pop(plugin_name, None)
+
+    def signatures(self, plugin_name: str, folder: str) -> dict | None:
+        """Saved signature table of a plugin.
+
+        Returns:
+            dict | None: function name -> signature, None if not saved or the plugin folder has changed since
+        """
+        table = self._tables.get(plugin_name)
+        if table is None or table.get("folder") != self.folder_mtime(folder):
+            return None
+        return dict(table.get("signatures", {}))
+
+    def _update_signatures(self, plugin_name: str, folder: str, methods: dict) -> None:
+        signatures = {}
+        for function_name, function in methods.items():
+            try:
+                signatures[function_name] = str(inspect.signature(function))
+            except (TypeError, ValueError):
+                signatures[function_name] = "(...)"
+        table = {"folder": self.folder_mtime(folder), "signatures": signatures}
+        if self._tables.get(plugin_name) != table:
+            self._tables[plugin_name] = table
+            self._changed = True
@@ -0,0 +1,184 @@
+"""
+Compiled execution plan for the sequence builder.
+
+The recipe tree is compiled once into a flat list of instructions, and the executor walks it with a program counter
+and a stack of loop counters. A loop compiles to:
+    loop     - set the loop settings, read the number of iterations and push a loop counter
+    iterate  - call loopingIteration of the loop plugin for the next iteration
+    ...        the instructions of the loop body
+    end      - jump back to iterate if iterations are left, otherwise pop the loop counter
+
+The iteration logic is the one of the original parser: the body of a loop is run at least once, loopingIteration is
+called at the start of every iteration, and after a failed step the remaining steps of the iteration are skipped.
+
+setSettings is only called when the settings of a plugin may differ from the ones it holds. The executor keeps the
+settings given to every plugin and drops them when they may have changed:
+- a step modifies the settings of its plugin (sweep adds the iteration postfix to the file name)
+- setSettings, steps and iterations of a plugin may change the settings of related plugins. Plugins are related when they
+  share a declared dependency function, or one provides a function the other depends on (affineMove gives settings to
+  the micromanipulator, camera and positioning plugins in setSettings).
+loopingIteration may change the settings of the loop plugin (itc503 sets the temperature of the iteration), but loop
+plugins recompute these settings from the sweep settings in every iteration. A loop entered again in an outer loop
+therefore keeps its settings unless a related plugin has run, and a plugin that keeps state between iterations would
+break this assumption.
+
+This file includes:
+- Instruction: a single instruction of a compiled sequence
+- compile_recipe: compiles the recipe data extracted from the sequence builder model
+- SequenceExecutor: runs a compiled sequence
+"""
+
+import logging
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+STEP = "step"
+LOOP = "loop"
+ITERATE = "iterate"
+END = "end"
+
+
+class Instruction(NamedTuple):
+    """A single instruction. target is the index of the iterate instruction for end instructions, -1 otherwise."""
+
+    op: str
+    function: str
+    settings: dict | None = None
+    target: int = -1
+
+
+def compile_recipe(data: list[dict]) -> list[Instruction]:
+    """Compiles recipe data to a flat list of instructions.
+
+    Args:
+        data (list[dict]): recipe items with function, class, settings and looping for the items of a loop
+
+    Returns:
+        list[Instruction]: the program
+    """
+    program: list[Instruction] = []
+
+    def emit(items):
+        for item in items:
+            if item["class"] == "loop":
+                program.append(Instruction(LOOP, item["function"], item["settings"]))
+                iterate = len(program)
+                program.append(Instruction(ITERATE, item["function"]))
+                emit(item.get("looping", []))
+                program.append(Instruction(END, item["function"], target=iterate))
+            else:
+                program.append(Instruction(STEP, item["function"], item["settings"]))
+
+    emit(data)
+    return program
+
+
+class _LoopCounter:
+    __slots__ = ("function", "total", "current", "postfix")
+
+    def __init__(self, function: str, total: int):
+        self.function = function
+        self.total = total
+        self.current = 0
+        self.postfix = ""
+
+
+class SequenceExecutor:
+    """Runs a compiled sequence.
+
+    Args:
+        program (list[Instruction]): from compile_recipe
+        instructions (dict): plugin name -> {"functions": public functions, "function": plugin function,
+            "dependencies": set of dependency functions}, the available instructions of the sequence builder. Plugins
+            without function and dependencies are not related to other plugins.
+    """
+
+    def __init__(self, program: list[Instruction], instructions: dict):
+        self.program = program
+        self.instructions = instructions
+        self.skip_iteration = False
+        self.settings_pushed = 0
+        self.settings_skipped = 0
+        # plugin name -> settings given with setSettings that the plugin still holds
+        self._pushed: dict[str, dict] = {}
+        # plugin name -> other plugins whose settings it may change
+        self._related: dict[str, set[str]] = {}
+
+    def _related_plugins(self, function: str) -> set[str]:
+        related = self._related.get(function)
+        if related is None:
+            info = self.instructions[function]
+            dependencies = set(info.get("dependencies", ()))
+            provides = {info["function"]} if info.get("function") else set()
+            related = set()
+            for other, other_info in self.instructions.items():
+                if other == function:
+                    continue
+                other_dependencies = set(other_info.get("dependencies", ()))
+                if (dependencies & other_dependencies) or (provides & other_dependencies) or other_info.get("function") in dependencies:
+                    related.add(other)
+            self._related[function] = related
+        return related
+
+    def _invalidate(self, function: str, itself: bool) -> None:
+        """Drops the settings held by the plugins related to a plugin that was set or has run, and by the plugin itself."""
+        if itself:
+            self._pushed.pop(function, None)
+        for other in self._related_plugins(function):
+            self._pushed.pop(other, None)
+
+    def _set_settings(self, function: str, settings: dict) -> None:
+        pushed = self._pushed.get(function)
+        if pushed is not None and (pushed is settings or pushed == settings):
+            self.settings_skipped += 1
+            return
+        self.instructions[function]["functions"]["setSettings"](settings)
+        self._invalidate(function, itself=False)
+        self._pushed[function] = settings
+        self.settings_pushed += 1
+
+    def run(self) -> None:
+        """Runs the program.
+
+        Raises:
+            ValueError: loopingIteration of a loop plugin failed
+        """
+        program = self.program
+        loops: list[_LoopCounter] = []
+        self.skip_iteration = False
+        self._pushed = {}
+        pc = 0
+        while pc < len(program):
+            instruction = program[pc]
+            pc += 1
+            if instruction.op == STEP:
+                # If skip flag is set, skip all steps until next iteration boundary
+                if self.skip_iteration:
+                    continue
+                self._set_settings(instruction.function, instruction.settings)
+                namePostfix = "".join(loop.postfix for loop in loops)
+                self._invalidate(instruction.function, itself=True)
+                [status, message] = self.instructions[instruction.function]["functions"]["sequenceStep"](namePostfix)
+                if status:
+                    # Set skip flag and continue skipping steps until next iteration
+                    self.skip_iteration = True
+                    logger.info(f"Skipping iteration due to step error: {message}")
+            elif instruction.op == LOOP:
+                self._set_settings(instruction.function, instruction.settings)
+                loops.append(_LoopCounter(instruction.function, self.instructions[instruction.function]["functions"]["getIterations"]()))
+            elif instruction.op == ITERATE:
+                loop = loops[-1]
+                self._invalidate(loop.function, itself=False)
+                [status, iterText] = self.instructions[loop.function]["functions"]["loopingIteration"](loop.current)
+                if status:
+                    raise ValueError(iterText)
+                loop.postfix = iterText
+                loop.current += 1
+                # Reset skip flag at the start of each new iteration
+                self.skip_iteration = False
+            elif instruction.op == END:
+                if loops[-1].current < loops[-1].total:
+                    pc = instruction.target
+                else:
+                    loops.pop()
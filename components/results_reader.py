@@ -0,0 +1,352 @@
+"""
+Reader for the files written by pyIVLS measurements.
+
+A results directory is indexed once: only the file headers are parsed, into structured metadata, and the position
+of the data in each file is kept. Data is read when it is asked for, so thousands of files can be filtered by their
+metadata without loading them. Spectra stored in spectral datasets (see spectral_dataset.py) are memory mapped.
+
+Supported files:
+- *.dat: SMU measurements (sweep, timeIV, ...) with the legacy "#" header and a line of column names
+- *.csv: spectra with the spectrometer header (FileManager.create_spectrometer_header)
+- *.spds: spectral datasets, every spectrum in the dataset is a record
+
+This file includes:
+- MeasurementRecord: Dataclass for a single measurement, its metadata and lazy access to its data
+- ResultsIndex: Class for indexing a directory and querying the records
+- read_iv_file: function to read a single SMU measurement file
+"""
+
+import fnmatch
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+import numpy as np
+from spectral_dataset import DATASET_SUFFIX, read_dataset
+
+IV_SUFFIX = ".dat"
+SPECTRUM_SUFFIX = ".csv"
+
+# patterns for the lines of the SMU file header, see sweepCommon.create_file_header and FileManager.create_file_header
+_IV_HEADER_PATTERNS = (
+    ("sample", re.compile(r"measurement of (.*)$"), str),
+    ("channel", re.compile(r"Keithley source (\w+)"), str),
+    ("inject", re.compile(r"^Source in (\w+) injection mode"), str),
+    ("draininject", re.compile(r"^Drain in (\w+) injection mode"), str),
+    ("drainvoltage", re.compile(r"Back voltage (?:set to drain is|to PD) (\S+) V"), float),
+    ("drainvalue", re.compile(r"Set value for drain (\S+)"), float),
+    ("sourcevalue", re.compile(r"Set value for time check (\S+)"), float),
+    ("start", re.compile(r"Start value for sweep (\S+)"), float),
+    ("end", re.compile(r"End value for sweep (\S+)"), float),
+    ("points", re.compile(r"Steps in sweep (\d+)"), int),
+    ("repeat", re.compile(r"Sweep repeat for (\d+) times"), int),
+    ("comment", re.compile(r"^Comment: ?(.*)$"), str),
+)
+_SENSE_PATTERN = re.compile(r"^(Sourse|Source|Drain) (?:in (\d) point measurement mode|performs both)")
+_LEGACY_SENSE_PATTERN = re.compile(r"^(\d) wire measurements")
+_DATE_PATTERN = re.compile(r"^date (.*)$")
+_DATE_FORMATS = ("%d-%b-%Y, %H:%M:%S", "%d-%b-%Y %H:%M:%S")  # current and old measurement station
+
+
+def _parse_iv_header(lines: list[str]) -> dict[str, Any]:
+    metadata = {}
+    for line in lines:
+        text = line.lstrip("#").strip()
+        if not text:
+            continue
+        date = _DATE_PATTERN.match(text)
+        if date:
+            metadata["date"] = date.group(1)
+            for date_format in _DATE_FORMATS:
+                try:
+                    metadata["date"] = datetime.strptime(date.group(1), date_format)
+                    break
+                except ValueError:
+                    pass
+            continue
+        sense = _SENSE_PATTERN.match(text)
+        if sense:
+            key = "drainsensemode" if sense.group(1) == "Drain" else "sourcesensemode"
+            metadata[key] = f"{sense.group(2)} wire" if sense.group(2) else "both"
+            continue
+        sense = _LEGACY_SENSE_PATTERN.match(text)
+        if sense:
+            metadata.setdefault("sourcesensemode", f"{sense.group(1)} wire")
+            continue
+        for key, pattern, convert in _IV_HEADER_PATTERNS:
+            match = pattern.search(text)
+            if match and key not in metadata:
+                try:
+                    metadata[key] = convert(match.group(1).strip())
+                except ValueError:
+                    metadata[key] = match.group(1).strip()
+                break
+    if metadata.get("sample") == "{noname}":
+        metadata["sample"] = ""
+    # timeIV stores the drain voltage as the drain set value
+    if "drainvoltage" not in metadata and metadata.get("draininject") == "voltage" and "drainvalue" in metadata:
+        metadata["drainvoltage"] = metadata["drainvalue"]
+    return metadata
+
+
+def _parse_spectrum_header(lines: list[str]) -> dict[str, Any]:
+    metadata = {}
+    fields = {}
+    for line in lines:
+        text = line.lstrip("#").strip()
+        if ";" in text:
+            key, _, value = text.partition(";")
+            fields[key.strip()] = value.strip().strip('"')
+    for key, name, convert in (
+        ("IntegrationTime", "integrationtime", float),
+        ("TriggerMode", "triggermode", int),
+        ("Name", "sample", str),
+        ("Comment", "comment", str),
+        ("Timestamp", "timestamp", str),
+    ):
+        if key in fields:
+            try:
+                metadata[name] = convert(fields[key])
+            except ValueError:
+                metadata[name] = fields[key]
+    if "Date" in fields and "Time" in fields:
+        try:
+            metadata["date"] = datetime.strptime(fields["Date"] + fields["Time"][:6], "%Y%m%d%H%M%S")
+        except ValueError:
+            pass
+    return metadata
+
+
+def _read_header(address: str) -> tuple[list[str], str | None, int, int]:
+    """Reads the "#" lines at the start of a file.
+
+    Returns:
+        tuple[list[str], str | None, int, int]: header lines, the first line that is not a comment (None at end of file),
+            byte offsets of the start and of the end of that line
+    """
+    lines = []
+    offset = 0
+    with open(address, "rb") as f:
+        for raw in f:
+            line = raw.decode(errors="replace").rstrip("\r\n")
+            if not line.startswith("#"):
+                return lines, line, offset, offset + len(raw)
+            lines.append(line)
+            offset += len(raw)
+    return lines, None, offset, offset
+
+
+def read_iv_file(address: str) -> tuple[dict[str, Any], list[str], np.ndarray]:
+    """Reads an SMU measurement file.
+
+    Returns:
+        tuple[dict, list[str], np.ndarray]: metadata from the header, column names, data
+    """
+    header, columns_line, _, offset = _read_header(address)
+    columns = [column.strip() for column in columns_line.split(",")] if columns_line else []
+    with open(address, "rb") as f:
+        f.seek(offset)
+        data = np.genfromtxt(f, delimiter=",", ndmin=2)
+    return _parse_iv_header(header), columns, data
+
+
+@dataclass
+class MeasurementRecord:
+    """A single measurement: a file, or a spectrum in a dataset. Data is read on first access to data and kept."""
+
+    path: str
+    kind: str  # "iv", "spectrum" or "dataset"
+    metadata: dict[str, Any]
+    columns: list[str] = field(default_factory=list)
+    offset: int = 0  # byte offset of the data in the file, row index for a dataset
+    _data: np.ndarray | None = field(default=None, repr=False, compare=False)
+    _index: Any = field(default=None, repr=False, compare=False)
+
+    @property
+    def name(self) -> str:
+        """File name, or the label of a spectrum in a dataset."""
+        if self.kind == "dataset":
+            return self.metadata.get("label") or f"{os.path.basename(self.path)}[{self.offset}]"
+        return os.path.basename(self.path)
+
+    @property
+    def data(self) -> np.ndarray:
+        """Data of the measurement. For spectra the columns are wavelength and intensity, dataset rows are read from the memory map on every access."""
+        if self._data is None:
+            if self.kind == "dataset":
+                wavelength, intensity = self._index._dataset_arrays(self.path)
+                return np.column_stack((wavelength, intensity[self.offset]))
+            delimiter = ";" if self.kind == "spectrum" else ","
+            with open(self.path, "rb") as f:
+                f.seek(self.offset)
+                self._data = np.genfromtxt(f, delimiter=delimiter, comments="#", ndmin=2)
+        return self._data
+
+    def column(self, name: str) -> np.ndarray:
+        """Returns a data column by its name in the file header."""
+        return self.data[:, self.columns.index(name)]
+
+
+class ResultsIndex:
+    """Index of the measurements in a results directory.
+
+    Only the headers are read when indexing. refresh() adds new files and reparses changed ones, the rest is kept.
+
+    Usage:
+        index = ResultsIndex("/data/run1")
+        for record in index.query(kind="iv", sample="chip 3", drainvoltage=1.0, postfix="_x2"):
+            current = record.column("IS")
+    """
+
+    def __init__(self, directory: str, recursive: bool = True):
+        """
+        Args:
+            directory (str): results directory
+            recursive (bool, optional): index subdirectories as well. Defaults to True.
+        """
+        self.directory = directory
+        self.recursive = recursive
+        self._files = {}  # path -> (mtime, size, records)
+        self._datasets = {}  # path -> (mtime, size, wavelength, intensity)
+        self.refresh()
+
+    def __len__(self) -> int:
+        return sum(len(records) for _, _, records in self._files.values())
+
+    def __iter__(self):
+        return iter(self.records)
+
+    @property
+    def records(self) -> list[MeasurementRecord]:
+        return [record for path in sorted(self._files) for record in self._files[path][2]]
+
+    def _paths(self):
+        for root, dirs, files in os.walk(self.directory):
+            if not self.recursive:
+                dirs[:] = []
+            # datasets are single records sources, not directories to walk
+            for name in [name for name in dirs if name.endswith(DATASET_SUFFIX)]:
+                dirs.remove(name)
+                yield os.path.join(root, name)
+            for name in files:
+                if name.endswith((IV_SUFFIX, SPECTRUM_SUFFIX)):
+                    yield os.path.join(root, name)
+
+    def refresh(self) -> None:
+        """Indexes new and changed files, drops removed ones."""
+        found = {}
+        for path in self._paths():
+            try:
+                if path.endswith(DATASET_SUFFIX):
+                    stat = os.stat(os.path.join(path, "rows.jsonl"))
+                else:
+                    stat = os.stat(path)
+            except OSError:
+                continue
+            known = self._files.get(path)
+            if known is not None and known[0] == stat.st_mtime_ns and known[1] == stat.st_size:
+                found[path] = known
+                continue
+            try:
+                records = self._index_file(path)
+            except (OSError, ValueError, KeyError):
+                # not a pyIVLS file or not readable
+                continue
+            found[path] = (stat.st_mtime_ns, stat.st_size, records)
+        self._files = found
+        self._datasets = {path: value for path, value in self._datasets.items() if path in found}
+
+    def _index_file(self, path: str) -> list[MeasurementRecord]:
+        if path.endswith(DATASET_SUFFIX):
+            self._datasets.pop(path, None)
+            _, _, rows = read_dataset(path)
+            records = []
+            for row_index, row in enumerate(rows):
+                metadata = dict(row)
+                metadata.setdefault("sample", metadata.get("name", ""))
+                records.append(MeasurementRecord(path, "dataset", metadata, ["wavelength", "intensity"], row_index, _index=self))
+            return records
+        header, first_line, line_start, line_end = _read_header(path)
+        if not header:
+            raise ValueError(f"{path} has no pyIVLS header")
+        if path.endswith(SPECTRUM_SUFFIX):
+            if not any("[SpectrumHeader]" in line for line in header):
+                raise ValueError(f"{path} is not a spectrum file")
+            # the first line after the header is already data
+            return [MeasurementRecord(path, "spectrum", _parse_spectrum_header(header), ["wavelength", "intensity"], line_start, _index=self)]
+        # the first line after the header holds the column names
+        columns = [column.strip() for column in first_line.split(",")] if first_line else []
+        return [MeasurementRecord(path, "iv", _parse_iv_header(header), columns, line_end, _index=self)]
+
+    def _dataset_arrays(self, path: str) -> tuple[np.ndarray, np.ndarray]:
+        mtime, size, _ = self._files[path]
+        cached = self._datasets.get(path)
+        if cached is None or cached[0] != mtime or cached[1] != size:
+            wavelength, intensity, _ = read_dataset(path)
+            cached = (mtime, size, wavelength, intensity)
+            self._datasets[path] = cached
+        return cached[2], cached[3]
+
+    @staticmethod
+    def _matches(record: MeasurementRecord, key: str, expected) -> bool:
+        if key == "kind":
+            return record.kind == expected
+        if key == "postfix":
+            # loop postfixes are appended to the file name by the sequence builder
+            return expected in os.path.splitext(record.name)[0]
+        if key == "name":
+            return fnmatch.fnmatch(record.name, expected)
+        if key not in record.metadata:
+            return False
+        value = record.metadata[key]
+        if callable(expected):
+            return bool(expected(value))
+        if isinstance(expected, float) and isinstance(value, (int, float)):
+            return bool(np.isclose(value, expected))
+        if isinstance(expected, str) and isinstance(value, str):
+            return value.lower() == expected.lower()
+        return value == expected
+
+    def query(self, **filters) -> list[MeasurementRecord]:
+        """Returns the records matching all filters.
+
+        Filters:
+            kind: "iv", "spectrum" or "dataset"
+            name: shell pattern for the file name (label for dataset spectra)
+            postfix: text contained in the file name, e.g. a loop postfix
+            any metadata key (sample, drainvoltage, sourcesensemode, drainsensemode, integrationtime, ...):
+                floats are compared with np.isclose, strings ignoring case, a callable is used as a predicate on the value
+        """
+        return [record for record in self.records if all(self._matches(record, key, expected) for key, expected in filters.items())]
+
+    def spectra(self, records: list[MeasurementRecord]) -> tuple[np.ndarray, np.ndarray]:
+        """Stacks spectra into a matrix. Spectra of one dataset are taken with a single indexing of its memory map.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: wavelength axis of the first spectrum, intensity matrix (spectra x pixels)
+        """
+        if not records:
+            return np.empty(0), np.empty((0, 0))
+        rows = [None] * len(records)
+        wavelength = None
+        by_dataset = {}
+        for position, record in enumerate(records):
+            if record.kind == "dataset":
+                by_dataset.setdefault(record.path, []).append((position, record.offset))
+            elif record.kind == "spectrum":
+                data = record.data
+                rows[position] = data[:, 1]
+                if wavelength is None:
+                    wavelength = data[:, 0]
+            else:
+                raise ValueError(f"{record.name} is not a spectrum")
+        for path, items in by_dataset.items():
+            dataset_wavelength, intensity = self._dataset_arrays(path)
+            selected = intensity[[offset for _, offset in items]]
+            for (position, _), row in zip(items, selected):
+                rows[position] = row
+            if wavelength is None:
+                wavelength = dataset_wavelength
+        return wavelength, np.vstack(rows)
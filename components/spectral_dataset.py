@@ -0,0 +1,235 @@
+"""
+Consolidated storage for spectra, replacing one CSV file per spectrum.
+
+A dataset is a directory (by convention with the .spds suffix) with:
+- dataset.json: format name and version, number of pixels, intensity dtype, axis units
+- wavelength.npy: the wavelength axis shared by all spectra
+- intensity.bin: raw little-endian float64 matrix, one row of pixels per spectrum, C order.
+    The file is grown in chunks of rows, so it may be longer than the number of spectra.
+- rows.jsonl: one JSON object per spectrum with its metadata (label, integration time, trigger mode, SMU readings, ...)
+
+A spectrum is added by writing its intensities first and its metadata line after that, so the number of complete
+lines in rows.jsonl is the number of valid spectra, also after a crash during writing.
+The intensity matrix can be memory mapped with np.memmap, nothing else than the metadata has to be parsed to read a dataset.
+
+This file includes:
+- SpectralDatasetWriter: Class for creating a dataset or appending spectra to an existing one
+- read_dataset: function to read the wavelength axis, a memory mapped intensity matrix and the metadata of a dataset
+- export_csv: function to convert a dataset to the legacy one CSV per spectrum format
+"""
+
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+
+FORMAT_NAME = "pyIVLS spectral dataset"
+FORMAT_VERSION = 1
+DATASET_SUFFIX = ".spds"
+DEFAULT_DATASET_NAME = "spectra" + DATASET_SUFFIX
+INTENSITY_DTYPE = np.dtype("<f8")
+
+_DESCRIPTION_FILE = "dataset.json"
+_WAVELENGTH_FILE = "wavelength.npy"
+_INTENSITY_FILE = "intensity.bin"
+_ROWS_FILE = "rows.jsonl"
+
+
+def _json_default(value):
+    # numpy scalars and arrays in the metadata
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _read_rows(address: str) -> tuple[list[dict], int]:
+    """Reads the complete metadata lines. Returns the rows and the length of the file part holding them."""
+    rows = []
+    valid_length = 0
+    path = os.path.join(address, _ROWS_FILE)
+    if not os.path.isfile(path):
+        return rows, valid_length
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                # unfinished write
+                break
+            rows.append(json.loads(line))
+            valid_length += len(line)
+    return rows, valid_length
+
+
+def _read_description(address: str) -> dict:
+    with open(os.path.join(address, _DESCRIPTION_FILE)) as f:
+        description = json.load(f)
+    if description.get("format") != FORMAT_NAME:
+        raise ValueError(f"{address} is not a spectral dataset")
+    if description.get("version", 0) > FORMAT_VERSION:
+        raise ValueError(f"Spectral dataset version {description['version']} is newer than the supported version {FORMAT_VERSION}")
+    return description
+
+
+class SpectralDatasetWriter:
+    """Component that appends spectra to a dataset. A new dataset is created if the address does not exist,
+    otherwise spectra are appended to the existing one, which must have the same wavelength axis.
+
+    Every append is flushed to the OS, so the written spectra are readable while the measurement runs. Use as a
+    context manager or call close() at the end.
+    """
+
+    def __init__(self, address: str, wavelength, chunk_rows: int = 256, xaxisunit: str = "nm_air", yaxisunit: str = "intensity"):
+        """
+        Args:
+            address (str): directory of the dataset
+            wavelength (array_like): wavelength axis of the spectra
+            chunk_rows (int, optional): number of rows the intensity file is grown by. Defaults to 256.
+            xaxisunit (str, optional): unit of the wavelength axis. Defaults to "nm_air".
+            yaxisunit (str, optional): unit of the intensity. Defaults to "intensity".
+        """
+        self.address = address
+        self.wavelength = np.asarray(wavelength, dtype=np.float64)
+        self.pixels = len(self.wavelength)
+        self.chunk_rows = max(int(chunk_rows), 1)
+        self._row_bytes = self.pixels * INTENSITY_DTYPE.itemsize
+
+        if os.path.isdir(address) and os.path.isfile(os.path.join(address, _DESCRIPTION_FILE)):
+            description = _read_description(address)
+            stored_wavelength = np.load(os.path.join(address, _WAVELENGTH_FILE))
+            if description["pixels"] != self.pixels or not np.array_equal(stored_wavelength, self.wavelength):
+                raise ValueError(f"Wavelength axis does not match the existing dataset {address}")
+            rows, valid_length = _read_rows(address)
+            self.rows = len(rows)
+            self._rows_file = open(os.path.join(address, _ROWS_FILE), "ab")
+            # drop an unfinished line left by a crash
+            self._rows_file.truncate(valid_length)
+        else:
+            os.makedirs(address, exist_ok=True)
+            description = {
+                "format": FORMAT_NAME,
+                "version": FORMAT_VERSION,
+                "pixels": self.pixels,
+                "dtype": INTENSITY_DTYPE.str,
+                "xaxisunit": xaxisunit,
+                "yaxisunit": yaxisunit,
+                "created": datetime.now().isoformat(),
+            }
+            np.save(os.path.join(address, _WAVELENGTH_FILE), self.wavelength)
+            with open(os.path.join(address, _DESCRIPTION_FILE), "w") as f:
+                json.dump(description, f, indent=1)
+            open(os.path.join(address, _INTENSITY_FILE), "wb").close()
+            self.rows = 0
+            self._rows_file = open(os.path.join(address, _ROWS_FILE), "wb")
+
+        self._intensity_file = open(os.path.join(address, _INTENSITY_FILE), "r+b")
+        self._intensity_file.seek(0, os.SEEK_END)
+        self._capacity = self._intensity_file.tell() // self._row_bytes
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._rows_file.closed
+
+    def append(self, intensity, **metadata) -> int:
+        """Appends a spectrum.
+
+        Args:
+            intensity (array_like): intensities, one per pixel
+            **metadata: JSON serializable metadata of the spectrum, e.g. label, integrationtime, triggermode, readings
+
+        Returns:
+            int: index of the spectrum in the dataset
+        """
+        data = np.ascontiguousarray(intensity, dtype=INTENSITY_DTYPE)
+        if data.shape != (self.pixels,):
+            raise ValueError(f"Spectrum has shape {data.shape}, dataset has {self.pixels} pixels")
+        if self.rows >= self._capacity:
+            self._capacity = self.rows + self.chunk_rows
+            self._intensity_file.truncate(self._capacity * self._row_bytes)
+        self._intensity_file.seek(self.rows * self._row_bytes)
+        self._intensity_file.write(data.tobytes())
+        self._intensity_file.flush()
+
+        metadata.setdefault("timestamp", datetime.now().isoformat())
+        self._rows_file.write((json.dumps(metadata, default=_json_default) + "\n").encode())
+        self._rows_file.flush()
+        self.rows += 1
+        return self.rows - 1
+
+    def close(self) -> None:
+        """Syncs and closes the files. May be called more than once."""
+        if self._rows_file.closed:
+            return
+        try:
+            for f in (self._intensity_file, self._rows_file):
+                f.flush()
+                os.fsync(f.fileno())
+        finally:
+            self._intensity_file.close()
+            self._rows_file.close()
+
+
+def read_dataset(address: str) -> tuple[np.ndarray, np.ndarray, list[dict]]:
+    """Reads a dataset.
+
+    Args:
+        address (str): directory of the dataset
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, list[dict]]: wavelength axis, read only memory mapped intensity matrix (spectra x pixels), metadata of the spectra
+    """
+    description = _read_description(address)
+    wavelength = np.load(os.path.join(address, _WAVELENGTH_FILE))
+    rows, _ = _read_rows(address)
+    pixels = description["pixels"]
+    if not rows:
+        return wavelength, np.empty((0, pixels), dtype=description["dtype"]), rows
+    intensity = np.memmap(os.path.join(address, _INTENSITY_FILE), dtype=description["dtype"], mode="r", shape=(len(rows), pixels))
+    return wavelength, intensity, rows
+
+
+def export_csv(address: str, directory: str | None = None, separator: str = ";") -> list[str]:
+    """Writes every spectrum of a dataset to its own CSV file with the legacy spectrometer header.
+
+    Files are named by the label of the spectrum, or by its index if it has no label. Existing files are not overwritten.
+
+    Args:
+        address (str): directory of the dataset
+        directory (str, optional): output directory. Defaults to the directory containing the dataset.
+        separator (str, optional): value separator. Defaults to ";".
+
+    Returns:
+        list[str]: addresses of the written files
+    """
+    # FileManager pulls in Qt, the dataset itself does not need it
+    from plugin_components import FileManager
+
+    if directory is None:
+        directory = os.path.dirname(os.path.abspath(address))
+    wavelength, intensity, rows = read_dataset(address)
+    written = []
+    for index, row in enumerate(rows):
+        filename = row.get("label") or f"spectrum_{index}.csv"
+        path = os.path.join(directory, filename)
+        if os.path.exists(path):
+            raise FileExistsError(f"File already exists: {path}")
+        fileheader = FileManager.create_spectrometer_header(row, separator=separator)
+        np.savetxt(
+            path,
+            np.column_stack((wavelength, intensity[index])),
+            fmt="%.9e",
+            delimiter=separator,
+            newline="\n",
+            header=fileheader,
+            footer="#[EndOfFile]",
+            comments="#",
+        )
+        written.append(path)
+    return written
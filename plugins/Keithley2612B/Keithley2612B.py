@@ -1,7 +1,9 @@
+import hashlib
 import logging
 import math
 import os
 import time
+from collections.abc import Generator
 from enum import Enum
 from threading import Lock
 
@@ -16,7 +18,14 @@ logger = logging.getLogger(__name__)
 # for mock connection
 def readIVLS(address):
     try:
-        return [0, np.genfromtxt(address, skip_header=44, delimiter=",")]
+        # the header is the "#" lines and the line of column names after them, its length depends on the measurement
+        skip_header = 0
+        with open(address) as f:
+            for line in f:
+                skip_header += 1
+                if not line.startswith("#"):
+                    break
+        return [0, np.genfromtxt(address, skip_header=skip_header, delimiter=",")]
     except Exception as e:
         logger.error(f"Exception reading mock data file: {address}\nException: {e}")
         return [-1, str(e)]
@@ -28,6 +37,214 @@ class BackendType(Enum):
     MOCK = "MOCK"
 
 
+# TSP helper functions for the script cache mode (see Keithley2612B._tsp_load_script).
+# They repeat the command sequences of keithley_init and keithley_run_sweep on the instrument side,
+# so that a sweep step needs a single command instead of dozens of separate writes.
+# The parameter table p has the keys of the settings dictionary described below, the channels are given by name.
+# Keys "end" and "repeat" are reserved words in Lua, so they are always accessed as p["end"] and p["repeat"].
+TSP_SCRIPT_NAME = "pyIVLS_setup"
+TSP_FUNCTIONS = """
+function pyivls_init(p)
+    local src = _G[p.source]
+    reset()
+    beeper.enable = 0
+    display.screen = display.SMUA_SMUB
+    format.data = format.ASCII
+    format.asciiprecision = 14
+    src.reset()
+    if p.sourcesense then
+        src.sense = src.SENSE_REMOTE
+    else
+        src.sense = src.SENSE_LOCAL
+    end
+    src.measure.nplc = p.sourcenplc
+    if p.sourcehighc then
+        src.source.highc = src.ENABLE
+    end
+    src.source.settling = src.SETTLE_FAST_RANGE
+    if p.delay then
+        src.measure.delay = src.DELAY_AUTO
+        if not p.pulse then
+            src.measure.delayfactor = p.sourcedelayfactor
+        else
+            src.measure.delayfactor = 1.0
+        end
+    else
+        src.measure.delay = p.delayduration
+    end
+    if p.type == "i" then
+        if math.abs(p.start) < 1.5 and math.abs(p["end"]) < 1.5 then
+            src.trigger.source.limitv = p.limit
+            src.source.limitv = p.limit
+            if p.sourcefiltertype ~= "FILTER_OFF" then
+                src.measure.filter.count = p.sourcefiltervalue
+                src.measure.filter.enable = src.FILTER_ON
+            end
+            src.measure.filter.type = src[p.sourcefiltertype]
+            src.measure.autorangei = src.AUTORANGE_ON
+            src.measure.autorangev = src.AUTORANGE_ON
+        else
+            src.measure.filter.enable = src.FILTER_OFF
+            src.source.autorangei = src.AUTORANGE_OFF
+            src.source.autorangev = src.AUTORANGE_OFF
+            src.source.delay = 100e-6
+            src.measure.autozero = src.AUTOZERO_OFF
+            src.source.rangei = 10
+            src.source.leveli = 0
+            src.source.limitv = 6
+            src.trigger.source.limiti = 10
+        end
+        display[p.source].measure.func = display.MEASURE_DCVOLTS
+    else
+        if math.abs(p.limit) < 1.5 then
+            src.trigger.source.limiti = p.limit
+            src.source.limiti = p.limit
+        else
+            src.measure.filter.enable = src.FILTER_OFF
+            src.source.autorangei = src.AUTORANGE_OFF
+            src.source.autorangev = src.AUTORANGE_OFF
+            src.measure.rangei = 10
+            src.source.delay = 100e-6
+            src.measure.autozero = src.AUTOZERO_OFF
+            src.source.rangev = 6
+            src.source.levelv = 0
+            src.source.limiti = p.limit
+            src.trigger.source.limiti = p.limit
+        end
+        display[p.source].measure.func = display.MEASURE_DCAMPS
+    end
+    if not p.single_ch then
+        local drn = _G[p.drain]
+        drn.reset()
+        if p.drainsense then
+            drn.sense = drn.SENSE_REMOTE
+        else
+            drn.sense = drn.SENSE_LOCAL
+        end
+        drn.measure.nplc = p.drainnplc
+        if p.drainhighc then
+            drn.source.highc = drn.ENABLE
+        end
+        drn.source.settling = drn.SETTLE_FAST_RANGE
+        display[p.drain].measure.func = display.MEASURE_DCAMPS
+        if p.draindelay then
+            drn.measure.delay = drn.DELAY_AUTO
+            if not p.pulse then
+                drn.measure.delayfactor = p.draindelayfactor
+            else
+                drn.measure.delayfactor = 1.0
+            end
+        else
+            drn.measure.delay = p.draindelayduration
+        end
+        if (p.type == "i" and math.abs(p.start) < 1.5 and math.abs(p["end"]) < 1.5) or (p.type == "v" and math.abs(p.limit) >= 1.5) then
+            drn.measure.filter.enable = drn.FILTER_OFF
+            drn.source.autorangei = drn.AUTORANGE_OFF
+            drn.source.autorangev = drn.AUTORANGE_OFF
+            drn.source.rangei = 10
+        else
+            if p.drainfiltertype ~= "FILTER_OFF" then
+                drn.measure.filter.count = p.drainfiltervalue
+                drn.measure.filter.enable = drn.FILTER_ON
+            end
+            drn.measure.filter.type = drn[p.drainfiltertype]
+            drn.measure.autorangei = drn.AUTORANGE_ON
+            drn.measure.autorangev = drn.AUTORANGE_ON
+        end
+    end
+end
+
+function pyivls_sweep(p)
+    local src = _G[p.source]
+    src.nvbuffer1.clear()
+    src.nvbuffer2.clear()
+    src.nvbuffer1.collecttimestamps = 1
+    if not p.pulse then
+        src.trigger.endpulse.action = src.SOURCE_HOLD
+    else
+        src.trigger.endpulse.action = src.SOURCE_IDLE
+        trigger.timer[1].delay = p.pulsepause
+        trigger.timer[1].passthrough = false
+        trigger.timer[1].count = 1
+        trigger.blender[1].orenable = true
+        trigger.blender[1].stimulus[1] = src.trigger.SWEEPING_EVENT_ID
+        trigger.blender[1].stimulus[2] = src.trigger.PULSE_COMPLETE_EVENT_ID
+        trigger.timer[1].stimulus = trigger.blender[1].EVENT_ID
+        src.trigger.source.stimulus = trigger.timer[1].EVENT_ID
+    end
+    src.trigger.count = p.steps
+    src.trigger.arm.count = p["repeat"]
+    if p.type == "i" then
+        src.trigger.source.lineari(p.start, p["end"], p.steps)
+    else
+        src.trigger.source.linearv(p.start, p["end"], p.steps)
+    end
+    src.trigger.measure.iv(src.nvbuffer1, src.nvbuffer2)
+    src.trigger.measure.action = src.ENABLE
+    src.trigger.source.action = src.ENABLE
+    src.trigger.endsweep.action = src.SOURCE_IDLE
+    src.trigger.measure.stimulus = src.trigger.SOURCE_COMPLETE_EVENT_ID
+    if p.single_ch then
+        src.trigger.endpulse.stimulus = src.trigger.MEASURE_COMPLETE_EVENT_ID
+    else
+        local drn = _G[p.drain]
+        drn.nvbuffer1.clear()
+        drn.nvbuffer2.clear()
+        drn.nvbuffer1.collecttimestamps = 1
+        drn.trigger.count = p.steps
+        drn.trigger.arm.count = p["repeat"]
+        drn.trigger.measure.iv(drn.nvbuffer1, drn.nvbuffer2)
+        drn.trigger.measure.action = drn.ENABLE
+        drn.trigger.source.action = drn.DISABLE
+        drn.trigger.measure.stimulus = src.trigger.SOURCE_COMPLETE_EVENT_ID
+        trigger.blender[2].orenable = false
+        trigger.blender[2].stimulus[1] = src.trigger.MEASURE_COMPLETE_EVENT_ID
+        trigger.blender[2].stimulus[2] = drn.trigger.MEASURE_COMPLETE_EVENT_ID
+        src.trigger.endpulse.stimulus = trigger.blender[2].EVENT_ID
+        drn.source.func = drn.OUTPUT_DCVOLTS
+        drn.source.levelv = p.drainvoltage
+        drn.source.limiti = p.drainlimit
+        drn.source.output = drn.OUTPUT_ON
+        drn.trigger.initiate()
+    end
+    src.source.output = src.OUTPUT_ON
+    src.trigger.initiate()
+end
+"""
+# version is derived from the script text, so any change of the functions forces a re-upload
+TSP_SCRIPT_VERSION = hashlib.sha1(TSP_FUNCTIONS.encode()).hexdigest()[:12]
+TSP_SCRIPT = f'{TSP_FUNCTIONS}pyivls_version = "{TSP_SCRIPT_VERSION}"\n'
+# prints the loaded version only if the helper functions are defined, "nil" otherwise
+TSP_VERSION_QUERY = 'print(type(pyivls_init) == "function" and type(pyivls_sweep) == "function" and pyivls_version or "nil")'
+# binary formats for buffer transfer: format name -> (numpy dtype, bytes per value). Byte order is set to little endian before transfer.
+BINARY_FORMATS = {"REAL64": ("<f8", 8), "SREAL": ("<f4", 4)}
+# settings that are used as flags. Some of them may come as strings from the GUI (e.g. "auto"), python truthiness is kept
+TSP_FLAG_KEYS = ("sourcesense", "drainsense", "single_ch", "pulse", "delay", "draindelay", "sourcehighc", "drainhighc")
+
+
+def to_tsp_table(s: dict) -> str:
+    """Converts a settings dictionary to a TSP (Lua) table constructor.
+
+    Args:
+        s (dict): settings dictionary (see description below)
+
+    Returns:
+        str: table constructor, e.g. {["source"] = "smua", ["steps"] = 10}
+    """
+    fields = []
+    for key, value in s.items():
+        if value is None:
+            continue
+        if key in TSP_FLAG_KEYS or isinstance(value, (bool, np.bool_)):
+            value = "true" if value else "false"
+        elif isinstance(value, (int, float, np.number)):
+            value = repr(float(value)) if isinstance(value, (float, np.floating)) else str(int(value))
+        else:
+            value = '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+        fields.append(f'["{key}"] = {value}')
+    return "{" + ", ".join(fields) + "}"
+
+
 """
            settings dictionary for communicationg with hardware
            
@@ -80,6 +297,12 @@ class Keithley2612B:
     ke: MessageBasedResource | None = None
     k: usbtmc.Instrument | None = None
     mock_con: bool = False
+    # TSP script cache mode: sweep setup is done by functions uploaded to the instrument (see TSP_FUNCTIONS)
+    use_tsp_cache: bool = False
+    # version of the TSP script that is known to be loaded on the instrument, None if unknown
+    tsp_loaded_version: str | None = None
+    # format for reading buffers: "ASCII" or one of BINARY_FORMATS
+    transfer_format: str = "ASCII"
     ####################################  threads
 
     ################################### internal functions
@@ -151,6 +374,38 @@ class Keithley2612B:
             ##IRtothink#### some exception handling implemented
             raise e
 
+    def safequery_binary(self, command: str, nbytes: int) -> bytes:
+        """Sends a query and reads the binary response without termination character processing.
+
+        Args:
+            command (str): query
+            nbytes (int): expected size of the response in bytes (used by the Ethernet backend)
+
+        Returns:
+            bytes: raw response
+        """
+        try:
+            if self.backend == BackendType.USB.value:
+                if self.k is None:
+                    raise ValueError("Keithley 2612B is not connected. Please connect first.")
+                self.k.write(command)
+                # usbtmc reads until the end of message, binary data is not cut on termination characters
+                ret: bytes = self.k.read_raw()
+                return ret
+            elif self.backend == BackendType.ETHERNET.value:
+                if self.ke is None:
+                    raise ValueError("Keithley 2612B is not connected. Please connect first.")
+                self.ke.write(command)
+                ret: bytes = self.ke.read_bytes(nbytes, break_on_termchar=False)
+                return ret
+            elif self.backend == BackendType.MOCK.value:
+                raise ValueError("Binary transfer is not available for Keithley 2612B mock")
+            else:
+                raise ValueError(f"Unknown backend: {self.backend}")
+        except Exception as e:
+            logger.error(f"Exception querying binary data: {command}\nException: {e}")
+            raise e
+
     def keithley_IDN(self) -> str:
         return "keith"
 
@@ -171,6 +426,8 @@ class Keithley2612B:
 
         if self.backend == BackendType.USB.value:
             if self.k is None:
+                # new session, the state of the instrument runtime environment is unknown
+                self.tsp_loaded_version = None
                 #### connect with usbtmc
                 self.k = usbtmc.Instrument(self.address)
                 # https://github.com/python-ivi/python-usbtmc/blob/master/usbtmc/usbtmc.py#L756C10-L756C22
@@ -184,6 +441,8 @@ class Keithley2612B:
                 self.k.timeout = 25  # seconds
         elif self.backend == BackendType.ETHERNET.value:
             if self.ke is None:
+                # new session, the state of the instrument runtime environment is unknown
+                self.tsp_loaded_version = None
                 #### connect with pyvisa resource manager
                 visa_rsc_str = f"TCPIP::{self.eth_address}::{self.port}::SOCKET"
                 self.ke = self.rm.open_resource(visa_rsc_str, resource_pyclass=pyvisa.resources.TCPIPSocket)  # type: ignore[assignment]
@@ -195,6 +454,7 @@ class Keithley2612B:
                 _hello()
         elif self.backend == BackendType.MOCK.value:
             self.mock_con = True
+            self.tsp_loaded_version = None
             [status, self.dataarray] = readIVLS(self.datafile_address)
             assert status == 0
 
@@ -285,6 +545,27 @@ class Keithley2612B:
             test = self.safequery(f"print ({channel}.measure.iv())").split("\t")
             return list(np.array(test).astype(float))
 
+    def getIVs(self, channels: list[str]) -> np.ndarray:
+        """gets IV data of several channels in a single query. Measurements are started simultaneously with overlappediv,
+        so readings of the channels are aligned in time. Uses nvbuffer1 and nvbuffer2 of the channels.
+
+        Args:
+            channels (list[str]): channels to measure, e.g. ["smua", "smub"]
+
+        Returns:
+            np.ndarray: row [i, v, timestamp] for every channel, timestamp is the instrument time of the reading in s
+        """
+        if self.backend == BackendType.MOCK.value:
+            readings = self.linepointer
+            timestamp = time.time()
+            self.linepointer = self.linepointer + 1
+            return np.array([[self.dataarray[readings, 0], self.dataarray[readings, 1], timestamp] for _ in channels])
+        setup = " ".join(f"{channel}.nvbuffer1.clear() {channel}.nvbuffer2.clear() {channel}.nvbuffer1.collecttimestamps = 1" for channel in channels)
+        measure = " ".join(f"{channel}.measure.overlappediv({channel}.nvbuffer1, {channel}.nvbuffer2)" for channel in channels)
+        values = ", ".join(f"{channel}.nvbuffer1[1], {channel}.nvbuffer2[1], {channel}.nvbuffer1.basetimestamp + {channel}.nvbuffer1.timestamps[1]" for channel in channels)
+        response = self.safequery(f"{setup} {measure} waitcomplete() print({values})")
+        return np.array(response.split("\t"), dtype=float).reshape(len(channels), 3)
+
     def setOutput(self, channel, outputType, value) -> None:
         """sets smu output but does not switch it ON
         channel = "smua" or "smub"
@@ -344,6 +625,8 @@ class Keithley2612B:
             iv = []
             # Get the number of readings in nvbuffer2
             readings_count = int(float(self.safequery(f"print({channel}.nvbuffer2.n)")))
+            if self.transfer_format in BINARY_FORMATS:
+                return self.printbuffer(1, readings_count, [f"{channel}.nvbuffer1", f"{channel}.nvbuffer2"])
             i_values = self.safequery(f"printbuffer({1}, {readings_count}, {channel}.nvbuffer1)")
             v_values = self.safequery(f"printbuffer({1}, {readings_count}, {channel}.nvbuffer2)")
             # Add to the iv array
@@ -358,6 +641,94 @@ class Keithley2612B:
             )
             return np.array(iv)
 
+    def printbuffer(self, first: int, last: int, buffers: list[str], out: np.ndarray | None = None) -> np.ndarray:
+        """Reads a range of readings from several buffers in a single query. Format of the transfer is set by self.transfer_format.
+        In binary formats output format is switched back to ASCII after the transfer, as other queries are parsed as text.
+
+        Args:
+            first (int): index of the first reading (buffers are 1-based)
+            last (int): index of the last reading
+            buffers (list[str]): buffers to read, e.g. ["smua.nvbuffer1", "smua.nvbuffer2", "smua.nvbuffer1.timestamps"]
+            out (np.ndarray, optional): preallocated array of shape (last - first + 1, len(buffers)) for the result
+
+        Returns:
+            np.ndarray: readings, a column per buffer
+        """
+        count = last - first + 1
+        columns = len(buffers)
+        if out is None:
+            out = np.empty((max(count, 0), columns))
+        if count <= 0:
+            return out
+        # printbuffer with several buffers interleaves values: buffer1[first], buffer2[first], ..., buffer1[first + 1], ...
+        command = f"printbuffer({first}, {last}, {', '.join(buffers)})"
+        if self.transfer_format in BINARY_FORMATS:
+            dtype, size = BINARY_FORMATS[self.transfer_format]
+            self.safewrite(f"format.data = format.{self.transfer_format}")
+            self.safewrite("format.byteorder = format.LITTLEENDIAN")
+            try:
+                # response is "#0" followed by the values and the termination character
+                raw = self.safequery_binary(command, 2 + columns * count * size + 1)
+            finally:
+                self.safewrite("format.data = format.ASCII")
+            start = raw.find(b"#0")
+            if start < 0 or len(raw) < start + 2 + columns * count * size:
+                raise ValueError(f"Unexpected binary response for {command}: expected {columns * count} values, got {len(raw)} bytes")
+            out[:] = np.frombuffer(raw, dtype=dtype, count=columns * count, offset=start + 2).reshape(count, columns)
+        else:
+            out[:] = np.array(self.safequery(command).split(","), dtype=float).reshape(count, columns)
+        return out
+
+    def stream_buffers(self, channel, total: int, interval: float = 0.1, drain=None, start: int = 0, absolute: bool = False) -> Generator[tuple[np.ndarray, np.ndarray | None], None, None]:
+        """Follows a running sweep and yields the readings that appeared in the buffers since the previous read.
+        Timestamps are available if the sweep was started with keithley_run_sweep (collecttimestamps is set there).
+
+        Args:
+            channel (str): smua or smub
+            total (int): number of readings in the sweep. The generator returns when the buffer has this many readings.
+                If total is not more than start, the generator returns after a single read, e.g. for reading the rest of the buffer after abort.
+            interval (float, optional): time between buffer polls in s. Defaults to 0.1.
+            drain (str, optional): second channel of the sweep, its buffers are read for the same range of readings. Defaults to None.
+            start (int, optional): number of readings already consumed. Defaults to 0.
+            absolute (bool, optional): if True timestamps are instrument time (basetimestamp is added, as in getIVs),
+                otherwise they are relative to the first reading in the buffer. Defaults to False.
+
+        Yields:
+            tuple (source chunk, drain chunk or None): arrays with rows (current, voltage, timestamp)
+        """
+        last = start
+        base = None
+        while True:
+            if self.backend == BackendType.MOCK.value:
+                # mock buffer grows by one reading per poll
+                available = min(last + 1, np.size(self.dataarray, 0))
+            elif drain is None:
+                available = int(float(self.safequery(f"print({channel}.nvbuffer2.n)")))
+            else:
+                counts = self.safequery(f"print({channel}.nvbuffer2.n, {drain}.nvbuffer2.n)").split("\t")
+                available = min(int(float(count)) for count in counts)
+            if available > last:
+                if self.backend == BackendType.MOCK.value:
+                    chunk = np.column_stack((self.dataarray[last:available, :2], np.arange(last, available) * interval))
+                    yield chunk, None if drain is None else chunk.copy()
+                else:
+                    source_chunk = self.printbuffer(last + 1, available, [f"{channel}.nvbuffer1", f"{channel}.nvbuffer2", f"{channel}.nvbuffer1.timestamps"])
+                    drain_chunk = None
+                    if drain is not None:
+                        drain_chunk = self.printbuffer(last + 1, available, [f"{drain}.nvbuffer1", f"{drain}.nvbuffer2", f"{drain}.nvbuffer1.timestamps"])
+                    if absolute:
+                        if base is None:
+                            channels = [channel] if drain is None else [channel, drain]
+                            base = [float(value) for value in self.safequery(f"print({', '.join(f'{ch}.nvbuffer1.basetimestamp' for ch in channels)})").split("\t")]
+                        source_chunk[:, 2] += base[0]
+                        if drain_chunk is not None:
+                            drain_chunk[:, 2] += base[1]
+                    yield source_chunk, drain_chunk
+                last = available
+            if available >= total or (self.backend == BackendType.MOCK.value and available == np.size(self.dataarray, 0)):
+                return
+            time.sleep(interval)
+
     def abort_sweep(self, channel) -> None:
         """
         aborts the sweep
@@ -402,6 +773,38 @@ class Keithley2612B:
         self.safewrite("smua.reset()")
         self.safewrite("smub.reset()")
 
+    def tsp_load_script(self) -> bool:
+        """Uploads the TSP helper functions (TSP_SCRIPT) to the instrument, if the loaded version differs from the current one.
+        The script stays in the instrument runtime environment until power off, reset() does not remove it.
+
+        Returns:
+            bool: True if the script was uploaded, False if the loaded version was up to date
+
+        Raises:
+            ValueError: the functions are not defined after the upload
+        """
+        if self.tsp_loaded_version is None and self.backend != BackendType.MOCK.value:
+            # the script may be left from a previous session
+            self.tsp_loaded_version = self.safequery(TSP_VERSION_QUERY).strip()
+        if self.tsp_loaded_version == TSP_SCRIPT_VERSION:
+            return False
+        logger.info(f"Uploading TSP script {TSP_SCRIPT_NAME} version {TSP_SCRIPT_VERSION}")
+        self.safewrite(f"loadscript {TSP_SCRIPT_NAME}")
+        for line in TSP_SCRIPT.splitlines():
+            if line.strip():
+                self.safewrite(line)
+        self.safewrite("endscript")
+        # running the script defines the functions and the version variable
+        self.safewrite(f"{TSP_SCRIPT_NAME}()")
+        if self.backend != BackendType.MOCK.value:
+            # an error in the script leaves the functions undefined, the version is cached only if they are there
+            loaded_version = self.safequery(TSP_VERSION_QUERY).strip()
+            if loaded_version != TSP_SCRIPT_VERSION:
+                self.tsp_loaded_version = None
+                raise ValueError(f"TSP script {TSP_SCRIPT_NAME} was not loaded, the instrument reports version {loaded_version}")
+        self.tsp_loaded_version = TSP_SCRIPT_VERSION
+        return True
+
     def keithley_init(self, s: dict) -> int:
         ##IRtothink#### pulsed operation should be rechecked if strict pulse duration will be needed
         # """Initialize Keithley SMU for single or dual channel operation.
@@ -413,6 +816,11 @@ class Keithley2612B:
         #        Args:
         #            s (dict): Configuration dictionary.
         #      """
+        if self.use_tsp_cache:
+            self.tsp_load_script()
+            self.safewrite(f"pyivls_init({to_tsp_table(s)})")
+            return 0
+
         self.safewrite("reset()")
         self.safewrite("beeper.enable=0")
 
@@ -563,9 +971,16 @@ class Keithley2612B:
         ##IRtothink#### is locking really needed?
         with self.lock:
             try:
+                if self.use_tsp_cache:
+                    self.tsp_load_script()
+                    self.safewrite(f"pyivls_sweep({to_tsp_table(s)})")
+                    return 0
+
                 # Clear buffers, set repeats and steps, set sweep range.
                 self.safewrite(f"{s['source']}.nvbuffer1.clear()")
                 self.safewrite(f"{s['source']}.nvbuffer2.clear()")
+                # timestamps are needed for streaming readout (see stream_buffers), can be changed only for empty buffer
+                self.safewrite(f"{s['source']}.nvbuffer1.collecttimestamps = 1")
 
                 ####set pulse mode for single channel
                 if not s["pulse"]:
@@ -600,6 +1015,7 @@ class Keithley2612B:
                 else:
                     self.safewrite(f"{s['drain']}.nvbuffer1.clear()")
                     self.safewrite(f"{s['drain']}.nvbuffer2.clear()")
+                    self.safewrite(f"{s['drain']}.nvbuffer1.collecttimestamps = 1")
 
                     self.safewrite(f"{s['drain']}.trigger.count = {s['steps']}")
                     self.safewrite(f"{s['drain']}.trigger.arm.count = {s['repeat']}")
@@ -638,6 +1054,67 @@ class Keithley2612B:
                 raise e
                 return 1
 
+    def keithley_run_timed(self, s: dict) -> int:
+        """Starts hardware-timed acquisition at constant output. Measurements of the source (and drain) are paced by trigger.timer[1]
+        with period s["period"], so the sampling does not depend on the host. Readings are stored with timestamps in nvbuffers
+        and should be followed with stream_buffers.
+        Outputs should be set with setOutput and switched on before. Outputs are held after the last reading, so the acquisition
+        may be started again for the next segment without the source going idle.
+
+        Args:
+            s (dict): settings dictionary
+            s["source"] source channel: may take values [smua, smub]
+            s["drain"] drain channel: may take values [smua, smub]
+            s["single_ch"] single channel mode: may be True or False
+            s["period"] time between readings in s, should be longer than the measurement time (nplc and delay) (float)
+            s["points"] number of readings (int)
+
+        Returns:
+            int: number of readings that will be acquired, may be less than s["points"] if the buffer capacity is smaller
+        """
+        if self.backend == BackendType.MOCK.value:
+            return min(s["points"], np.size(self.dataarray, 0))
+        channels = [s["source"]] if s["single_ch"] else [s["source"], s["drain"]]
+        with self.lock:
+            try:
+                for channel in channels:
+                    self.safewrite(f"{channel}.nvbuffer1.clear()")
+                    self.safewrite(f"{channel}.nvbuffer2.clear()")
+                    self.safewrite(f"{channel}.nvbuffer1.collecttimestamps = 1")
+                # capacity depends on the timestamp collection, so it is read after the buffer setup
+                capacity = int(float(self.safequery(f"print({s['source']}.nvbuffer1.capacity)")))
+                points = min(s["points"], capacity)
+
+                # passthrough generates the first event immediately, the timer then generates points - 1 events with period delay
+                self.safewrite(f"trigger.timer[1].delay = {s['period']}")
+                self.safewrite(f"trigger.timer[1].count = {max(points - 1, 1)}")
+                self.safewrite("trigger.timer[1].passthrough = true")
+                self.safewrite(f"trigger.timer[1].stimulus = {s['source']}.trigger.ARMED_EVENT_ID")
+
+                # see trigger models on pp 3-35-36 (172-173) of the manual, source level is not changed, only measurements are triggered
+                for channel in channels:
+                    self.safewrite(f"{channel}.trigger.count = {points}")
+                    self.safewrite(f"{channel}.trigger.arm.count = 1")
+                    self.safewrite(f"{channel}.trigger.source.action = {channel}.DISABLE")
+                    self.safewrite(f"{channel}.trigger.source.stimulus = 0")
+                    self.safewrite(f"{channel}.trigger.measure.iv({channel}.nvbuffer1, {channel}.nvbuffer2)")
+                    self.safewrite(f"{channel}.trigger.measure.action = {channel}.ENABLE")
+                    self.safewrite(f"{channel}.trigger.measure.stimulus = trigger.timer[1].EVENT_ID")
+                    self.safewrite(f"{channel}.trigger.endpulse.action = {channel}.SOURCE_HOLD")
+                    self.safewrite(f"{channel}.trigger.endpulse.stimulus = 0")
+                    self.safewrite(f"{channel}.trigger.endsweep.action = {channel}.SOURCE_HOLD")
+
+                # drain should wait for the timer before the source arms it
+                for channel in reversed(channels):
+                    self.safewrite(f"{channel}.trigger.initiate()")
+                return points
+
+            except Exception as e:
+                for channel in channels:
+                    self.safewrite(f"{channel}.abort()")
+                logger.error(f"Caught exception during keithley_run_timed : {e}")
+                raise e
+
     def keithley_run_trigpulse(self, s: dict):  # -> status:
         """Makes a single pulse with predetermined duration and triggers a DIGIO line at the end of source action
 
@@ -705,10 +1182,12 @@ class Keithley2612B:
                 # Clear buffers, set repeats and steps, set sweep range.
                 self.safewrite(f"{s['source']}.nvbuffer1.clear()")
                 self.safewrite(f"{s['source']}.nvbuffer2.clear()")
+                self.safewrite(f"{s['source']}.nvbuffer1.collecttimestamps = 1")
 
                 if s["usedrain"]:
                     self.safewrite(f"{s['drain']}.nvbuffer1.clear()")
                     self.safewrite(f"{s['drain']}.nvbuffer2.clear()")
+                    self.safewrite(f"{s['drain']}.nvbuffer1.collecttimestamps = 1")
 
                 # Configure a single-point list sweep
                 self.safewrite(f"{s['source']}.trigger.source.action = {s['source']}.ENABLE")  ## enable source action
@@ -21,6 +21,8 @@ from PyQt6.QtCore import QObject, Qt, pyqtSlot
 		# settings["singlechannel"] single channel mode: may be True or False
 		# settings["sourcehighc"] HighC mode for source: may be True or False
 		# settings["repeat"] repeat count: should be int >0
+		# settings["transferformat"] format for reading buffers: may take values [ASCII, REAL64, SREAL]
+		# settings["tspcache"] sweep setup with TSP functions uploaded once per session: may be True or False
 		# settings[sourcefiltertype] filter type for source: 'Off' - no filter
 		# settings[sourcefiltervalue] value, e.g. number of points to use with filter if not 'Off'
 		# settings["sourcedelayfator"] multiplier for delay (may be float)
@@ -67,9 +69,12 @@ class Keithley2612BGUI(QObject):
         "smu_setup_resmes",
         "smu_setOutput",
         "smu_getIV",
+        "smu_getIVs",
         "smu_bufferRead",
         "smu_getLastBufferValue",
+        "smu_streamBuffers",
         "smu_runSweep",
+        "smu_runTimed",
         "smu_init",
         "smu_outputOFF",
         "smu_outputON",
@@ -227,6 +232,8 @@ class Keithley2612BGUI(QObject):
 
         # Determine a HighC mode for drain: may be True or False
         self.settings["drainhighc"] = self.settingsWidget.checkBox_drainHighC.isChecked()
+        self.settings["tspcache"] = self.settingsWidget.checkBox_tspCache.isChecked()
+        self.settings["transferformat"] = self.settingsWidget.comboBox_transferFormat.currentText()
         if "lineFrequency" not in self.settings or self.settings["lineFrequency"] == 0:
             try:
                 self.smu_connect()
@@ -291,6 +298,9 @@ class Keithley2612BGUI(QObject):
         self.settingsWidget.checkBox_sourceHighC.setChecked(self.settings["sourcehighc"])
         self.settings["drainhighc"] = to_bool(self.settings["drainhighc"])
         self.settingsWidget.checkBox_drainHighC.setChecked(self.settings["drainhighc"])
+        self.settings["tspcache"] = to_bool(self.settings.get("tspcache", False))
+        self.settingsWidget.checkBox_tspCache.setChecked(self.settings["tspcache"])
+        set_combobox_value(self.settingsWidget.comboBox_transferFormat, self.settings.get("transferformat", "ASCII"))
         self.settingsWidget.lineEditAddress.setText(self.settings["address"])
         self.settingsWidget.lineEditETH.setText(self.settings["eth_address"])
         self.settingsWidget.backendCombobox.setCurrentText(self.settings["backend"])
@@ -377,16 +387,26 @@ class Keithley2612BGUI(QObject):
             )
 
     @public
-    def smu_connect(self) -> tuple[int, dict]:
+    def smu_connect(self, parse_settings=False) -> tuple[int, dict]:
         """an interface for an externall calling function to connect to Keithley
 
+        Args:
+            parse_settings (bool): parse the settings widget first, only from the GUI thread. By default the current
+                settings are used.
+
         Returns [status, message]:
             0 - no error, ~0 - error (add error code later on if needed)
             message contains devices response to IDN query if devices is connected, or an error message otherwise
 
         """
+        if parse_settings:
+            [status, info] = self.parse_settings_widget()
+            if status:
+                return (status, info)
         try:
             self.smu.keithley_connect(self.settings["address"], self.settings["eth_address"], self.settings["backend"], self.settings["port"])
+            self.smu.use_tsp_cache = self.settings.get("tspcache", False)
+            self.smu.transfer_format = self.settings.get("transferformat", "ASCII")
             return (0, {"Error message": self.smu.keithley_IDN()})
         except Exception as e:
             return (
@@ -456,6 +476,18 @@ class Keithley2612BGUI(QObject):
         """
         return self.smu.keithley_run_sweep(s)
 
+    @public
+    def smu_runTimed(self, s: dict) -> int:
+        """an interface for an externall calling function to start hardware-timed acquisition on Keithley
+        s: dictionary with source, drain, single_ch, period (time between readings in s) and points (number of readings)
+
+        Returns:
+            number of readings that will be acquired (limited by the buffer capacity)
+
+        Note: outputs should be set and switched on before, readings should be followed with smu_streamBuffers
+        """
+        return self.smu.keithley_run_timed(s)
+
     @public
     def smu_getLastBufferValue(self, channel, readings=None) -> list:
         """an interface for an externall calling function to get last buffer value from Keithley
@@ -466,6 +498,22 @@ class Keithley2612BGUI(QObject):
         """
         return self.smu.get_last_buffer_value(channel, readings)
 
+    @public
+    def smu_streamBuffers(self, channel, total, interval=0.1, drain=None, start=0, absolute=False):
+        """an interface for an externall calling function to follow a running sweep on Keithley
+        channel: source channel (may be 'smua' or 'smub')
+        total: number of readings in the sweep, the generator stops when they are read
+        interval: time between buffer polls in s
+        drain: drain channel, read for the same readings as the source, or None
+        start: number of readings already consumed
+        absolute: if True timestamps are instrument time, otherwise relative to the first reading in the buffer
+
+        Returns:
+            generator yielding (source chunk, drain chunk or None) with all readings since the previous chunk.
+            Chunks are np.ndarray with rows (current, voltage, timestamp)
+        """
+        return self.smu.stream_buffers(channel, total, interval, drain, start, absolute)
+
     @public
     def smu_bufferRead(self, channel):
         """an interface for an externall calling function to get the content of a channel buffer from Keithley
@@ -485,6 +533,15 @@ class Keithley2612BGUI(QObject):
         """
         return (0, self.smu.getIV(channel))
 
+    @public
+    def smu_getIVs(self, channels):
+        """gets IV data of several channels measured simultaneously in a single query
+
+        Returns:
+            (status, np.ndarray) with row [i, v, timestamp] for every channel, timestamp is the instrument time in s
+        """
+        return (0, self.smu.getIVs(channels))
+
     @public
     def smu_setOutput(self, channel, outputType, value):
         #        """sets smu output but does not switch it ON
@@ -74,7 +74,8 @@ class specSMU_GUI(QWidget):
                 "smu_setOutput",
                 "smu_channelNames",
                 "smu_trigpulse",
-                "smu_bufferRead",
+                "smu_streamBuffers",
+                "smu_getIVs",
             ],
             "spectrometer": [
                 "parse_settings_widget",
@@ -712,7 +713,7 @@ class specSMU_GUI(QWidget):
                     # check mode, pulse or continuous
                     if self.settings["mode"] == "continuous":
                         self.function_dict["smu"][smu_name]["smu_outputON"](self.settings["channel"])
-                        status, auto_time = self.function_dict["spectrometer"][spectro_name]["getAutoTime"](last_integration_time=last_integration_time)
+                        status, auto_time = self.function_dict["spectrometer"][spectro_name]["getAutoTime"](last_integration_time=last_integration_time, cache_key=smuSetValue)
                     elif self.settings["mode"] == "pulsed":
                         # "Abandon all hope, ye who enter here"
                         status, auto_time = self.function_dict["spectrometer"][spectro_name]["getAutoTime"](
@@ -721,6 +722,7 @@ class specSMU_GUI(QWidget):
                             external_cleanup=self.function_dict["smu"][smu_name]["smu_outputOFF"],
                             pause_duration=self.settings["pause"],
                             last_integration_time=last_integration_time,
+                            cache_key=smuSetValue,
                         )
                     elif self.settings["mode"] == "hw trigger":
                         # hw trig mode mainly based on smu_trigpulse. Spectrometer plugin understands that it is in hw trig mode from externaltrigger setting
@@ -730,6 +732,7 @@ class specSMU_GUI(QWidget):
                             external_cleanup=self.function_dict["smu"][smu_name]["smu_outputOFF"],
                             pause_duration=self.settings["pause"],
                             last_integration_time=last_integration_time,
+                            cache_key=smuSetValue,
                         )
 
                     # Depending on the branch, auto_time may be None if getAutoTime failed
@@ -787,22 +790,43 @@ class specSMU_GUI(QWidget):
                     # if checkbox for before and after is set:
                     after_flag = self.settings["spectro_check_after"]
                     sourceIV_before = (None, None)
+                    # source and drain are measured simultaneously in a single query
+                    channels = [self.settings["channel"]] if self.settings["singlechannel"] else [self.settings["channel"], self.settings["drainchannel"]]
                     if after_flag:
                         # IV before spectrum
-                        status, sourceIV_before = self.function_dict["smu"][smu_name]["smu_getIV"](self.settings["channel"])
+                        status, IV_before = self.function_dict["smu"][smu_name]["smu_getIVs"](channels)
+                        sourceIV_before = IV_before[0, :2]
                         if not self.settings["singlechannel"]:
-                            status, drainIV_before = self.function_dict["smu"][smu_name]["smu_getIV"](self.settings["drainchannel"])
-
-                    # spectrum
-                    status, spectrum = self.function_dict["spectrometer"][spectro_name]["spectrometerGetScan"]()
-                    if status:
-                        self._log_verbose(f"Error getting spectrum: {spectrum}")
-                        raise NotImplementedError(f"Error in getting spectrum: {spectrum}, no handling provided")
-
-                    # IV after spectrum
-                    status, sourceIV_after = self.function_dict["smu"][smu_name]["smu_getIV"](self.settings["channel"])
+                            drainIV_before = IV_before[1, :2]
+
+                    spectro_functions = self.function_dict["spectrometer"][spectro_name]
+                    if "spectrometerRequestScan" in spectro_functions:
+                        # spectrometer reads out in the background: IV after spectrum is measured as soon as the integration ends, while the data is transferred
+                        status, state = spectro_functions["spectrometerRequestScan"]()
+                        if not status:
+                            status, state = spectro_functions["spectrometerWaitIntegration"]()
+                        if status:
+                            # release the scan engine without waiting for the scan again
+                            spectro_functions["spectrometerWaitScan"](timeout=0)
+                            self._log_verbose(f"Error getting spectrum: {state}")
+                            raise NotImplementedError(f"Error in getting spectrum: {state}, no handling provided")
+                        status, IV_after = self.function_dict["smu"][smu_name]["smu_getIVs"](channels)
+                        status, spectrum = spectro_functions["spectrometerWaitScan"]()
+                        if status:
+                            self._log_verbose(f"Error getting spectrum: {spectrum}")
+                            raise NotImplementedError(f"Error in getting spectrum: {spectrum}, no handling provided")
+                    else:
+                        # spectrum
+                        status, spectrum = spectro_functions["spectrometerGetScan"]()
+                        if status:
+                            self._log_verbose(f"Error getting spectrum: {spectrum}")
+                            raise NotImplementedError(f"Error in getting spectrum: {spectrum}, no handling provided")
+
+                        # IV after spectrum
+                        status, IV_after = self.function_dict["smu"][smu_name]["smu_getIVs"](channels)
+                    sourceIV_after = IV_after[0, :2]
                     if not self.settings["singlechannel"]:
-                        status, drainIV_after = self.function_dict["smu"][smu_name]["smu_getIV"](self.settings["drainchannel"])
+                        drainIV_after = IV_after[1, :2]
                     time.sleep(0.02)
                 # HW trig mode
                 else:
@@ -840,10 +864,13 @@ class specSMU_GUI(QWidget):
                 varDict["triggermode"] = 1 if self.spectrometer_settings["externaltrigger"] else 0
                 varDict["name"] = self.spectrometer_settings["samplename"]
                 if self.settings["mode"] == "hw trigger":
-                    IVdata = self.function_dict["smu"][self.settings["smu"]]["smu_bufferRead"](trigDict["source"])
+                    # the pulse is finished, so a single read of the stream collects all readings of source and drain
+                    drain = None if self.settings["singlechannel"] else trigDict["drain"]
+                    chunks = list(self.function_dict["smu"][self.settings["smu"]]["smu_streamBuffers"](trigDict["source"], 0, drain=drain))
+                    IVdata = np.vstack([source_chunk for source_chunk, _ in chunks])[:, :2]
                     readings = ",".join(map(str, IVdata.ravel()))
                     if not (self.settings["singlechannel"]):
-                        IVdataDrain = self.function_dict["smu"][self.settings["smu"]]["smu_bufferRead"](trigDict["drain"])
+                        IVdataDrain = np.vstack([drain_chunk for _, drain_chunk in chunks])[:, :2]
                         readings += "," + ",".join(map(str, IVdataDrain.ravel()))
                     i_after, v_after = IVdata[-1]
                 else:
@@ -864,6 +891,9 @@ class specSMU_GUI(QWidget):
                             readings += "," + str(i_after_drain) + "," + str(v_after_drain)
 
                 varDict["comment"] = self.spectrometer_settings["comment"] + " " + readings
+                # numeric copies of the readings for the spectral dataset, the csv header keeps only the comment
+                varDict["smuvalue"] = smuSetValue
+                varDict["readings"] = [float(reading) for reading in readings.split(",")]
                 address = self.spectrometer_settings["address"] + os.sep + self.spectrometer_settings["filename"]
                 status, state = self.function_dict["spectrometer"][spectro_name]["createFile"](varDict=varDict, filedelimeter=";", address=address, data=spectrum)
                 if status:
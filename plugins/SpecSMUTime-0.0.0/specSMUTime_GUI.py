@@ -713,6 +713,9 @@ class specSMUTime_GUI(QWidget):
                             readings += "," + str(i_after_drain) + "," + str(v_after_drain)
 
                     varDict["comment"] = readings
+                    # numeric copies for the spectral dataset, the csv header keeps only the comment
+                    varDict["smuvalue"] = smuSetValue
+                    varDict["time"] = timenow
                     address = self.spectrometer_settings["address"] + os.sep + self.spectrometer_settings["filename"]
                     status, state = self.function_dict["spectrometer"][spectro_name]["createFile"](varDict=varDict, filedelimeter=";", address=address, data=spectrum)
                     if status:
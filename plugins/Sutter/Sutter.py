@@ -3,6 +3,7 @@
 import struct  # Handling binary
 import threading  # for thread safety
 import time  # for device-specified wait-times
+from contextlib import contextmanager
 from typing import Final  # for constants and options
 
 import numpy as np  # for better typing
@@ -63,6 +64,30 @@ class Mpc325:
         # Initialize settings:
         self._comm_lock = threading.Lock()
         self.end_marker_bytes = struct.pack("<B", 13)  # End marker (ASCII: CR)
+        # Cache of the controller state, so that repeated queries don't go to the serial port. Positions are updated
+        # from the move commands. Stops, failed commands and timeouts clear the cache, verify=True reads the device.
+        # Moves made by hand on the ROE-200 are not seen by the driver, read those with verify=True. The cache only
+        # answers queries: moves read the position from the device and device changes are always sent.
+        self._active_device: int | None = None
+        self._positions: dict[int, tuple] = {}
+        self._devices_status: tuple | None = None
+        self._stop_count = 0
+
+    def invalidate_cache(self):
+        """Forget the cached device state. The next queries read the device."""
+        self._active_device = None
+        self._positions.clear()
+        self._devices_status = None
+
+    @contextmanager
+    def _command(self):
+        """Serial command under the communication lock. After a failed command the state of the device is unknown."""
+        with self._comm_lock:
+            try:
+                yield
+            except BaseException:
+                self.invalidate_cache()
+                raise
 
     def read(self, size: int) -> bytes:
         """Read a specified number of bytes from the serial port.
@@ -93,6 +118,7 @@ class Mpc325:
 
     def open(self, port: str | None = None):
         with self._comm_lock:
+            self.invalidate_cache()
             # Open port
             if not self.is_connected():
                 self.ser.port = port
@@ -107,6 +133,7 @@ class Mpc325:
 
     def close(self):
         with self._comm_lock:
+            self.invalidate_cache()
             if self.is_connected():
                 self.ser.close()
 
@@ -143,37 +170,52 @@ class Mpc325:
         self.ser.flush()
         time.sleep(0.002)  # Hardcoded wait time (2 ms) between commands from the manual.
 
-    def get_connected_devices_status(self):
+    def get_connected_devices_status(self, verify=False):
         """Get the status of connected micromanipulators
 
+        Args:
+            verify (bool, optional): Read the device instead of the cache. Defaults to False.
+
         Returns:
             tuple: first element is how many devices connected, second element is a list representing
             the status of connected devices
         """
-        with self._comm_lock:
+        with self._command():
+            if not verify and self._devices_status is not None:
+                return self._devices_status
             self._flush()
             self.ser.write(bytes([85]))  # Send command to the device (ASCII: U)
             output = self.read(6)  # Expecting 6 bytes back: 1 byte for number of devices, 4 bytes for device statuses, 1 byte for end marker
             unpacked_data = self._validate_and_unpack("6B", output, name="get_connected_devices_status")
             num_devices = unpacked_data[0]  # Number of devices connected
             device_statuses = unpacked_data[1:5]  # Status of each device (0 or 1)
-            return (num_devices, device_statuses)
+            self._devices_status = (num_devices, device_statuses)
+            return self._devices_status
 
-    def get_active_device(self):
+    def _query_active_device(self):
+        self._flush()
+        self.ser.write(bytes([75]))  # Send command to the device (ASCII: K)
+        output = self.read(4)  # Expecting 4 bytes back: 1 byte for active device number, 2 bytes for FW version, 1 byte for end marker
+        unpacked = self._validate_and_unpack("4B", output, name="get_active_device")
+        self._active_device = unpacked[0]
+        return self._active_device
+
+    def get_active_device(self, verify=False):
         """Returns the current active device.
 
+        Args:
+            verify (bool, optional): Read the device instead of the cache. Defaults to False.
+
         Returns:
             int: active device number
         """
-        with self._comm_lock:
-            self._flush()
-            self.ser.write(bytes([75]))  # Send command to the device (ASCII: K)
-            output = self.read(4)  # Expecting 4 bytes back: 1 byte for active device number, 2 bytes for FW version, 1 byte for end marker
-            unpacked = self._validate_and_unpack("4B", output, name="get_active_device")
-            return unpacked[0]
+        with self._command():
+            if not verify and self._active_device is not None:
+                return self._active_device
+            return self._query_active_device()
 
     def change_active_device(self, dev_num: int):
-        """Change active device
+        """Change active device. The command is always sent, the operator may have changed the device on the ROE-200.
 
         Args:
             devNum (int): Device number to be activated (1-4 on this system)
@@ -181,10 +223,10 @@ class Mpc325:
         Returns:
             bool: Change successful
         """
-        with self._comm_lock:
-            self._flush()
+        with self._command():
             if dev_num < 1 or dev_num > 4:
                 raise ValueError(f"Device number {dev_num} is out of range. Must be between 1 and 4.")
+            self._flush()
             command = struct.pack("<2B", 73, dev_num)
             self.ser.write(command)  # Send command to the device (ASCII: I )
             output = self.read(2)  # Expecting 2 bytes back: 1 byte for active device number, 1 byte for end marker
@@ -192,27 +234,39 @@ class Mpc325:
             # check that the device is available and active
             if unpacked[0] != dev_num:
                 raise RuntimeError(f"Failed to change active device. Expected {dev_num}, got {unpacked[0]}.")
+            self._active_device = dev_num
             return True
 
-    def get_current_position(self):
+    def get_current_position(self, verify=False):
         """Get current position in microns.
 
+        Args:
+            verify (bool, optional): Read the device instead of the cache. Defaults to False.
+
         Returns:
             tuple: (x,y,z)
         """
-        with self._comm_lock:
+        with self._command():
+            if self._active_device is None:
+                self._query_active_device()
+            if not verify and self._active_device in self._positions:
+                return self._positions[self._active_device]
             self._flush()
             self.ser.write(bytes([67]))  # Send command (ASCII: C)
             output = self.read(14)  # Expecting 14 bytes back: 1 byte drv number 3*4 bytes for x,y,z positions in microsteps, 1 byte for end marker
             unpacked = self._validate_and_unpack("=BIIIB", output, name="get_current_position")
-            return (self._s2m(unpacked[1]), self._s2m(unpacked[2]), self._s2m(unpacked[3]))
+            position = (self._s2m(unpacked[1]), self._s2m(unpacked[2]), self._s2m(unpacked[3]))
+            self._positions[self._active_device] = position
+            return position
 
     def calibrate(self):
         """Calibrate the device. Does the same thing as the calibrate button on the back of the control unit.
         (moves to 0,0,0)
         """
-        with self._comm_lock:
+        with self._command():
             if self.is_connected:
+                # the device moves to the origin, read the position when it is needed
+                self._positions.pop(self._active_device, None)
                 # add longer timeout for this
                 self.ser.timeout = self._TIMEOUT * 10
                 self._flush()
@@ -224,17 +278,26 @@ class Mpc325:
 
     def stop(self):
         """Stop the current movement"""
+        # Not under the communication lock, the move to stop holds it. Where the manipulators stopped is unknown.
+        self._stop_count += 1
+        self._positions.clear()
         self.ser.write(struct.pack("<B", 0x03))
 
-    def move(self, x=None, y=None, z=None, quick_move=True, speed=7, segment=True, segment_length=500):
+    def move(self, x=None, y=None, z=None, quick_move=True, speed=7, segment=True, segment_length=500, on_segment=None):
         """Move to a position. If quick_move is set to True, the movement will be at full speed.
 
+        The move starts from the position read from the device, not the cache, since the manipulator may have been
+        moved by hand on the ROE-200.
+
         Args:
             x (np.float64): x in microns
             y (np.float64): y in microns
             z (np.float64): z in microns
             quick_move (bool, optional): Whether to use quick move or slow move. Defaults to True.
             speed (int, optional): Speed for slow move in range 0-15. Defaults to 7.
+            on_segment (callable, optional): called as on_segment(done, total, position) after each finished segment.
+        Returns:
+            tuple: (x,y,z) position in microns after the move
         """
 
         def _interal_move(x, y, z, quick_move, speed):
@@ -243,7 +306,7 @@ class Mpc325:
             else:
                 self.slow_move_to(x, y, z, speed)
 
-        curr_pos = self.get_current_position()
+        curr_pos = self.get_current_position(verify=True)
         # If any of the coordinates are None, use the current position.
         if x is None:
             x = curr_pos[0]
@@ -254,16 +317,21 @@ class Mpc325:
 
         # If the position after handrails is the same, do nothing.
         if (curr_pos[0] == self._handrail_micron(x)) and (curr_pos[1] == self._handrail_micron(y)) and (curr_pos[2] == self._handrail_micron(z)):
-            return
+            return curr_pos
         # for moves, add more generous timeout since they really do take a while.
         self.ser.timeout = self._TIMEOUT * 10
         if segment:
             segments = self.segment_move(curr_pos, (x, y, z), length=segment_length)
-            for segment_target in segments:
+            for done, segment_target in enumerate(segments, 1):
                 _interal_move(*segment_target, quick_move=quick_move, speed=speed)  # Move to each segment target without further segmentation
+                if on_segment is not None:
+                    on_segment(done, len(segments), self._reached(segment_target))
         else:
             _interal_move(x, y, z, quick_move, speed)
+            if on_segment is not None:
+                on_segment(1, 1, self._reached((x, y, z)))
         self.ser.timeout = self._TIMEOUT  # reset timeout to default
+        return self._reached((x, y, z))
 
     def quick_move_to(self, x: np.float64, y: np.float64, z: np.float64):
         """Quickmove orthogonally at full speed.
@@ -273,21 +341,24 @@ class Mpc325:
             y (np.float64): y in microns
             z (np.float64): z in microns
         """
-        self._flush()
-        # Pack first part of command
-        command1 = struct.pack("<B", 77)
-        # check bounds for coordinates and convert to microsteps. Makes really *really* sure that the values are good.
-        x_s = self._handrail_step(self._m2s(self._handrail_micron(x)))
-        y_s = self._handrail_step(self._m2s(self._handrail_micron(y)))
-        z_s = self._handrail_step(self._m2s(self._handrail_micron(z)))
+        with self._command():
+            stop_count = self._stop_count
+            self._flush()
+            # Pack first part of command
+            command1 = struct.pack("<B", 77)
+            # check bounds for coordinates and convert to microsteps. Makes really *really* sure that the values are good.
+            x_s = self._handrail_step(self._m2s(self._handrail_micron(x)))
+            y_s = self._handrail_step(self._m2s(self._handrail_micron(y)))
+            z_s = self._handrail_step(self._m2s(self._handrail_micron(z)))
 
-        command2 = struct.pack("<3I", x_s, y_s, z_s)  # < to enforce little endianness. Just in case someone tries to run this on an IBM S/360
+            command2 = struct.pack("<3I", x_s, y_s, z_s)  # < to enforce little endianness. Just in case someone tries to run this on an IBM S/360
 
-        self.ser.write(command1)
-        self.ser.write(command2)
+            self.ser.write(command1)
+            self.ser.write(command2)
 
-        byt = self.read(1)  # Expecting 1 byte back: end marker
-        self._validate_and_unpack("<B", byt, name="quick_move_to")  # Just to validate the end marker
+            byt = self.read(1)  # Expecting 1 byte back: end marker
+            self._validate_and_unpack("<B", byt, name="quick_move_to")  # Just to validate the end marker
+            self._moved(stop_count, (x, y, z))
 
     def slow_move_to(self, x: np.float64, y: np.float64, z: np.float64, speed: int):
         """Slower move in straight lines. Speed is set as a class variable. (Or given as an argument)
@@ -299,24 +370,35 @@ class Mpc325:
             z (np.float64): z in microns
 
         """
-        self._flush()
+        with self._command():
+            stop_count = self._stop_count
+            self._flush()
 
-        # Enforce speed limits
-        if speed > 15 or speed < 0:
-            raise ValueError(f"Speed {speed} is out of range. Must be between 0 and 15.")
-        # Pack first part of command
-        command1 = struct.pack("<2B", 83, speed)
-        # check bounds for coordinates and convert to microsteps. Makes really *really* sure that the values are good.
-        x_s = self._handrail_step(self._m2s(self._handrail_micron(x)))
-        y_s = self._handrail_step(self._m2s(self._handrail_micron(y)))
-        z_s = self._handrail_step(self._m2s(self._handrail_micron(z)))
-        command2 = struct.pack("<3I", x_s, y_s, z_s)  # < to enforce little endianness. Just in case someone tries to run this on an IBM S/360
-
-        self.ser.write(command1)
-        time.sleep(0.035)  # wait period specified in the manual (30 ms) Updated to 35 ms on recommendation from Sutter instr
-        self.ser.write(command2)
-        byt = self.read(1)  # Expecting 1 byte back: end marker
-        self._validate_and_unpack("<B", byt, name="slow_move_to")  # Just to validate the end marker
+            # Enforce speed limits
+            if speed > 15 or speed < 0:
+                raise ValueError(f"Speed {speed} is out of range. Must be between 0 and 15.")
+            # Pack first part of command
+            command1 = struct.pack("<2B", 83, speed)
+            # check bounds for coordinates and convert to microsteps. Makes really *really* sure that the values are good.
+            x_s = self._handrail_step(self._m2s(self._handrail_micron(x)))
+            y_s = self._handrail_step(self._m2s(self._handrail_micron(y)))
+            z_s = self._handrail_step(self._m2s(self._handrail_micron(z)))
+            command2 = struct.pack("<3I", x_s, y_s, z_s)  # < to enforce little endianness. Just in case someone tries to run this on an IBM S/360
+
+            self.ser.write(command1)
+            time.sleep(0.035)  # wait period specified in the manual (30 ms) Updated to 35 ms on recommendation from Sutter instr
+            self.ser.write(command2)
+            byt = self.read(1)  # Expecting 1 byte back: end marker
+            self._validate_and_unpack("<B", byt, name="slow_move_to")  # Just to validate the end marker
+            self._moved(stop_count, (x, y, z))
+
+    def _moved(self, stop_count: int, target: tuple):
+        """Cache the position of a finished move, unless the move was stopped on the way."""
+        if stop_count != self._stop_count:
+            return
+        if self._active_device is None:
+            self._query_active_device()
+        self._positions[self._active_device] = self._reached(target)
 
     # Handrails for microns/microsteps. Realistically would be enough just to check the microsteps, but CATCH ME LETTING A MISTAKE BREAK THESE
     def _handrail_micron(self, microns: np.float64) -> np.float64:
@@ -333,6 +415,10 @@ class Mpc325:
     def _s2m(self, steps: np.uint32) -> np.float64:
         return np.float64(steps * self._S2MCONV)
 
+    # Position reported by the controller after a move to a position in microns.
+    def _reached(self, position: tuple) -> tuple:
+        return tuple(self._s2m(self._handrail_step(self._m2s(self._handrail_micron(value)))) for value in position)
+
     # Segmenter
     def segment_move(self, current_position: tuple, target_position: tuple, length: int) -> list[tuple]:
         """Break up a move into segments of specified length.
@@ -0,0 +1,200 @@
+"""Motion queue for the MPC-325.
+
+The MPC-325 drives one manipulator at a time: only the active device moves, and a move command returns when the
+move is done. The queue cannot make manipulators move at the same time, but it keeps the controller busy. Moves are
+issued back to back from a worker thread while the caller prepares the next moves and handles the finished ones.
+Each move is tracked separately, and its progress is reported after every segment.
+
+Moves run in the order they were queued, so a sequence ordered by the collision planner stays safe. If a move fails,
+the moves queued after it are cancelled.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class QueuedMove:
+    """Handle of a queued move.
+
+    position is the last position reached, updated after every segment. progress is the finished fraction of the move.
+    """
+
+    def __init__(self, device: int, target: tuple, move_kwargs: dict, on_progress=None):
+        self.device = device
+        self.target = target
+        self.move_kwargs = move_kwargs
+        self.on_progress = on_progress
+        self.position = None
+        self.progress = 0.0
+        self.error: Exception | None = None
+        self.cancelled = False
+        self._done = threading.Event()
+
+    def done(self) -> bool:
+        """True when the move has finished, failed or was cancelled."""
+        return self._done.is_set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Wait for the move to finish. Waits in short intervals so that ThreadStopped reaches the waiting thread.
+
+        Returns:
+            bool: True if the move finished, False on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._done.wait(0.1):
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+        return True
+
+    def result(self) -> tuple[int, dict]:
+        """Status of a finished move in the plugin convention."""
+        if self.error is not None:
+            code = 1 if isinstance(self.error, ValueError) else 4
+            return (code, {"Error message": f"Sutter queued move of device {self.device} failed: {self.error!s}", "Exception": str(self.error)})
+        if self.cancelled:
+            return (4, {"Error message": f"Sutter queued move of device {self.device} was cancelled"})
+        if not self.done():
+            return (4, {"Error message": f"Sutter queued move of device {self.device} is not finished"})
+        return (0, {"Error message": "Sutter moved", "position": self.position})
+
+    def _report(self, done: int, total: int, position: tuple):
+        self.position = position
+        self.progress = done / total
+        if self.on_progress is not None:
+            try:
+                self.on_progress(self)
+            except Exception as e:
+                logger.warning(f"Progress callback of a queued move of device {self.device} failed: {e}")
+
+
+class MotionQueue:
+    """Runs queued moves one after another on a worker thread.
+
+    Args:
+        get_hal (callable): returns the HAL to move with, so that changing the backend is followed
+        lock (threading.RLock): held while a move runs, so that other users of the HAL do not change the active device in between
+        on_device_changed (callable, optional): called with the device number after the queue changed the active device
+    """
+
+    def __init__(self, get_hal, lock, on_device_changed=None):
+        self._get_hal = get_hal
+        self._lock = lock
+        self._on_device_changed = on_device_changed
+        self._queue: deque[QueuedMove] = deque()
+        self._unreported: list[QueuedMove] = []
+        self._running: QueuedMove | None = None
+        self._condition = threading.Condition()
+        self._worker: threading.Thread | None = None
+
+    def submit(self, device: int, x=None, y=None, z=None, on_progress=None, **move_kwargs) -> QueuedMove:
+        """Queue a move of a device. move_kwargs are passed to the move of the HAL.
+
+        Returns:
+            QueuedMove: handle to follow the move
+        """
+        move = QueuedMove(device, (x, y, z), move_kwargs, on_progress)
+        with self._condition:
+            # successful moves need no report
+            self._unreported = [queued for queued in self._unreported if not queued.done() or queued.result()[0] != 0]
+            self._queue.append(move)
+            self._unreported.append(move)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="SutterMotionQueue", daemon=True)
+                self._worker.start()
+            self._condition.notify_all()
+        return move
+
+    def pending(self, device: int | None = None) -> list[QueuedMove]:
+        """Moves that are queued or running, of a device or of all devices."""
+        with self._condition:
+            moves = ([self._running] if self._running is not None else []) + list(self._queue)
+        return [move for move in moves if device is None or move.device == device]
+
+    def idle(self) -> bool:
+        return not self.pending()
+
+    def join(self, timeout: float | None = None) -> bool:
+        """Wait until all queued moves are finished.
+
+        Returns:
+            bool: True if the queue is idle, False on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for move in self.pending():
+            if not move.wait(None if deadline is None else max(0.0, deadline - time.monotonic())):
+                return False
+        return True
+
+    def wait(self, device: int | None = None, timeout: float | None = None) -> tuple[int, dict]:
+        """Wait for the moves of a device, or of all devices, queued so far and report their result.
+
+        Returns:
+            tuple[int, dict]: status of the first move that did not succeed, or (0, ...) if all moves succeeded
+        """
+        with self._condition:
+            moves = [move for move in self._unreported if device is None or move.device == device]
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for move in moves:
+            if not move.wait(None if deadline is None else max(0.0, deadline - time.monotonic())):
+                return (4, {"Error message": f"Sutter queued moves of device {move.device} did not finish in time"})
+        with self._condition:
+            self._unreported = [move for move in self._unreported if move not in moves]
+        for move in moves:
+            status, state = move.result()
+            if status != 0:
+                return status, state
+        return (0, {"Error message": f"Sutter finished {len(moves)} queued moves"})
+
+    def cancel(self) -> int:
+        """Cancel the moves that have not started. The running move is not interrupted, stop the HAL for that.
+
+        Returns:
+            int: number of cancelled moves
+        """
+        with self._condition:
+            cancelled = list(self._queue)
+            self._queue.clear()
+        for move in cancelled:
+            move.cancelled = True
+            move._done.set()
+        if cancelled:
+            logger.info(f"Cancelled {len(cancelled)} queued Sutter moves")
+        return len(cancelled)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                move = self._queue.popleft()
+                self._running = move
+            try:
+                self._execute(move)
+            except Exception as e:
+                # any failure, also a short read (struct.error), fails the move and keeps the worker alive
+                logger.warning(f"Queued move of device {move.device} to {move.target} failed: {e!r}")
+                move.error = e
+                # the moves after this one were planned assuming it succeeds
+                self.cancel()
+            except BaseException as e:
+                # ThreadStopped and the like end the worker, submit starts a new one
+                move.error = e
+                self.cancel()
+                raise
+            finally:
+                move._done.set()
+                with self._condition:
+                    self._running = None
+
+    def _execute(self, move: QueuedMove):
+        with self._lock:
+            hal = self._get_hal()
+            hal.change_active_device(move.device)
+            if self._on_device_changed is not None:
+                self._on_device_changed(move.device)
+            move.position = hal.move(*move.target, on_segment=move._report, **move.move_kwargs)
+            move.progress = 1.0
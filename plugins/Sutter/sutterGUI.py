@@ -1,6 +1,7 @@
 import copy
 import logging
 import os
+import threading
 from functools import wraps
 from typing import Any
 
@@ -16,6 +17,7 @@ from PyQt6 import QtCore, QtWidgets, uic
 from PyQt6.QtCore import QObject, pyqtSlot
 from serial import SerialException
 from Sutter import Mpc325
+from motionQueue import MotionQueue, QueuedMove
 from threadStopped import ThreadStopped
 from virtual import VirtualMpc325
 
@@ -61,6 +63,7 @@ def handle_sutter_exceptions(func):
         except SerialException as e:
             return (4, {"Error message": f"Sutter SerialException: {e!s}", "Exception": str(e)})
         except ThreadStopped:
+            self.motion_queue.cancel()  # Drop queued moves, they were planned for the interrupted sequence
             self.hal.stop()  # Attempt to stop any ongoing movement if a ThreadStopped exception is raised
             raise  # re-raise to be caught by outer layers that handle thread stopping
         except RuntimeError as e:
@@ -84,6 +87,8 @@ class SutterGUI(QObject):
     - mm_stop
     - mm_up_max
     - mm_current_position
+    - mm_queue_move
+    - mm_wait
 
 
 
@@ -131,6 +136,9 @@ class SutterGUI(QObject):
         super().__init__()
         self._hal = Mpc325()
         self._virhal = VirtualMpc325()
+        # held while the active device is changed for a single operation, so that queued moves do not interleave
+        self._motion_lock = threading.RLock()
+        self.motion_queue = MotionQueue(lambda: self.hal, self._motion_lock, on_device_changed=self.change_active_device_signal.emit)
 
         self.logger = LoggingHelper(self)
         self.cl = CloseLockSignalProvider()
@@ -413,13 +421,19 @@ class SutterGUI(QObject):
 
     @public
     @handle_sutter_exceptions
-    def mm_open(self) -> tuple[int, dict]:
-        """Open the configured Sutter serial connection. This also forces a parse of the GUI to fill the internal settings."""
+    def mm_open(self, parse_settings=True) -> tuple[int, dict]:
+        """Open the configured Sutter serial connection. This also forces a parse of the GUI to fill the internal settings.
+
+        Args:
+            parse_settings (bool): parse the settings widget first. Set to False when called from other threads than
+                the GUI thread, after parsing the settings in the GUI thread.
+        """
         if self.hal.is_connected():
             return (0, {"Error message": "Sutter already connected"})
 
         # We need to parse the settings to ensure we have an up to date settings dictionary
-        self.parse_settings_widget()
+        if parse_settings:
+            self.parse_settings_widget()
         address = self.settings["address"]
         self.hal.open(address)
         # Update settings from GUI after successful connection
@@ -448,6 +462,8 @@ class SutterGUI(QObject):
             mm_open_status, mm_open_result = self.mm_open()
             if mm_open_status != 0:
                 return mm_open_status, mm_open_result
+        # queued moves change the active device, let them finish first
+        self.motion_queue.join()
         if self.hal.change_active_device(dev_num):
             # signal gui update
             self.change_active_device_signal.emit(dev_num)
@@ -481,12 +497,21 @@ class SutterGUI(QObject):
             mm_open_status, mm_open_result = self.mm_open()
             if mm_open_status != 0:
                 return mm_open_status, mm_open_result
+        # blocking moves run after the queued ones
+        self.motion_queue.join()
+        with self._motion_lock:
+            self._locked_move(x, y, z, manipulator_number)
+
+        return (0, {"Error message": "Sutter moved"})
+
+    def _locked_move(self, x=None, y=None, z=None, manipulator_number=None):
+        """Blocking move with the current settings. The caller joins the motion queue and holds the motion lock, so
+        that the active device and its position do not change between reading them and the move."""
         quick_move = self.settings["quickmove"]
         speed = self.settings["speed"]
         segment = self.settings["segment_move"]
         segment_length = self.settings["segment_length"]
         logger.debug(f"mm_move called with x={x}, y={y}, z={z}, manipulator_number={manipulator_number}, quick_move={quick_move}, speed={speed}, segment={segment}, segment_length={segment_length}")
-
         if manipulator_number is not None:
             # if device if specified, switch to it temporarily to perform the move, then switch back
             old_device = self.hal.get_active_device()
@@ -496,8 +521,6 @@ class SutterGUI(QObject):
         else:
             self.hal.move(x, y, z, quick_move=quick_move, speed=speed, segment=segment, segment_length=segment_length)
 
-        return (0, {"Error message": "Sutter moved"})
-
     @public
     @handle_sutter_exceptions
     def mm_move_relative(self, x_change=0, y_change=0, z_change=0) -> tuple[int, dict]:
@@ -515,7 +538,7 @@ class SutterGUI(QObject):
                 - (4, {...}) for hardware/serial errors.
 
         Edge cases:
-            - Relative target is calculated from live HAL position at call time.
+            - Relative target is calculated from the position read from the device at call time.
             - Bounds are enforced by underlying HAL move routines.
             - ThreadStopped is re-raised by the exception decorator.
         """
@@ -524,8 +547,10 @@ class SutterGUI(QObject):
             if mm_open_status != 0:
                 return mm_open_status, mm_open_result
 
-        (x, y, z) = self.hal.get_current_position()
-        self.mm_move(x + x_change, y + y_change, z + z_change)
+        self.motion_queue.join()
+        with self._motion_lock:
+            (x, y, z) = self.hal.get_current_position(verify=True)
+            self._locked_move(x + x_change, y + y_change, z + z_change)
         return (0, {"Error message": "Sutter moved"})
 
     @public
@@ -578,6 +603,7 @@ class SutterGUI(QObject):
 
         Edge cases:
             - HAL stop uses a stop-event and input/output buffer flush.
+            - Queued moves that have not started are cancelled.
             - Safe to call when no movement is active; still returns success if
               HAL stop completes without error.
         """
@@ -585,6 +611,7 @@ class SutterGUI(QObject):
             mm_open_status, mm_open_result = self.mm_open()
             if mm_open_status != 0:
                 return mm_open_status, mm_open_result
+        self.motion_queue.cancel()
         self.hal.stop()
         return (0, {"Error message": "Sutter stopped"})
 
@@ -607,29 +634,27 @@ class SutterGUI(QObject):
 
         Edge cases:
             - Bounds are checked against HAL _MINIMUM_MS and _MAXIMUM_M before move.
-            - In relative mode, target is computed from current live position.
+            - In relative mode, target is computed from the position read from the device.
             - ThreadStopped is re-raised by the exception decorator.
         """
         if not self.hal.is_connected():
             mm_open_status, mm_open_result = self.mm_open()
             if mm_open_status != 0:
                 return mm_open_status, mm_open_result
-        (x, y, z) = self.hal.get_current_position()
-
-        if absolute:
-            # For absolute positioning, z_change is the target z position
-            target_z = z_change
+        self.motion_queue.join()
+        with self._motion_lock:
+            (x, y, z) = self.hal.get_current_position(verify=True)
+
+            if absolute:
+                # For absolute positioning, z_change is the target z position
+                target_z = z_change
+            else:
+                # For relative positioning, z_change is the offset
+                target_z = z + z_change
             if target_z > self.hal._MAXIMUM_M or target_z < self.hal._MINIMUM_MS:
                 return (1, {"Error message": "Sutter move out of bounds"})
-            self.mm_move(x, y, target_z)
-            return (0, {"Error message": "Sutter moved"})
-        else:
-            # For relative positioning, z_change is the offset
-            target_z = z + z_change
-            if target_z > self.hal._MAXIMUM_M or target_z < self.hal._MINIMUM_MS:
-                return (1, {"Error message": "Sutter move out of bounds"})
-            self.mm_move(x, y, target_z)
-            return (0, {"Error message": "Sutter moved"})
+            self._locked_move(x, y, target_z)
+        return (0, {"Error message": "Sutter moved"})
 
     @public
     @handle_sutter_exceptions
@@ -675,20 +700,24 @@ class SutterGUI(QObject):
             mm_open_status, mm_open_result = self.mm_open()
             if mm_open_status != 0:
                 return mm_open_status, mm_open_result
-        x, y, z = self.hal.get_current_position()
-        if z == 0:
-            return (0, {"Error message": "Sutter already at max"})
-        self.mm_move(x, y, 0)
+        self.motion_queue.join()
+        with self._motion_lock:
+            x, y, z = self.hal.get_current_position(verify=True)
+            if z == 0:
+                return (0, {"Error message": "Sutter already at max"})
+            self._locked_move(x, y, 0)
         return (0, {"Error message": "Sutter moved up to max"})
 
     @public
     @handle_sutter_exceptions
-    def mm_current_position(self, manipulator_name=None):
+    def mm_current_position(self, manipulator_name=None, verify=False):
         """Get current manipulator position.
 
         Args:
             manipulator_name (int | None): Optional 1-based manipulator index to
                 query. When provided, active device is switched temporarily.
+            verify (bool): Read the position from the device instead of the
+                position cached from the last move.
 
         Returns:
             tuple[float, float, float] | tuple[int, dict]:
@@ -700,6 +729,8 @@ class SutterGUI(QObject):
               existing callers.
             - If manipulator_name is provided, previous active device is restored
               after reading position.
+            - Positions are cached from the moves of this plugin. Use verify=True
+              after the manipulator was moved by hand.
             - Hardware/serial errors are mapped by the exception decorator.
             - ThreadStopped is re-raised by the exception decorator.
         """
@@ -709,14 +740,15 @@ class SutterGUI(QObject):
             if mm_open_status != 0:
                 return mm_open_status, mm_open_result
         if manipulator_name is not None:
-            old_device = self.hal.get_active_device()
-            success = self.hal.change_active_device(manipulator_name)
-            if not success:
-                return (4, {"Error message": f"Failed to change to device {manipulator_name}"})
-            pos = self.hal.get_current_position()
-            self.hal.change_active_device(old_device)  # Restore previous device
+            with self._motion_lock:
+                old_device = self.hal.get_active_device()
+                success = self.hal.change_active_device(manipulator_name)
+                if not success:
+                    return (4, {"Error message": f"Failed to change to device {manipulator_name}"})
+                pos = self.hal.get_current_position(verify=verify)
+                self.hal.change_active_device(old_device)  # Restore previous device
         else:
-            pos = self.hal.get_current_position()
+            pos = self.hal.get_current_position(verify=verify)
         return pos
 
     @public
@@ -835,11 +867,78 @@ class SutterGUI(QObject):
 
         if x is None and y is None and z is None:
             return [1, {"Error message": "Sutter slow move requires at least one coordinate"}]
+        curr_pos = self.hal.get_current_position(verify=True)
         if x is None:
-            x = self.hal.get_current_position()[0]
+            x = curr_pos[0]
         if y is None:
-            y = self.hal.get_current_position()[1]
+            y = curr_pos[1]
         if z is None:
-            z = self.hal.get_current_position()[2]
+            z = curr_pos[2]
         self.hal.slow_move_to(x, y, z, 7)
         return [0, {"Error message": "Sutter moved"}]
+
+    @public
+    @handle_sutter_exceptions
+    def mm_queue_move(self, x=None, y=None, z=None, manipulator_number=None, on_progress=None) -> tuple[int, QueuedMove | dict]:
+        """Queue a move to absolute coordinates and return without waiting for it.
+
+        Queued moves run one after another in the order they were queued, the controller moves one manipulator at a
+        time. The next move is sent as soon as the previous one is done.
+
+        Args:
+            x (float | None): Target X position in microns.
+            y (float | None): Target Y position in microns.
+            z (float | None): Target Z position in microns.
+            manipulator_number (int | None): 1-based manipulator index to move. If None, uses the device active now.
+            on_progress (callable | None): called from the queue thread with the QueuedMove after every segment.
+
+        Returns:
+            tuple[int, QueuedMove | dict]:
+                - (0, QueuedMove) on success. QueuedMove.wait() waits for the move, QueuedMove.result() gives
+                  its status and QueuedMove.position the position reached.
+                - (code, {...}) if the device cannot be opened.
+
+        Edge cases:
+            - Move settings (quickmove, speed, segments) are read when the move is queued.
+            - If a queued move fails, the moves queued after it are cancelled.
+            - mm_stop cancels the queued moves. Blocking moves and device changes wait for the queue to empty.
+        """
+        if not self.hal.is_connected():
+            mm_open_status, mm_open_result = self.mm_open()
+            if mm_open_status != 0:
+                return mm_open_status, mm_open_result
+        if manipulator_number is None:
+            manipulator_number = self.hal.get_active_device()
+        move = self.motion_queue.submit(
+            manipulator_number,
+            x,
+            y,
+            z,
+            on_progress=on_progress,
+            quick_move=self.settings["quickmove"],
+            speed=self.settings["speed"],
+            segment=self.settings["segment_move"],
+            segment_length=self.settings["segment_length"],
+        )
+        return (0, move)
+
+    @public
+    @handle_sutter_exceptions
+    def mm_wait(self, manipulator_number=None, timeout=None) -> tuple[int, dict]:
+        """Wait for queued moves to finish.
+
+        Args:
+            manipulator_number (int | None): 1-based manipulator index. If None, waits for the moves of all devices.
+            timeout (float | None): Maximum wait in seconds. None waits until the moves are done.
+
+        Returns:
+            tuple[int, dict]:
+                - (0, {"Error message": ...}) if all waited moves succeeded.
+                - (1, {...}) or (4, {...}) of the first move that failed or was cancelled.
+                - (4, {...}) on timeout.
+
+        Edge cases:
+            - Reports the moves queued since the last wait, including moves that finished before this call.
+            - ThreadStopped is re-raised by the exception decorator, which also cancels the queue.
+        """
+        return self.motion_queue.wait(manipulator_number, timeout)
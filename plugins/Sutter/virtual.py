@@ -88,6 +88,9 @@ class VirtualMpc325:
         line += f" with data: {data}"
         logger.debug(line)
 
+    def invalidate_cache(self):
+        """The virtual device has no cache, it answers from its state."""
+
     def is_connected(self):
         """Check if the port is open and connected.
 
@@ -101,7 +104,7 @@ class VirtualMpc325:
 
         time.sleep(0.002)  # Hardcoded wait time (2 ms) between commands from the manual.
 
-    def get_connected_devices_status(self):
+    def get_connected_devices_status(self, verify=False):
         """Get the status of connected micromanipulators
 
         Returns:
@@ -115,7 +118,7 @@ class VirtualMpc325:
         device_statuses = [1, 1, 1, 1]  # Simulate all devices are connected and active
         return (num_devices, device_statuses)
 
-    def get_active_device(self):
+    def get_active_device(self, verify=False):
         """Returns the current active device.
 
         Returns:
@@ -147,7 +150,7 @@ class VirtualMpc325:
             raise RuntimeError(f"Failed to change active device. Expected {dev_num}, got {self.active_device}.")
         return True
 
-    def get_current_position(self):
+    def get_current_position(self, verify=False):
         """Get current position in microns.
 
         Returns:
@@ -180,7 +183,7 @@ class VirtualMpc325:
         """Stop the current movement"""
         self.write(struct.pack("<B", 0x03))
 
-    def move(self, x=None, y=None, z=None, quick_move=True, speed=7, segment=True, segment_length=500):
+    def move(self, x=None, y=None, z=None, quick_move=True, speed=7, segment=True, segment_length=500, on_segment=None):
         """Move to a position. If quick_move is set to True, the movement will be at full speed.
 
         Args:
@@ -189,6 +192,9 @@ class VirtualMpc325:
             z (np.float64): z in microns
             quick_move (bool, optional): Whether to use quick move or slow move. Defaults to True.
             speed (int, optional): Speed for slow move in range 0-15. Defaults to 7.
+            on_segment (callable, optional): called as on_segment(done, total, position) after each finished segment.
+        Returns:
+            tuple: (x,y,z) position in microns after the move
         """
 
         def _internal_move(x, y, z, quick_move, speed):
@@ -208,13 +214,17 @@ class VirtualMpc325:
 
         # If the position after handrails is the same, do nothing.
         if (curr_pos[0] == self._handrail_micron(x)) and (curr_pos[1] == self._handrail_micron(y)) and (curr_pos[2] == self._handrail_micron(z)):
-            return
+            return curr_pos
         if segment:
             segments = self.segment_move(curr_pos, (x, y, z), length=segment_length)
-            for segment_target in segments:
+            for done, segment_target in enumerate(segments, 1):
                 _internal_move(*segment_target, quick_move=quick_move, speed=speed)  # Move to each segment target without further segmentation
+                if on_segment is not None:
+                    on_segment(done, len(segments), self._reached(segment_target))
         else:
             _internal_move(x, y, z, quick_move, speed)
+            if on_segment is not None:
+                on_segment(1, 1, self._reached((x, y, z)))
 
         # move is done, update the current position to the target position
         self.man_pos[self.active_device - 1] = (
@@ -222,6 +232,7 @@ class VirtualMpc325:
             self._handrail_step(self._m2s(self._handrail_micron(y))),
             self._handrail_step(self._m2s(self._handrail_micron(z))),
         )
+        return self._reached((x, y, z))
 
     def quick_move_to(self, x: np.float64, y: np.float64, z: np.float64):
         """Quickmove orthogonally at full speed.
@@ -293,6 +304,10 @@ class VirtualMpc325:
     def _s2m(self, steps: np.uint32) -> np.float64:
         return np.float64(steps * self._S2MCONV)
 
+    # Position reported by the controller after a move to a position in microns.
+    def _reached(self, position: tuple) -> tuple:
+        return tuple(self._s2m(self._handrail_step(self._m2s(self._handrail_micron(value)))) for value in position)
+
     # Segmenter
     def segment_move(self, current_position: tuple, target_position: tuple, length: int) -> list[tuple]:
         """Break up a move into segments of specified length.
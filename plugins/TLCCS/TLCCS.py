@@ -1,5 +1,7 @@
 import struct
+import threading
 import time
+from collections import deque
 
 import numpy as np
 import TLCCS_const as const
@@ -10,6 +12,9 @@ from lowLevel import LLIO
 class CCSDRV:
     def __init__(self):
         self._io = None
+        # USB read buffer and its uint16 view are allocated once and reused for every scan
+        self._raw_buffer = None
+        self._raw = None
 
     @property
     def io(self):
@@ -176,51 +181,59 @@ class CCSDRV:
         """Starts a single scan with external trigger"""
         self.io.control_out(const.CCS_SERIES_WCMD_MODUS, None, wValue=const.MODUS_EXTERN_SINGLE_SHOT)
 
-    def get_scan_data(self) -> np.ndarray:
+    def get_scan_data(self, out: np.ndarray | None = None) -> np.ndarray:
         """Get processed scan data from the device buffer.
 
         This method retrieves raw scan data from the device, processes it, and returns the normalized scan data.
 
+        Args:
+            out (np.ndarray, optional): float64 array of CCS_SERIES_NUM_PIXELS to write the scan into, so that no array is allocated.
+                If None, a new array is returned. Scans are passed to other threads, so the driver does not keep a shared output buffer.
+
         Returns:
-            np.ndarray: Processed scan data as a NumPy array of type np.float64.
+            np.ndarray: Processed scan data as a NumPy array of type np.float64 (out if given).
         """
         # Get raw data
         raw = self._get_raw_data()
 
         # Process raw data
-        data = self._process_raw_scan_data(raw)
+        data = self._process_raw_scan_data(raw, out)
         return data
 
     def _get_raw_data(self) -> np.ndarray:
         """Retrieve raw scan data from the device buffer.
 
         The raw scan data is read from the device as a NumPy array of type np.uint16.
+        The buffer is reused, so the returned array is overwritten by the next read.
 
         Returns:
             np.ndarray: Raw scan data as a NumPy array of type np.uint16.
         """
-        # Calculate size of read and create a buffer to read into
-        buffer_size = const.CCS_SERIES_NUM_RAW_PIXELS * 2  # since uint16 is 2 bytes
-        buffer = usb.util.create_buffer(buffer_size)
-        # Read to buffer and convert to uint16
-        self.io.read_raw(buffer)
-        readTo = np.frombuffer(buffer, dtype=np.uint16)
+        if self._raw_buffer is None:
+            # Calculate size of read and create a buffer to read into
+            buffer_size = const.CCS_SERIES_NUM_RAW_PIXELS * 2  # since uint16 is 2 bytes
+            self._raw_buffer = usb.util.create_buffer(buffer_size)
+            # uint16 view to the buffer, follows the data read into it
+            self._raw = np.frombuffer(self._raw_buffer, dtype=np.uint16)
+        self.io.read_raw(self._raw_buffer)
 
-        return readTo
+        return self._raw
 
-    def _process_raw_scan_data(self, raw: np.ndarray) -> np.ndarray:
+    def _process_raw_scan_data(self, raw: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
         """Process raw scan data to normalize it.
 
         This method calculates the dark current average, normalizing factor, and processes the raw data to produce normalized scan data.
 
         Args:
             raw (np.ndarray): Raw scan data as a NumPy array of type np.uint16.
+            out (np.ndarray, optional): float64 array of CCS_SERIES_NUM_PIXELS for the result. Defaults to a new array.
 
         Returns:
             np.ndarray: Normalized scan data as a NumPy array of type np.float64.
         """
         # Initialize array for modified data
-        data = np.zeros(const.CCS_SERIES_NUM_PIXELS, dtype=np.float64)
+        if out is None:
+            out = np.empty(const.CCS_SERIES_NUM_PIXELS, dtype=np.float64)
 
         # Sum the dark pixels
         dark_com = np.sum(raw[const.DARK_PIXELS_OFFSET : const.DARK_PIXELS_OFFSET + const.NO_DARK_PIXELS])
@@ -232,10 +245,10 @@ class CCSDRV:
         norm_com = 1.0 / (const.MAX_ADC_VALUE - dark_com)
 
         # Process raw data
-        for i in range(const.CCS_SERIES_NUM_PIXELS):
-            data[i] = (raw[const.SCAN_PIXELS_OFFSET + i] - dark_com) * norm_com
+        np.subtract(raw[const.SCAN_PIXELS_OFFSET : const.SCAN_PIXELS_OFFSET + const.CCS_SERIES_NUM_PIXELS], dark_com, out=out)
+        out *= norm_com
 
-        return data
+        return out
 
     def read_eeprom(self, addr, idx, length):
         # Buffers
@@ -282,3 +295,186 @@ class CCSDRV:
             wValue=const.CCS_SERIES_HARDWARE_VERSION,
         )
         return (buffer[0], buffer[1], buffer[2])
+
+
+class ScanEngine:
+    """Background acquisition engine for CCSDRV.
+
+    A worker thread owns the USB connection while the engine runs. It watches the device status,
+    reads every finished scan as soon as the device reports SCAN_TRANSFER and processes it into one of two
+    preallocated buffers. Completed scans are published to a deque, so consumers never block the readout:
+    latest() returns immediately and next() waits only for a scan newer than the last one taken.
+
+    In continuous mode the device scans continuously and every scan is published. Otherwise the engine
+    runs a single internally started scan per trigger() call, which lets the caller do other work
+    (e.g. SMU readings) while the spectrometer integrates and the data is transferred.
+
+    No other driver calls may be made while the engine is running. Integration time changes during
+    a continuous run go through set_integration_time(), which is applied by the worker thread.
+    """
+
+    def __init__(self, driver, continuous=True, poll_interval=0.002, watchdog=True):
+        """
+        Args:
+            driver: CCSDRV (or compatible) instance, already opened.
+            continuous (bool, optional): scan continuously, otherwise scan once per trigger(). Defaults to True.
+            poll_interval (float, optional): device status polling interval in s. Defaults to 0.002.
+            watchdog (bool, optional): restart continuous scanning if no scan arrives in time. Defaults to True.
+        """
+        self.driver = driver
+        self.continuous = continuous
+        self.poll_interval = poll_interval
+        self.watchdog = watchdog
+        self.error = None
+        # two alternating output buffers: one is being filled while the other is published
+        self._buffers = [np.empty(const.CCS_SERIES_NUM_PIXELS, dtype=np.float64) for _ in range(2)]
+        self._scans = deque(maxlen=1)
+        # held while a scan is published or copied, so the published buffer is not refilled during a copy
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._last_taken = 0
+        self._new_scan = threading.Event()
+        self._integrated = threading.Event()
+        self._trigger = threading.Event()
+        self._stop = threading.Event()
+        self._pending_intg_time = None
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Starts the worker thread. Does nothing if it is already running."""
+        if self.running:
+            return
+        self._stop.clear()
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name="TLCCS scan engine", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """Stops the worker thread and waits for it to finish the scan in progress."""
+        self._stop.set()
+        self._trigger.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def trigger(self):
+        """Requests a single scan (non-continuous mode)."""
+        self._integrated.clear()
+        self._trigger.set()
+
+    def set_integration_time(self, intg_time: float):
+        """Changes the integration time from the worker thread before the next scan."""
+        self._pending_intg_time = intg_time
+
+    def wait_integrated(self, timeout=None) -> bool:
+        """Waits until the device has finished integrating the requested scan.
+
+        The scan data is still being transferred and processed when this returns.
+
+        Returns:
+            bool: True if the integration finished, False on timeout or if the engine stopped.
+        """
+        return self._integrated.wait(timeout) and self.error is None
+
+    def latest(self):
+        """Returns the most recent scan without waiting.
+
+        Returns:
+            tuple | None: (sequence number, copy of the scan), None if no scan has been completed yet.
+        """
+        with self._lock:
+            try:
+                seq, scan = self._scans[-1]
+            except IndexError:
+                return None
+            scan = scan.copy()
+        self._last_taken = max(self._last_taken, seq)
+        return seq, scan
+
+    def next(self, timeout=None):
+        """Waits for a scan newer than the last one returned by latest() or next().
+
+        Args:
+            timeout (float, optional): maximum wait in s. Defaults to None (wait indefinitely).
+
+        Returns:
+            tuple | None: (sequence number, copy of the scan), None on timeout or if the engine stopped.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            # clear before checking, so that a scan published in between is not missed
+            self._new_scan.clear()
+            newest = self._scans[-1] if self._scans else None
+            if newest is not None and newest[0] > self._last_taken:
+                return self.latest()
+            if self.error is not None or not self.running:
+                return None
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return None
+            self._new_scan.wait(remaining)
+
+    def _watchdog_timeout(self) -> float:
+        return max(2.0, 2.0 * float(getattr(self.driver, "integration_time", 0.05)) + 0.5)
+
+    def _run(self):
+        try:
+            if self.continuous:
+                self.driver.start_scan_continuous()
+            waiting_since = time.monotonic()
+            while not self._stop.is_set():
+                if self._pending_intg_time is not None:
+                    intg_time, self._pending_intg_time = self._pending_intg_time, None
+                    self.driver.set_integration_time(intg_time)
+                    self.driver.integration_time = intg_time
+                    if self.continuous:
+                        self.driver.start_scan_continuous()
+                    waiting_since = time.monotonic()
+
+                if not self.continuous:
+                    if not self._trigger.wait(0.1):
+                        continue
+                    if self._stop.is_set():
+                        break
+                    self._trigger.clear()
+                    self.driver.start_scan()
+                    waiting_since = time.monotonic()
+
+                if not self._wait_transfer(waiting_since):
+                    continue
+                self._integrated.set()
+                self._read_scan()
+                waiting_since = time.monotonic()
+        except Exception as e:
+            self.error = e
+        finally:
+            # release anyone waiting on the engine
+            self._integrated.set()
+            self._new_scan.set()
+
+    def _wait_transfer(self, waiting_since: float) -> bool:
+        """Polls the device until a scan is ready for transfer. Returns False if stopped or restarted by the watchdog."""
+        while not self._stop.is_set():
+            if "SCAN_TRANSFER" in self.driver.get_device_status():
+                return True
+            if self.continuous and self.watchdog and time.monotonic() - waiting_since > self._watchdog_timeout():
+                # the device sometimes drops out of continuous mode, any command other than a scan read restarts it
+                self.driver.get_integration_time()
+                self.driver.start_scan_continuous()
+                return False
+            if self._pending_intg_time is not None and self.continuous:
+                return False
+            time.sleep(self.poll_interval)
+        return False
+
+    def _read_scan(self):
+        buffer = self._buffers[self._seq % 2]
+        self.driver.get_scan_data(out=buffer)
+        with self._lock:
+            self._seq += 1
+            self._scans.append((self._seq, buffer))
+        self._new_scan.set()
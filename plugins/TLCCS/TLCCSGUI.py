@@ -40,6 +40,13 @@ ivarad
 version 0.6
 implemented non-blocking preview with QThread
 added public function guards during preview
+
+version 0.7
+preview and sequence scans use the driver level ScanEngine
+added spectrometerRequestScan, spectrometerWaitIntegration and spectrometerWaitScan to overlap other work with spectrum readout
+
+version 0.8
+auto integration time predicts the next guess from the measured spectra instead of bisecting
 """
 
 import copy
@@ -54,6 +61,7 @@ from pathvalidate import is_valid_filename
 from plugin_components import (
     ConnectionIndicatorStyle,
     FileManager,
+    IntegrationTimeSolver,
     LoggingHelper,
     get_public_methods,
     ini_to_bool,
@@ -62,14 +70,16 @@ from plugin_components import (
 from PyQt6 import uic
 from PyQt6.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
 from PyQt6.QtWidgets import QFileDialog, QVBoxLayout
-from TLCCS import CCSDRV
+from spectral_dataset import DEFAULT_DATASET_NAME, SpectralDatasetWriter
+from TLCCS import CCSDRV, ScanEngine
 from worker_thread import WorkerThread
 
 
 class PreviewThread(QThread):
-    """Background thread for non-blocking spectrometer preview polling.
+    """Background thread for non-blocking spectrometer preview.
 
-    Handles continuous data acquisition and status monitoring without blocking the main GUI thread.
+    Acquisition is done by a ScanEngine running in continuous mode, this thread only forwards
+    completed scans to the GUI, so readout is never delayed by the GUI update rate.
     Emits signals for data updates, errors, and status changes.
     """
 
@@ -87,7 +97,7 @@ class PreviewThread(QThread):
             correction: Wavelength calibration correction data
             settings: Settings dictionary with integration time and other parameters
             logger: Logger instance for verbose logging
-            interval_ms: Polling interval in milliseconds
+            interval_ms: Retry interval in milliseconds after an acquisition error
         """
         super().__init__()
         self.driver = driver
@@ -95,72 +105,28 @@ class PreviewThread(QThread):
         self.settings = settings
         self.logger = logger
         self.interval_ms = interval_ms
+        self.engine = ScanEngine(driver, continuous=True)
         self._running = False
         self._stop_requested = False
-        self._integration_time_changed = False
-        self._new_settings = None
 
     def run(self):
-        """Main thread loop: continuously poll hardware for data."""
+        """Main thread loop: forward scans from the acquisition engine."""
         self._running = True
         self._stop_requested = False
-        self._preview_wait_started_at = None
 
         try:
+            self.engine.start()
             self.status_changed.emit("Preview thread started")
 
             while self._running and not self._stop_requested:
-                try:
-                    # Handle pending integration time changes
-                    if self._integration_time_changed and self._new_settings:
-                        try:
-                            self.driver.set_integration_time(self._new_settings["integrationtime"])
-                            self._integration_time_changed = False
-                            self.driver.start_scan_continuous()
-                            self._preview_wait_started_at = time.monotonic()
-                            integration_ms = int(self._new_settings["integrationtime"] * 1000)
-                            self.interval_ms = int(max(20, integration_ms))
-                            self.status_changed.emit(f"Integration time updated to {integration_ms}ms")
-                        except Exception as e:
-                            self.error_occurred.emit(f"Failed to update integration time: {e}")
-                            continue
-
-                    # Poll device status
-                    statuses = self.driver.get_device_status()
-
-                    # Check if data is ready for transfer
-                    if "SCAN_TRANSFER" in statuses:
-                        try:
-                            data = self.driver.get_scan_data()
-                            self.data_ready.emit([self.correction[:, 0], data])
-                            self._preview_wait_started_at = time.monotonic()
-                        except Exception as e:
-                            self.error_occurred.emit(f"Failed to read scan data: {e}")
-                        self.msleep(self.interval_ms)
-                        continue
-
-                    # Watchdog: restart scan if no transfer within timeout
-                    if self._preview_wait_started_at is None:
-                        self._preview_wait_started_at = time.monotonic()
-
-                    waited_s = time.monotonic() - self._preview_wait_started_at
-                    int_time = float(self.settings.get("integrationtime", 0.05))
-                    wait_timeout_s = max(2.0, 2.0 * int_time + 0.5)
-
-                    if waited_s > wait_timeout_s and "SCAN_TRANSFER" not in statuses:
-                        self.logger.log_info(f"Preview watchdog: no transfer after {waited_s:.2f}s, restarting scan")
-                        try:
-                            self.driver.get_integration_time()
-                            self.driver.start_scan_continuous()
-                            self._preview_wait_started_at = time.monotonic()
-                        except Exception as e:
-                            self.error_occurred.emit(f"Watchdog recovery failed: {e}")
-
-                    self.msleep(self.interval_ms)
-
-                except Exception as e:
-                    self.error_occurred.emit(f"Unexpected error in preview thread: {e}")
+                scan = self.engine.next(timeout=0.2)
+                if scan is not None:
+                    self.data_ready.emit([self.correction[:, 0], scan[1]])
+                    continue
+                if self.engine.error is not None and not self._stop_requested:
+                    self.error_occurred.emit(f"Failed to read scan data: {self.engine.error}")
                     self.msleep(self.interval_ms)
+                    self.engine.start()
 
             self.status_changed.emit("Preview thread stopped normally")
             self.finished_normally.emit()
@@ -168,6 +134,7 @@ class PreviewThread(QThread):
         except Exception as e:
             self.error_occurred.emit(f"Critical error in preview thread: {e}")
         finally:
+            self.engine.stop()
             self._running = False
 
     def update_integration_time(self, settings):
@@ -176,8 +143,9 @@ class PreviewThread(QThread):
         Args:
             settings: Updated settings dictionary with new integration time
         """
-        self._new_settings = copy.deepcopy(settings)
-        self._integration_time_changed = True
+        self.settings = copy.deepcopy(settings)
+        self.engine.set_integration_time(self.settings["integrationtime"])
+        self.status_changed.emit(f"Integration time update to {int(self.settings['integrationtime'] * 1000)}ms requested")
 
     def stop_preview(self):
         """Request graceful stop of the preview thread."""
@@ -288,6 +256,12 @@ class TLCCS_GUI(QObject):
 
         # Thread-based preview
         self._preview_thread = None
+        # acquisition engine for a scan requested with spectrometerRequestScan
+        self._scan_engine = None
+        # open spectral datasets by address, spectra are appended to them when savedataset is set
+        self._datasets = {}
+        # model based search for auto integration time, keeps the signal rate of previous points between calls
+        self._autoTime_solver = IntegrationTimeSolver(self.autoTime_min, self.autoTime_max, self.autoValue_min, self.autoValue_max)
 
     def _connect_signals(self):
         """Connect GUI signals to their respective slots."""
@@ -326,6 +300,7 @@ class TLCCS_GUI(QObject):
         self.axes.set_xlabel("Wavelength (nm)")
         self.axes.set_ylabel("Intensity (calib. arb. un.)")
         self.axes.set_xlim(const.CCS175_MIN_WV, const.CCS175_MAX_WV)  # limits are given by spectral range of the device
+        self._preview_line = None
         layout = QVBoxLayout()
         layout.addWidget(self.sc._create_toolbar(self.previewWidget))
         layout.addWidget(self.sc)
@@ -341,15 +316,12 @@ class TLCCS_GUI(QObject):
         else:
             preview_data = intensities
 
-        xmin, xmax = self.axes.get_xlim()
-        ymin, ymax = self.axes.get_ylim()
-        self.axes.cla()
-        self.axes.set_xlabel("Wavelength (nm)")
-        self.axes.set_ylabel("Intensity (calib. arb. un.)")
-        self.axes.plot(self.correction[:, 0], preview_data, "b-")
-        self.axes.set_xlim(xmin, xmax)
-        self.axes.set_ylim(ymin, ymax)
-        self.sc.draw()
+        # the line is kept between scans, only its data is replaced, so the plot can be blitted
+        if self._preview_line is None:
+            self._preview_line = self.sc.add_live_artist(self.axes.plot(self.correction[:, 0], preview_data, "b-")[0])
+        else:
+            self._preview_line.set_data(self.correction[:, 0], preview_data)
+        self.sc.request_draw()
         self.lastspectrum = [intensities, self.settings]
         return [0, [self.correction[:, 0], intensities]]
 
@@ -420,11 +392,7 @@ class TLCCS_GUI(QObject):
             self.closeLock.emit(self.preview_running)
             self.settingsWidget.saveButton.setEnabled(False)
 
-            # Start continuous scan
-            self.logger.log_debug("Starting continuous scan for preview.")
-            self.drv.start_scan_continuous()
-
-            # Create and start preview thread
+            # Create and start preview thread, continuous scanning is started by its acquisition engine
             integration_ms = int(self.settings["integrationtime"] * 1000)
             interval_ms = int(max(self.default_timerInterval, integration_ms))
 
@@ -556,9 +524,11 @@ class TLCCS_GUI(QObject):
         external_cleanup_args=None,
         pause_duration: float = 0.0,
         last_integration_time: float | None = None,
+        cache_key=None,
     ) -> tuple[int, float | dict]:
         """
         Calculates the optimal integration time, allowing external actions and cleanup with arguments.
+        The next guess is predicted from the measured spectrum values (see IntegrationTimeSolver), so usually one or two scans are needed.
 
         Args:
             external_action (callable): External function to execute during auto time calculation.
@@ -567,13 +537,12 @@ class TLCCS_GUI(QObject):
             external_cleanup_args (tuple): Arguments for the external cleanup function.
             pause_duration (float): Duration to pause after each iteration.
             last_integration_time (float): Optional initial guess for integration time in seconds.
+            cache_key (hashable): Optional key (e.g. SMU set value) for caching the signal rate of the sample, it is used as initial guess on the next call.
 
         Returns:
             tuple[int, float | dict]: Status and integration time or error information.
         """
         self.logger.log_debug("Calculating auto integration time.")
-        low = self.autoTime_min  # time min s
-        high = self.autoTime_max  # time max s
         low_spectrum = self.autoValue_min  # min spectrum value
         high_spectrum = self.autoValue_max  # max spectrum value
 
@@ -588,7 +557,9 @@ class TLCCS_GUI(QObject):
                     guessIntTime = (self.autoTime_min + self.autoTime_max) / 2  # s
             # initial guess provided as argument, use that.
             else:
-                guessIntTime = last_integration_time  # ms
+                guessIntTime = last_integration_time  # s
+            # signal rate cached from earlier points overrides the guess
+            guessIntTime = self._autoTime_solver.start(guessIntTime, key=cache_key, sample=self.settings["samplename"])
 
             # start iterating through integration times using guessIntTime as initial guess
             for iter in range(self.intTimeMaxIterations):
@@ -666,26 +637,22 @@ class TLCCS_GUI(QObject):
                     time.sleep(pause_duration)
 
                 target = max(info)  # target value to optimize
+                result, nextIntTime = self._autoTime_solver.update(guessIntTime, target)
                 # if spectrum is in the range, found good integration time
-                if low_spectrum <= target <= high_spectrum:
+                if result == "done":
                     self.logger.log_debug(f"Optimal integration time found: {guessIntTime} seconds.")
                     return [0, guessIntTime]  # return in seconds
-                # if spectrum is below the range, increase integration time
+                if result == "too high":
+                    self.logger.log_debug(f"Integration time is too high, returning: {guessIntTime} seconds.")
+                    return [1, {"Error message": "Integration time too high"}]
+                if result == "too low":
+                    self.logger.log_debug(f"Integration time is too low, returning: {guessIntTime} seconds.")
+                    return [1, {"Error message": "Integration time too low"}]
                 if target < low_spectrum:
-                    self.log_verbose(f"Spectrum value {target} is below the range ({low_spectrum}), increasing integration time.")
-                    if guessIntTime >= high:
-                        self.logger.log_debug(f"Integration time is too high, returning: {guessIntTime} seconds.")
-                        return [1, {"Error message": "Integration time too high"}]
-                    low = guessIntTime
-                # if spectrum is above the range, decrease integration time
+                    self.log_verbose(f"Spectrum value {target} is below the range ({low_spectrum}), increasing integration time to {nextIntTime} s.")
                 else:
-                    self.log_verbose(f"Spectrum value {target} is above the range ({high_spectrum}), decreasing integration time.")
-                    if guessIntTime <= low:
-                        self.logger.log_debug(f"Integration time is too low, returning: {guessIntTime} seconds.")
-                        return [1, {"Error message": "Integration time too low"}]
-                    high = guessIntTime
-                # Compute new guess in seconds as float midpoint for proper binary search resolution
-                guessIntTime = (low + high) / 2.0
+                    self.log_verbose(f"Spectrum value {target} is above the range ({high_spectrum}), decreasing integration time to {nextIntTime} s.")
+                guessIntTime = nextIntTime
 
             self.logger.log_debug(f"Auto integration time calculation completed: {guessIntTime} seconds.")
             return [0, guessIntTime]  # return in seconds
@@ -723,6 +690,7 @@ class TLCCS_GUI(QObject):
         self.settingsWidget.saveButton.setEnabled(False)
         self.settingsWidget.lineEdit_path.setText(plugin_info["address"])
         self.settingsWidget.lineEdit_filename.setText(plugin_info["filename"])
+        self.settingsWidget.saveDataset_check.setChecked(ini_to_bool(plugin_info.get("savedataset", False)))
         self.settingsWidget.lineEdit_sampleName.setText(plugin_info["samplename"])
         self.settingsWidget.lineEdit_comment.setText(plugin_info["comment"])
         """
@@ -856,6 +824,7 @@ class TLCCS_GUI(QObject):
             self.notify_user("Filename is not valid. Please enter a valid filename")
             return (1, {"Error message": "TLCCS plugin : filename is not valid"})
 
+        self.settings["savedataset"] = self.settingsWidget.saveDataset_check.isChecked()
         self.settings["samplename"] = self.settingsWidget.lineEdit_sampleName.text()
         self.settings["comment"] = self.settingsWidget.lineEdit_comment.text()
         self.settings["externaltrigger"] = self.settingsWidget.extTriggerCheck.isChecked()  # this is here since this is written into the header
@@ -950,6 +919,7 @@ class TLCCS_GUI(QObject):
         integrationtimetype = auto
         useintegrationtimeguess = True
         saveattempts_check = True
+        savedataset = False
         """
 
         s = self.settings
@@ -968,6 +938,7 @@ class TLCCS_GUI(QObject):
         sw.getIntegrationTime_combo.setCurrentText(s["integrationtimetype"])
         sw.useIntegrationTimeGuess_check.setChecked(ini_to_bool(s["useintegrationtimeguess"]))
         sw.saveAttempts_check.setChecked(ini_to_bool(s["saveattempts_check"]))
+        sw.saveDataset_check.setChecked(ini_to_bool(s.get("savedataset", False)))
         sw.backend_Combo.setCurrentText(s["backend"])
 
         self._integrationTime_mode_changed()  # update GUI elements based on integration time mode
@@ -976,15 +947,17 @@ class TLCCS_GUI(QObject):
     ########Functions
     ########device functions
     @public
-    def spectrometerConnect(self, integrationTime=None):
+    def spectrometerConnect(self, integrationTime=None, parse_settings=True):
         if self._check_preview_running("spectrometerConnect"):
             return (1, {"Error message": "Cannot connect while preview is running"})
 
         # HOX: when using connect button, this function gets False as its argument. From the button?
-        # Parse settings to ensure integration time and related flags are current
-        parsed_status, info = self.parse_settings_widget()
-        if parsed_status:
-            return [parsed_status, info]
+        # Parse settings to ensure integration time and related flags are current. Not from other threads than the GUI
+        # thread, those parse the settings in the GUI thread first.
+        if parse_settings:
+            parsed_status, info = self.parse_settings_widget()
+            if parsed_status:
+                return [parsed_status, info]
 
         if integrationTime is not None and not isinstance(integrationTime, bool):
             self.settings["integrationtime"] = integrationTime
@@ -1003,6 +976,10 @@ class TLCCS_GUI(QObject):
         # ensure preview is stopped before closing device
         if self.preview_running:
             self._previewAction()
+        if self._scan_engine is not None:
+            self._scan_engine.stop()
+            self._scan_engine = None
+        self._closeDatasets()
         self.logger.log_debug("Disconnecting from spectrometer.")
         self.drv.close()
         # Notify GUI about successful disconnection
@@ -1106,6 +1083,68 @@ class TLCCS_GUI(QObject):
         self.data_recieved_signal.emit([self.correction[:, 0], data])
         return (0, data)
 
+    @public
+    def spectrometerRequestScan(self):
+        """Starts a single scan in the background and returns immediately.
+
+        The scan is collected with spectrometerWaitScan. Until then no other spectrometer function should be called,
+        the time can be used e.g. for SMU readings.
+        """
+        if self._check_preview_running("spectrometerRequestScan"):
+            return (1, {"Error message": "Cannot request scan while preview is running"})
+        if self._scan_engine is not None:
+            return (1, {"Error message": "A requested scan has not been collected yet"})
+
+        self.logger.log_debug("Requesting background scan.")
+        self._scan_engine = ScanEngine(self.drv, continuous=False)
+        self._scan_engine.start()
+        self._scan_engine.trigger()
+        return (0, {"Error message": "OK"})
+
+    @public
+    def spectrometerWaitIntegration(self, timeout=None):
+        """Waits until the requested scan has been integrated, the data transfer may still be in progress.
+
+        Args:
+            timeout (float, optional): maximum wait in s. Defaults to twice the integration time plus 2 s.
+        """
+        if self._scan_engine is None:
+            return (1, {"Error message": "No scan requested"})
+        if timeout is None:
+            timeout = 2 * self.settings["integrationtime"] + 2
+        if not self._scan_engine.wait_integrated(timeout):
+            if self._scan_engine.error is not None:
+                return (4, {"Error message": f"{self._scan_engine.error}"})
+            return (2, {"Error message": "Timeout waiting for integration to finish"})
+        return (0, {"Error message": "OK"})
+
+    @public
+    def spectrometerWaitScan(self, timeout=None):
+        """Returns the scan started with spectrometerRequestScan, waiting for it if necessary.
+
+        Args:
+            timeout (float, optional): maximum wait in s. Defaults to twice the integration time plus 2 s.
+        """
+        if self._scan_engine is None:
+            return (1, {"Error message": "No scan requested"})
+        if timeout is None:
+            timeout = 2 * self.settings["integrationtime"] + 2
+        engine = self._scan_engine
+        try:
+            scan = engine.next(timeout)
+        finally:
+            # the USB connection is released only after the engine has stopped
+            engine.stop()
+            self._scan_engine = None
+        if scan is None:
+            if engine.error is not None:
+                return (4, {"Error message": f"{engine.error}"})
+            return (2, {"Error message": "Timeout waiting for scan"})
+        data = scan[1]
+        # Emit data for preview update: [wavelengths, intensities]
+        self.data_recieved_signal.emit([self.correction[:, 0], data])
+        return (0, data)
+
     @public
     def spectrometerGetStatus(self):
         self.logger.log_debug("Getting spectrometer status.")
@@ -1116,6 +1155,8 @@ class TLCCS_GUI(QObject):
 
     @public
     def createFile(self, varDict, filedelimeter, address, data):
+        if self.settings.get("savedataset", False):
+            return self._appendToDataset(varDict, address, data)
         # check if the file already exists, if yes, return error
         if os.path.isfile(address):
             return (
@@ -1135,3 +1176,22 @@ class TLCCS_GUI(QObject):
             comments="#",
         )
         return (0, {})
+
+    def _appendToDataset(self, varDict, address, data):
+        """Appends the spectrum to the dataset in the directory of address, the filename is kept as the label of the spectrum."""
+        dataset_address = os.path.join(os.path.dirname(address), DEFAULT_DATASET_NAME)
+        try:
+            writer = self._datasets.get(dataset_address)
+            if writer is None or writer.closed:
+                writer = SpectralDatasetWriter(dataset_address, self.correction[:, 0])
+                self._datasets[dataset_address] = writer
+            self.logger.log_debug(f"Appending spectrum {os.path.basename(address)} to {dataset_address}")
+            writer.append(data, label=os.path.basename(address), **varDict)
+        except (OSError, ValueError) as e:
+            return (1, {"Error message": f"Failed to append spectrum to dataset: {e}"})
+        return (0, {})
+
+    def _closeDatasets(self):
+        for writer in self._datasets.values():
+            writer.close()
+        self._datasets = {}
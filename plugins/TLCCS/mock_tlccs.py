@@ -68,7 +68,7 @@ class MockCCSDRV:
         print("[Mock] Starting external trigger scan...")
         self.ext_scan_requested = True
 
-    def get_scan_data(self) -> np.ndarray:
+    def get_scan_data(self, out: np.ndarray | None = None) -> np.ndarray:
         if not (self.single_scan_requested or self.continuous_scan_requested or self.ext_scan_requested):
             raise RuntimeError("No scan in progress. Call start_scan() first.")
         data = (np.random.rand(3648)) / 2  # from 0 to 0.5
@@ -76,6 +76,9 @@ class MockCCSDRV:
         data = data + (self.integration_time)
         # reset single scan request after data retrieval, but not continuous or ext trigger requests:
         self.single_scan_requested = False
+        if out is not None:
+            out[:] = data
+            return out
         return np.array(data)
 
     def read_eeprom(self, addr, idx, length):
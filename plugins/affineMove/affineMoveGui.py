@@ -12,8 +12,10 @@ from plugin_components import (
     DependencyManager,
     LoggingHelper,
     get_public_methods,
+    ini_to_bool,
     public,
 )
+from pointOrdering import order_points
 from PyQt6 import uic
 from PyQt6.QtCore import QEvent, QEventLoop, QObject, Qt, pyqtSignal
 from PyQt6.QtWidgets import QComboBox, QGraphicsScene, QGraphicsView
@@ -27,6 +29,7 @@ HARDCODED_SPECTRO_NUM = 3  # FIXME: get this from somewhere.
 HARDCODED_SPECTRO_Z = 0
 HARDCODED_MANI_z = 21000  # default z
 HARDCODED_MANI_OFFSET = 2000
+QUEUED_MOVE_TIMEOUT = 600  # s, a move across the whole travel at the lowest Sutter speed takes about 9 minutes
 
 
 class ViewportClickCatcher(QObject):
@@ -112,6 +115,7 @@ class affineMoveGUI(QObject):
         self.micromanipulator_box: QComboBox = self.settingsWidget.micromanipulatorBox
         self.positioning_box: QComboBox = self.settingsWidget.positioningBox
         self.manipulator_combo_box: QComboBox = self.settingsWidget.manipulatorComboBox
+        self.optimize_order_checkbox = self.settingsWidget.optimizeOrderCheckBox
         self.show_bounding_boxes_checkbox = self.settingsWidget.showBoundingBoxesCheckBox
         self.camera_graphic_view: QGraphicsView = self.MDIWidget.cameraview
 
@@ -128,6 +132,7 @@ class affineMoveGUI(QObject):
         self.iter = 0
         self.measurement_points = []
         self.measurement_point_names = []
+        self.measurement_point_order = []  # index of every point in the list fetched from the positioning plugin
         self.settings = {}  # settings dictionary for sequence builder
 
         # Initialize collision detection system
@@ -307,7 +312,8 @@ class affineMoveGUI(QObject):
             # get 3 different points
             for i in range(3):
                 try:
-                    current_pos = mm["mm_current_position"]()
+                    # the manipulator is moved by hand during calibration, read the device
+                    current_pos = mm["mm_current_position"](verify=True)
                     if current_pos and len(current_pos) >= 3:
                         self.update_manipulator_position(idx, current_pos)
                 except Exception as e:
@@ -318,7 +324,7 @@ class affineMoveGUI(QObject):
                     self.logger.info_popup("Calibration cancelled by user.")
                     self.visualization.set_calibration_points([])
                     return
-                ret = mm["mm_current_position"]()
+                ret = mm["mm_current_position"](verify=True)
                 if len(ret) < 3:
                     self.logger.log_warn(f"Could not retrieve current position for manipulator {idx}: {ret}")
                     self.visualization.set_calibration_points([])
@@ -472,7 +478,7 @@ class affineMoveGUI(QObject):
                 # Switch to the manipulator and get its position
                 code, status = mm["mm_change_active_device"](manipulator_idx)
                 if code == 0:
-                    mm_pos = mm["mm_current_position"]()
+                    mm_pos = mm["mm_current_position"](verify=True)
                     if mm_pos and len(mm_pos) >= 2:
                         # Convert MM coordinates to camera coordinates
                         current_tip_pos = self.convert_mm_to_camera_coords((mm_pos[0], mm_pos[1]), manipulator_idx)
@@ -619,9 +625,64 @@ class affineMoveGUI(QObject):
             return
         self.measurement_points = points
         self.measurement_point_names = names
+        self.measurement_point_order = list(range(len(points)))
         self.logger.log_info(f"Fetched {len(points)} measurement points from positioning plugin.")
+        if self.optimize_order_checkbox.isChecked():
+            self._order_measurement_points()
         self.update_status()
 
+    def _order_measurement_points(self):
+        """Reorders the measurement points and their names for short manipulator travel.
+
+        Travel is computed in micromanipulator coordinates if all manipulators are calibrated, otherwise in mask coordinates.
+        """
+        mm, _, pos = self._fetch_dep_plugins()
+        if pos is None or len(self.measurement_points) < 3:
+            return
+        if len({len(point_set) for point_set in self.measurement_points}) != 1:
+            self.logger.log_warn("Measurement points have different numbers of manipulators, point order not optimized")
+            return
+
+        mm_points = self._measurement_points_in_mm_coords(pos)
+        in_mm = mm_points is not None
+
+        order, original, optimized = order_points(mm_points if in_mm else self.measurement_points)
+        self.measurement_points = [self.measurement_points[i] for i in order]
+        self.measurement_point_names = [self.measurement_point_names[i] for i in order]
+        self.measurement_point_order = [self.measurement_point_order[i] for i in order]
+
+        speed = self._travel_speed(mm) if in_mm else None
+        if speed:
+            self.logger.log_info(f"Point order optimized: estimated travel time {original / speed:.0f} s -> {optimized / speed:.0f} s ({original:.0f} -> {optimized:.0f} microns)")
+        else:
+            unit = "microns" if in_mm else "mask units"
+            self.logger.log_info(f"Point order optimized: estimated travel {original:.0f} -> {optimized:.0f} {unit}")
+
+    def _measurement_points_in_mm_coords(self, pos) -> list | None:
+        """Measurement points converted to micromanipulator coordinates, None if a conversion fails."""
+        mm_points = []
+        for point_set in self.measurement_points:
+            mm_point_set = []
+            for device_idx, mask_point in enumerate(point_set, 1):
+                status, camera_point = pos["positioning_coords"](mask_point)
+                mm_point = self.convert_to_mm_coords(camera_point, device_idx) if status == 0 else None
+                if mm_point is None:
+                    return None
+                mm_point_set.append(mm_point)
+            mm_points.append(mm_point_set)
+        return mm_points
+
+    def _travel_speed(self, mm) -> float | None:
+        """Move speed of the micromanipulator in microns per second from its settings, None if not known."""
+        if mm is None:
+            return None
+        try:
+            status, mm_settings = mm["parse_settings_widget"]()
+            # speed text is of the form "7: 650 microns/s"
+            return float(mm_settings["speed_text"].split(":")[1].split()[0]) if status == 0 else None
+        except (KeyError, IndexError, ValueError, AttributeError):
+            return None
+
     def _initialize_camera_preview_functionality(self):
         """
         Initializes the camera preview by starting the and updating the graphics view.
@@ -724,6 +785,7 @@ class affineMoveGUI(QObject):
 
         # Store settings internally (maintain .ini format)
         self.settings = copy.deepcopy(settings)
+        self.optimize_order_checkbox.setChecked(ini_to_bool(settings.get("optimize_order", False)))
 
         # Load bounding boxes from settings now that they're initialized
         self._load_bounding_boxes_from_file()
@@ -859,7 +921,7 @@ class affineMoveGUI(QObject):
                     code, status = mm["mm_change_active_device"](manipulator_idx)
                     if code == 0:  # Success
                         # Get current position from hardware
-                        position = mm["mm_current_position"]()
+                        position = mm["mm_current_position"](verify=True)
                         if position and len(position) >= 3:
                             self.update_manipulator_position(manipulator_idx, position)
 
@@ -1036,6 +1098,8 @@ class affineMoveGUI(QObject):
         # Store targets in settings and keep legacy keys for compatibility.
         dep_settings["measurement_points"] = self.measurement_points
         dep_settings["measurement_point_names"] = self.measurement_point_names
+        dep_settings["measurement_point_order"] = self.measurement_point_order
+        dep_settings["optimize_order"] = self.optimize_order_checkbox.isChecked()
         dep_settings["mm_settings"] = dep_settings.get("micromanipulator_settings", {})
         dep_settings["cam_settings"] = dep_settings.get("camera_settings", {})
         dep_settings["pos_settings"] = dep_settings.get("positioning_settings", {})
@@ -1054,6 +1118,7 @@ class affineMoveGUI(QObject):
         self.settings = settings
         self.measurement_points = settings["measurement_points"]
         self.measurement_point_names = settings["measurement_point_names"]
+        self.measurement_point_order = settings.get("measurement_point_order", list(range(len(self.measurement_points))))
         # update to deps
         mm, cam, pos = self._fetch_dep_plugins()
         mm["setSettings"](settings["mm_settings"])
@@ -1216,6 +1281,9 @@ class affineMoveGUI(QObject):
         self.current_sequence = move_sequence.copy()
         self.sequence_iter = 0
 
+        if "mm_queue_move" in mm:
+            return self._execute_queued_move_list(mm, move_sequence)
+
         successful_moves = 0
         total_moves = len(move_sequence)
 
@@ -1254,6 +1322,63 @@ class affineMoveGUI(QObject):
         else:
             return 1, f"Only {successful_moves}/{total_moves} moves completed successfully"
 
+    def _execute_queued_move_list(self, mm, move_sequence: list[tuple[int, tuple[float, float]]]) -> tuple[int, str]:
+        """Queue all moves of a sequence at once and follow them as they finish.
+
+        The micromanipulator runs the queued moves back to back in the order of the sequence, while the finished moves
+        update the cached positions, bounding boxes and visualization here.
+
+        Args:
+            mm: micromanipulator plugin functions
+            move_sequence (list[tuple[int, tuple[float, float]]]): sequence of moves as in execute_move_list
+
+        Returns:
+            tuple[int, str]: status and message as in execute_move_list
+        """
+        queued = []
+        for move_idx, (manip_idx, (target_cam_x, target_cam_y)) in enumerate(move_sequence):
+            target_mm_coords = self.convert_to_mm_coords((target_cam_x, target_cam_y), manip_idx)
+            if target_mm_coords is None:
+                self.logger.log_warn(f"Failed to convert coordinates for manipulator {manip_idx}, skipping")
+                continue
+            status, move = mm["mm_queue_move"](x=target_mm_coords[0], y=target_mm_coords[1], manipulator_number=manip_idx)
+            if status != 0:
+                error_msg = move.get("Error message", str(move))
+                mm["mm_stop"]()
+                self.logger.log_warn(f"Failed to queue move of manipulator {manip_idx}: {error_msg}")
+                return 1, f"Movement failed for manipulator {manip_idx}: {error_msg}"
+            queued.append((move_idx, manip_idx, (target_cam_x, target_cam_y), move))
+
+        successful_moves = 0
+        total_moves = len(move_sequence)
+        for move_idx, manip_idx, (target_cam_x, target_cam_y), move in queued:
+            self._update_planned_moves_visualization(move_idx)
+            if not move.wait(QUEUED_MOVE_TIMEOUT):
+                mm["mm_stop"]()
+                self.logger.log_warn(f"Move of manipulator {manip_idx} did not finish in {QUEUED_MOVE_TIMEOUT} s")
+                return 1, f"Movement timed out for manipulator {manip_idx}"
+            status, state = move.result()
+            if status != 0:
+                error_msg = state.get("Error message", str(state))
+                self.logger.log_warn(f"Failed to move manipulator {manip_idx}: {error_msg}")
+                return 1, f"Movement failed for manipulator {manip_idx}: {error_msg}"
+
+            successful_moves += 1
+            self.sequence_iter += 1
+            if move.position is not None:
+                self.update_manipulator_position(manip_idx, move.position)
+            if manip_idx in self.collision_detector.bounding_boxes:
+                self.collision_detector.bounding_boxes[manip_idx].move_bbox(target_cam_x, target_cam_y)
+            self.logger.log_debug(f"Successfully moved manipulator {manip_idx} to {move.position}")
+
+        # Signal that sequence is completed
+        self.sequence_completed_signal.emit()
+
+        if successful_moves == total_moves:
+            return 0, f"Successfully completed {successful_moves}/{total_moves} moves"
+        else:
+            return 1, f"Only {successful_moves}/{total_moves} moves completed successfully"
+
     def _update_planned_moves_visualization(self, current_move_idx: int):
         """
         Update the visualization to show only the next planned move.
@@ -1,6 +1,8 @@
-import itertools
+import heapq
 import logging
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 
@@ -59,11 +61,16 @@ class AABB:
 class CollisionDetector:
     """collision detector for single manipulator movements using bounding boxes.
     Basic workflow:
-    - Try to find a valid movement sequence for manipulators using just diagonal moves directly to their target positions.
-    - If that fails, break moves into X and Y components and try all permutations of these
-    - If that still fails, try to inject avoidance moves to get manipulators out of each other's way.
+    - Every manipulator may reach its target directly, through an X-then-Y or Y-then-X corner, or after stepping
+      aside to let others pass.
+    - An A* search over the positions of all manipulators finds the sequence of single manipulator moves with the
+      least total travel that is collision-free.
     """
 
+    AVOIDANCE_DISTANCE = 200  # how far a manipulator steps aside to let others pass
+    STOP_COST = 50  # travel distance counted for every single manipulator move, prefers sequences with fewer stops
+    MAX_EXPANSIONS = 5000  # planner states searched before giving up
+
     def __init__(self):
         self.bounding_boxes: dict[int, AABB] = {}
 
@@ -110,7 +117,7 @@ class CollisionDetector:
 
         Args:
             moves: Dict mapping manipulator_idx to ((current_x, current_y), (target_x, target_y))
-            trajectory_steps: Number of steps to check along the trajectory
+            trajectory_steps: Unused, the swept bounding box is checked exactly. Kept for compatibility.
 
         Returns:
             bool: True if collision detected, False if safe to move
@@ -118,37 +125,66 @@ class CollisionDetector:
         if len(moves) != 1:
             raise ValueError("Only single manipulator movements are supported")
 
-        moving_idx, ((current_x, current_y), (target_x, target_y)) = next(iter(moves.items()))
-
-        # Check if we have a bounding box for the moving manipulator
-        if moving_idx not in self.bounding_boxes:
-            return False  # No bounding box means no collision possible
-
-        moving_bbox = self.bounding_boxes[moving_idx]
-
-        # Generate trajectory for the moving manipulator
-        trajectory = self._generate_linear_trajectory((current_x, current_y), (target_x, target_y), trajectory_steps)
+        # No bounding box for the moving manipulator means no collision possible
+        return self.first_collision(moves) is not None
 
-        # Check collision with all other manipulators at each step
-        for step_pos in trajectory:
-            # Move the moving manipulator's bounding box to this trajectory step
-            orig_x, orig_y = moving_bbox.tip_x, moving_bbox.tip_y
-            moving_bbox.move_bbox(step_pos[0], step_pos[1])
-
-            # Check collision with all other manipulators at their current positions
-            for other_idx, other_bbox in self.bounding_boxes.items():
-                if other_idx == moving_idx:
-                    continue
+    def first_collision(self, moves: dict[int, tuple[tuple[float, float], tuple[float, float]]]) -> tuple[float, tuple[int, int]] | None:
+        """
+        Find the first contact of a moving bounding box with any other box.
 
-                if moving_bbox.colliding_with(other_bbox):
-                    # Restore original position and return collision detected
-                    moving_bbox.move_bbox(orig_x, orig_y)
-                    return True
+        The manipulators in moves travel simultaneously along straight lines from their current to their target
+        positions during the move time 0...1, the others stay at their tip positions. For every pair with at least one
+        moving box, the time interval of overlap is solved per axis from the relative motion of the boxes, which is the
+        box swept along the segment tested against the other box (their Minkowski sum), so overlaps shorter than any
+        sampling step are not missed. All pairs are checked at once. Touching is not a collision, overlap at the start
+        of the move is a collision at time 0.
 
-            # Restore original position for next iteration
-            moving_bbox.move_bbox(orig_x, orig_y)
+        Args:
+            moves: Dict mapping manipulator_idx to ((current_x, current_y), (target_x, target_y))
 
-        return False  # No collision detected
+        Returns:
+            tuple[float, tuple[int, int]] | None: time of first contact and the indices of the colliding manipulators,
+            None if no collision
+        """
+        indices = list(self.bounding_boxes)
+        if len(indices) < 2 or not any(idx in moves for idx in indices):
+            return None
+
+        rows = []
+        for idx in indices:
+            bbox = self.bounding_boxes[idx]
+            corners_x = [corner[0] for corner in bbox.get_corners()]
+            corners_y = [corner[1] for corner in bbox.get_corners()]
+            if idx in moves:
+                (current_x, current_y), (target_x, target_y) = moves[idx]
+                rows.append((current_x, current_y, target_x - current_x, target_y - current_y, min(corners_x), min(corners_y), max(corners_x), max(corners_y), 1.0))
+            else:
+                rows.append((bbox.tip_x, bbox.tip_y, 0.0, 0.0, min(corners_x), min(corners_y), max(corners_x), max(corners_y), 0.0))
+        rows = np.array(rows, dtype=float)
+        start, displacement, relative_min, relative_max = rows[:, 0:2], rows[:, 2:4], rows[:, 4:6], rows[:, 6:8]
+        moving = rows[:, 8] > 0
+
+        first, second = np.triu_indices(len(indices), 1)
+        involved = moving[first] | moving[second]
+        first, second = first[involved], second[involved]
+
+        # the boxes overlap on an axis while the relative displacement d*t of the first box is in (low, high)
+        low = (start[second] + relative_min[second]) - (start[first] + relative_max[first])
+        high = (start[second] + relative_max[second]) - (start[first] + relative_min[first])
+        d = displacement[first] - displacement[second]
+        static_overlap = (low < 0) & (high > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            enter = np.where(d > 0, low / d, np.where(d < 0, high / d, np.where(static_overlap, -np.inf, np.inf)))
+            leave = np.where(d > 0, high / d, np.where(d < 0, low / d, np.where(static_overlap, np.inf, -np.inf)))
+
+        # overlap needs all axes at once, limited to the move
+        enter = np.maximum(enter.max(axis=1), 0.0)
+        leave = np.minimum(leave.min(axis=1), 1.0)
+        colliding = np.flatnonzero(enter < leave)
+        if len(colliding) == 0:
+            return None
+        k = colliding[np.argmin(enter[colliding])]
+        return float(enter[k]), (indices[first[k]], indices[second[k]])
 
     def generate_safe_movement_sequence(self, moves: dict[int, tuple[tuple[float, float], tuple[float, float]]]) -> list[tuple[int, tuple[float, float]]]:
         """
@@ -170,24 +206,123 @@ class CollisionDetector:
             if manip_idx in self.bounding_boxes:
                 self.bounding_boxes[manip_idx].move_bbox(current_x, current_y)
 
-        # First try full moves in all permutations
-        manipulator_indices = list(moves.keys())
+        sequence = self._plan_movement_sequence(moves)
+        if sequence is None:
+            logger.warning(f"No safe movement sequence found for moves {moves}")
+            return []
+        if not sequence:
+            # every manipulator is at its target already, the moves to the targets are trivially safe
+            return [(idx, target) for idx, (_, target) in moves.items()]
+        return sequence
 
-        for permutation in itertools.permutations(manipulator_indices):
-            if self._test_movement_sequence(moves, list(permutation)):
-                # Return full moves as sequence
-                return [(idx, moves[idx][1]) for idx in permutation]
+    def _waypoint_graph(self, start: tuple[float, float], target: tuple[float, float]) -> tuple[list[tuple[float, float]], list[list[int]], int]:
+        """
+        Positions a manipulator may stop at on its way to the target, and the moves allowed between them.
 
-        # If no safe sequence found with full moves, try breaking moves into X and Y components
-        logger.info("No safe sequence found with full moves, trying segmented moves...")
-        segmented_result = self._generate_segmented_movement_sequence(moves)
+        Returns:
+            tuple: positions (node 0 is the start), successor nodes of every node, target node
+        """
+        positions = [start]
+        successors = [[]]
+        if abs(target[0] - start[0]) > 0.01 or abs(target[1] - start[1]) > 0.01:
+            positions.append(target)
+            successors.append([])
+            successors[0].append(1)
+            goal = 1
+            # X then Y and Y then X corners
+            if abs(target[0] - start[0]) > 0.01 and abs(target[1] - start[1]) > 0.01:
+                for corner in ((target[0], start[1]), (start[0], target[1])):
+                    successors[0].append(len(positions))
+                    positions.append(corner)
+                    successors.append([goal])
+        else:
+            goal = 0
+
+        # step aside and continue to the target from there, also for manipulators that do not have to move
+        for dx, dy in ((self.AVOIDANCE_DISTANCE, 0), (-self.AVOIDANCE_DISTANCE, 0), (0, self.AVOIDANCE_DISTANCE), (0, -self.AVOIDANCE_DISTANCE)):
+            successors[0].append(len(positions))
+            positions.append((start[0] + dx, start[1] + dy))
+            successors.append([goal])
+        return positions, successors, goal
+
+    def _plan_movement_sequence(self, moves: dict[int, tuple[tuple[float, float], tuple[float, float]]]) -> list[tuple[int, tuple[float, float]]] | None:
+        """
+        A* search for the collision-free sequence of single manipulator moves with the least total travel.
 
-        if segmented_result:
-            return segmented_result
+        A search state holds the waypoint every manipulator is at. Different orders of the same moves lead to the
+        same state, so every partial ordering is expanded once instead of once per permutation. Moves are checked for
+        collision when their state is taken from the queue, so only the moves on the way to the solution are checked.
+        The cost of a move is its length plus STOP_COST, the heuristic is the straight distance of every manipulator to
+        its target plus STOP_COST for every manipulator not there yet.
 
-        # If segmented moves also fail, try with avoidance moves
-        logger.info("Segmented moves failed, trying with avoidance moves...")
-        return self._generate_avoidance_movement_sequence(moves)
+        Args:
+            moves: Dict mapping manipulator_idx to ((current_x, current_y), (target_x, target_y))
+
+        Returns:
+            List of tuples (manipulator_idx, target_position), empty if nothing has to move, None if no safe sequence
+            was found.
+        """
+        # manipulators without a bounding box can not collide
+        sequence = [(idx, target) for idx, (current, target) in moves.items() if idx not in self.bounding_boxes and current != target]
+        planned = [idx for idx in moves if idx in self.bounding_boxes]
+        graphs = [self._waypoint_graph(*moves[idx]) for idx in planned]
+        goal_state = tuple(goal for _, _, goal in graphs)
+
+        def distance(a, b):
+            return ((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2) ** 0.5
+
+        def heuristic(state):
+            return sum(distance(positions[node], positions[goal]) + (self.STOP_COST if node != goal else 0) for node, (positions, _, goal) in zip(state, graphs))
+
+        original_positions = {idx: (bbox.tip_x, bbox.tip_y) for idx, bbox in self.bounding_boxes.items()}
+        start_state = (0,) * len(planned)
+        # queue entries: estimated total cost, negative cost so far (deeper first on ties), tie breaker, state, previous state, moved manipulator
+        queue = [(heuristic(start_state), 0.0, 0, start_state, None, None)]
+        reached_by = {}
+        pushed = 1
+        expansions = 0
+        try:
+            while queue and expansions < self.MAX_EXPANSIONS:
+                _, negative_cost, _, state, previous, moved = heapq.heappop(queue)
+                if state in reached_by:
+                    continue
+                if previous is not None:
+                    # check the move from the previous state with the others at their waypoints of that state
+                    for k, idx in enumerate(planned):
+                        self.bounding_boxes[idx].move_bbox(*graphs[k][0][previous[k]])
+                    leg = (graphs[moved][0][previous[moved]], graphs[moved][0][state[moved]])
+                    if self.first_collision({planned[moved]: leg}) is not None:
+                        continue
+                reached_by[state] = (previous, moved)
+                if state == goal_state:
+                    break
+                expansions += 1
+
+                cost = -negative_cost
+                for k, (positions, successors, _) in enumerate(graphs):
+                    for node in successors[state[k]]:
+                        following = state[:k] + (node,) + state[k + 1 :]
+                        if following in reached_by:
+                            continue
+                        following_cost = cost + distance(positions[state[k]], positions[node]) + self.STOP_COST
+                        heapq.heappush(queue, (following_cost + heuristic(following), -following_cost, pushed, following, state, k))
+                        pushed += 1
+        finally:
+            for idx, (orig_x, orig_y) in original_positions.items():
+                self.bounding_boxes[idx].move_bbox(orig_x, orig_y)
+
+        if goal_state not in reached_by:
+            logger.info(f"Planner found no safe sequence after expanding {expansions} states")
+            return None
+
+        legs = []
+        state = goal_state
+        while reached_by[state][0] is not None:
+            previous, moved = reached_by[state]
+            legs.append((planned[moved], graphs[moved][0][state[moved]]))
+            state = previous
+        logger.info(f"Planner found a sequence of {len(legs)} moves after expanding {expansions} states")
+        return sequence + legs[::-1]
 
     def _test_movement_sequence(self, moves: dict[int, tuple[tuple[float, float], tuple[float, float]]], sequence: list[int]) -> bool:
         """Test if a movement sequence is collision-free"""
@@ -242,91 +377,6 @@ class CollisionDetector:
 
         return trajectory
 
-    def _generate_segmented_movement_sequence(self, moves: dict[int, tuple[tuple[float, float], tuple[float, float]]]) -> list[tuple[int, tuple[float, float]]]:
-        """
-        Generate a safe movement sequence by breaking moves into X and Y components.
-
-        Args:
-            moves: Dict mapping manipulator_idx to ((current_x, current_y), (target_x, target_y))
-
-        Returns:
-            List of tuples (manipulator_idx, target_position) representing the sequence of moves.
-            Empty list if no safe sequence exists even with segmentation.
-        """
-        # Create segmented moves (X and Y components)
-        segmented_moves = self._create_segmented_moves(moves)
-        logger.info(f"Created {len(segmented_moves)} segmented moves:")
-        for key, move in segmented_moves.items():
-            logger.info(f"  {key}: {move}")
-
-        if not segmented_moves:
-            logger.info("No segmented moves created (no movement detected)")
-            return []
-
-        # Also try alternative segmentation (Y then X instead of X then Y)
-        alt_segmented_moves = self._create_alternative_segmented_moves(moves)
-        logger.info(f"Created {len(alt_segmented_moves)} alternative segmented moves")
-
-        # Try standard segmentation first
-        if segmented_moves:
-            result = self._try_segmentation_permutations(segmented_moves, "standard")
-            if result:
-                return result
-
-        # Try alternative segmentation
-        if alt_segmented_moves:
-            result = self._try_segmentation_permutations(alt_segmented_moves, "alternative")
-            if result:
-                return result
-
-        # Try combined segmentation (mix both approaches)
-        combined_moves = {**segmented_moves, **alt_segmented_moves}
-        if combined_moves:
-            result = self._try_segmentation_permutations(combined_moves, "combined")
-            if result:
-                return result
-
-        logger.info("No safe segmented sequence found")
-        return []  # No safe sequence found even with segmentation
-
-    def _try_segmentation_permutations(self, segmented_moves: dict, approach_name: str) -> list[tuple[int, tuple[float, float]]]:
-        """Try all permutations of a given segmentation approach"""
-        if not segmented_moves:
-            return []
-
-        move_keys = list(segmented_moves.keys())
-        total_permutations = 1
-        for i in range(1, len(move_keys) + 1):
-            total_permutations *= i
-
-        logger.info(f"Testing {total_permutations} permutations of {approach_name} segmented moves...")
-
-        permutation_count = 0
-        for permutation in itertools.permutations(move_keys):
-            permutation_count += 1
-            if permutation_count % 100 == 0:
-                logger.info(f"  Tested {permutation_count} {approach_name} permutations...")
-
-            if self._test_segmented_movement_sequence(segmented_moves, list(permutation)):
-                logger.info(f"Found successful {approach_name} segmented permutation after {permutation_count} attempts:")
-                logger.info(f"  Sequence: {permutation}")
-
-                # Convert segmented moves to (manipulator_idx, target_position) format
-                sequence = []
-                for move_key in permutation:
-                    manip_idx, move_type = move_key
-                    (_, _), (target_x, target_y) = segmented_moves[move_key]
-                    sequence.append((manip_idx, (target_x, target_y)))
-                return sequence
-
-            # Limit testing to prevent infinite loops
-            if permutation_count > 2000:  # Reduced limit for each approach
-                logger.info(f"Stopped {approach_name} testing after {permutation_count} permutations")
-                break
-
-        logger.info(f"No safe {approach_name} sequence found after testing {permutation_count} permutations")
-        return []
-
     def _create_segmented_moves(self, moves: dict[int, tuple[tuple[float, float], tuple[float, float]]]) -> dict[tuple[int, str], tuple[tuple[float, float], tuple[float, float]]]:
         """
         Break down moves into X and Y components.
@@ -360,212 +410,6 @@ class CollisionDetector:
 
         return segmented_moves
 
-    def _create_alternative_segmented_moves(self, moves: dict[int, tuple[tuple[float, float], tuple[float, float]]]) -> dict[tuple[int, str], tuple[tuple[float, float], tuple[float, float]]]:
-        """
-        Break down moves into Y and X components (alternative to X then Y).
-        This creates different move ordering that can help in certain collision scenarios.
-
-        Args:
-            moves: Original moves dict
-
-        Returns:
-            Dict mapping (manipulator_idx, move_type) to move coordinates with 'alt_' prefix
-        """
-        segmented_moves = {}
-
-        for manip_idx, ((current_x, current_y), (target_x, target_y)) in moves.items():
-            logger.info(f"Alt processing manipulator {manip_idx}: ({current_x}, {current_y}) -> ({target_x}, {target_y})")
-
-            # Only create segments if there's actual movement in that dimension
-            if abs(target_y - current_y) > 0.01:  # Y movement first
-                y_move = ((current_x, current_y), (current_x, target_y))
-                segmented_moves[(manip_idx, "alt_y")] = y_move
-                logger.info(f"  Alt Y segment: {y_move}")
-
-            if abs(target_x - current_x) > 0.01:  # X movement second
-                # For X movement, start from the Y-moved position if Y movement exists
-                start_y = target_y if (manip_idx, "alt_y") in segmented_moves else current_y
-                x_move = ((current_x, start_y), (target_x, target_y))
-                segmented_moves[(manip_idx, "alt_x")] = x_move
-                logger.info(f"  Alt X segment: {x_move}")
-
-            if abs(target_x - current_x) <= 0.01 and abs(target_y - current_y) <= 0.01:
-                logger.info(f"  No movement detected for manipulator {manip_idx}")
-
-        return segmented_moves
-
-    def _test_segmented_movement_sequence(self, segmented_moves: dict[tuple[int, str], tuple[tuple[float, float], tuple[float, float]]], sequence: list[tuple[int, str]]) -> bool:
-        """
-        Test if a segmented movement sequence is collision-free.
-
-        Args:
-            segmented_moves: Dict mapping (manipulator_idx, move_type) to move coordinates
-            sequence: List of (manipulator_idx, move_type) tuples in execution order
-
-        Returns:
-            bool: True if sequence is safe, False if collision detected
-        """
-        # Store original positions
-        original_positions = {}
-        for manip_idx in self.bounding_boxes:
-            bbox = self.bounding_boxes[manip_idx]
-            original_positions[manip_idx] = (bbox.tip_x, bbox.tip_y)
-
-        try:
-            # Test each segmented move in sequence
-            for move_key in sequence:
-                if move_key not in segmented_moves:
-                    continue
-
-                manip_idx, move_type = move_key
-
-                # Get current position of this manipulator (may have been updated by previous moves)
-                current_bbox = self.bounding_boxes[manip_idx]
-                current_pos = (current_bbox.tip_x, current_bbox.tip_y)
-
-                # Get the target position from the segmented move
-                (_, _), (target_x, target_y) = segmented_moves[move_key]
-
-                # Test if this move from current position to target causes collision
-                single_move = {manip_idx: (current_pos, (target_x, target_y))}
-                if self.check_move_collision(single_move):
-                    return False
-
-                # Update position for next iteration
-                if manip_idx in self.bounding_boxes:
-                    self.bounding_boxes[manip_idx].move_bbox(target_x, target_y)
-
-            return True
-
-        finally:
-            # Restore original positions
-            for manip_idx, (orig_x, orig_y) in original_positions.items():
-                if manip_idx in self.bounding_boxes:
-                    self.bounding_boxes[manip_idx].move_bbox(orig_x, orig_y)
-
-    def _generate_avoidance_movement_sequence(self, moves: dict[int, tuple[tuple[float, float], tuple[float, float]]]) -> list[tuple[int, tuple[float, float]]]:
-        """
-        Generate a movement sequence with avoidance moves to handle complex collision scenarios.
-        This method tries to inject intermediate moves that get manipulators out of each other's way.
-
-        Args:
-            moves: Original moves dict
-
-        Returns:
-            List of moves that include avoidance maneuvers, or empty list if no solution found
-        """
-        logger.info("Attempting avoidance-based movement sequence...")
-
-        # For each manipulator that's blocking others, try moving it out of the way
-        for blocking_manip in moves:
-            for blocked_manip in moves:
-                if blocking_manip == blocked_manip:
-                    continue
-
-                # Check if blocking_manip is in the path of blocked_manip
-                if self._is_manipulator_blocking_path(blocking_manip, blocked_manip, moves):
-                    logger.info(f"Manipulator {blocking_manip} is blocking path of manipulator {blocked_manip}")
-
-                    # Try to find an avoidance sequence
-                    avoidance_sequence = self._create_avoidance_sequence(blocking_manip, blocked_manip, moves)
-                    if avoidance_sequence:
-                        logger.info(f"Found avoidance sequence: {len(avoidance_sequence)} moves")
-                        return avoidance_sequence
-
-        logger.info("No avoidance sequence found")
-        return []
-
-    def _is_manipulator_blocking_path(self, blocking_manip: int, blocked_manip: int, moves: dict[int, tuple[tuple[float, float], tuple[float, float]]]) -> bool:
-        """
-        Check if one manipulator is blocking the path of another.
-
-        Args:
-            blocking_manip: Index of potentially blocking manipulator
-            blocked_manip: Index of potentially blocked manipulator
-            moves: Move dictionary
-
-        Returns:
-            bool: True if blocking_manip is in the path of blocked_manip
-        """
-        if blocking_manip not in self.bounding_boxes or blocked_manip not in moves:
-            return False
-
-        # Test if the blocked manipulator can move with the blocking manipulator in its current position
-        blocked_move = {blocked_manip: moves[blocked_manip]}
-        return self.check_move_collision(blocked_move)
-
-    def _create_avoidance_sequence(self, blocking_manip: int, blocked_manip: int, moves: dict[int, tuple[tuple[float, float], tuple[float, float]]]) -> list[tuple[int, tuple[float, float]]]:
-        """
-        Create a movement sequence where the blocking manipulator moves out of the way first.
-
-        Args:
-            blocking_manip: Index of blocking manipulator
-            blocked_manip: Index of blocked manipulator
-            moves: Original moves dict
-
-        Returns:
-            List of moves including avoidance maneuvers
-        """
-        if blocking_manip not in self.bounding_boxes:
-            return []
-
-        # Get current positions
-        (blocking_current, blocking_target) = moves[blocking_manip]
-        (blocked_current, blocked_target) = moves[blocked_manip]
-
-        # Calculate avoidance moves - try moving blocking manipulator away from blocked path
-        avoidance_moves = self._calculate_avoidance_moves(blocking_manip, blocked_manip, moves)
-
-        for avoidance_pos in avoidance_moves:
-            try:
-                # Test sequence: blocking moves to avoidance position, blocked moves to target, blocking moves to final target
-                test_sequence = [
-                    (blocking_manip, avoidance_pos),  # Move blocking manip out of way
-                    (blocked_manip, blocked_target),  # Move blocked manip to target
-                    (blocking_manip, blocking_target),  # Move blocking manip to final target
-                ]
-
-                if self._test_complete_sequence(test_sequence, moves):
-                    logger.info(f"Found working avoidance sequence via position {avoidance_pos}")
-                    return test_sequence
-
-            except Exception as e:
-                logger.info(f"Error testing avoidance sequence: {e}")
-                continue
-
-        return []
-
-    def _calculate_avoidance_moves(self, blocking_manip: int, blocked_manip: int, moves: dict[int, tuple[tuple[float, float], tuple[float, float]]]) -> list[tuple[float, float]]:
-        """
-        Calculate potential avoidance positions for the blocking manipulator.
-
-        Returns:
-            List of potential avoidance positions
-        """
-        (blocking_current, blocking_target) = moves[blocking_manip]
-        (blocked_current, blocked_target) = moves[blocked_manip]
-
-        avoidance_positions = []
-
-        # Try moving perpendicular to the blocked manipulator's path
-        blocked_dx = blocked_target[0] - blocked_current[0]
-        blocked_dy = blocked_target[1] - blocked_current[1]
-
-        # Perpendicular directions
-        if abs(blocked_dx) > 0.01:  # Horizontal movement
-            # Try moving blocking manipulator up or down
-            for offset in [200, -200]:  # Try different offsets
-                avoidance_pos = (blocking_current[0], blocking_current[1] + offset)
-                avoidance_positions.append(avoidance_pos)
-
-        if abs(blocked_dy) > 0.01:  # Vertical movement
-            # Try moving blocking manipulator left or right
-            for offset in [200, -200]:
-                avoidance_pos = (blocking_current[0] + offset, blocking_current[1])
-                avoidance_positions.append(avoidance_pos)
-        # returns a list of moves that get the blocking manipulator out of the way
-        return avoidance_positions
-
     def _test_complete_sequence(self, sequence: list[tuple[int, tuple[float, float]]], original_moves: dict[int, tuple[tuple[float, float], tuple[float, float]]]) -> bool:
         """
         Test if a complete movement sequence (including avoidance moves) is collision-free.
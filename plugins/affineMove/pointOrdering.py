@@ -0,0 +1,92 @@
+"""
+Ordering of measurement points for short manipulator travel.
+
+A measurement point is a set of target positions, one per manipulator. Manipulators are moved one after another, so
+the cost of going from one point to another is the sum of the distances every manipulator travels. The points are
+ordered as an open path starting from the first point, with a nearest neighbour tour improved by 2-opt.
+
+This file includes:
+- travel_cost_matrix: function for the cost between all pairs of points
+- path_cost: function for the cost of visiting points in an order
+- order_points: function for the ordering
+"""
+
+import numpy as np
+
+
+def travel_cost_matrix(points) -> np.ndarray:
+    """Cost of moving all manipulators from one point to another, for all pairs of points.
+
+    Args:
+        points (array_like): positions, shape (points, manipulators, 2)
+
+    Returns:
+        np.ndarray: symmetric cost matrix, shape (points, points)
+    """
+    points = np.asarray(points, dtype=float)
+    cost = np.zeros((len(points), len(points)))
+    for manipulator in range(points.shape[1]):
+        positions = points[:, manipulator, :]
+        cost += np.hypot(positions[:, None, 0] - positions[None, :, 0], positions[:, None, 1] - positions[None, :, 1])
+    return cost
+
+
+def path_cost(cost: np.ndarray, order) -> float:
+    """Cost of visiting the points in order."""
+    order = np.asarray(order)
+    return float(cost[order[:-1], order[1:]].sum())
+
+
+def _nearest_neighbour(cost: np.ndarray, start: int) -> list[int]:
+    unvisited = np.ones(len(cost), dtype=bool)
+    unvisited[start] = False
+    order = [start]
+    for _ in range(len(cost) - 1):
+        distances = np.where(unvisited, cost[order[-1]], np.inf)
+        following = int(np.argmin(distances))
+        unvisited[following] = False
+        order.append(following)
+    return order
+
+
+def _two_opt(cost: np.ndarray, order: list[int], max_passes: int) -> list[int]:
+    """Reverses path segments as long as that shortens the path. The first point stays first."""
+    order = np.array(order)
+    n = len(order)
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, n - 1):
+            # reversing order[i..j] replaces the edges (i-1, i) and (j, j+1) with (i-1, j) and (i, j+1)
+            j = np.arange(i + 1, n)
+            before = cost[order[i - 1], order[i]] + np.append(cost[order[j[:-1]], order[j[:-1] + 1]], 0.0)
+            after = cost[order[i - 1], order[j]] + np.append(cost[order[i], order[j[:-1] + 1]], 0.0)
+            gain = before - after
+            best = int(np.argmax(gain))
+            if gain[best] > 1e-9:
+                order[i : j[best] + 1] = order[i : j[best] + 1][::-1]
+                improved = True
+        if not improved:
+            break
+    return order.tolist()
+
+
+def order_points(points, max_passes: int = 50) -> tuple[list[int], float, float]:
+    """Orders measurement points for short travel. The first point stays first.
+
+    Args:
+        points (array_like): positions, shape (points, manipulators, 2)
+        max_passes (int, optional): maximum number of 2-opt passes over the path. Defaults to 50.
+
+    Returns:
+        tuple[list[int], float, float]: indices of the points in visiting order, travel cost of the original and of the new order
+    """
+    cost = travel_cost_matrix(points)
+    original = path_cost(cost, range(len(cost))) if len(cost) > 1 else 0.0
+    if len(cost) < 3:
+        return list(range(len(cost))), original, original
+    order = _two_opt(cost, _nearest_neighbour(cost, 0), max_passes)
+    optimized = path_cost(cost, order)
+    if optimized >= original:
+        # nothing gained, keep the order the points were defined in
+        return list(range(len(cost))), original, original
+    return order, original, optimized
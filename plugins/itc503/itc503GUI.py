@@ -44,12 +44,14 @@ class itc503GUI(QObject):
         "setSettings",
         "getIterations",
         "loopingIteration",
+        "temperatureConnect",
     ]  # add function names here, necessary for descendents of QObject, otherwise _get_public_methods returns a lot of QObject methods
     ########Signals
 
     log_message = pyqtSignal(str)
     info_message = pyqtSignal(str)
     closeLock = pyqtSignal(bool)
+    connection_signal = pyqtSignal(bool)
     arrayT = []
     arraytemp = []
     runningFlag = False
@@ -78,6 +80,7 @@ class itc503GUI(QObject):
         self.settingsWidget.connectButton.clicked.connect(self._connectAction)
         self.settingsWidget.disconnectButton.clicked.connect(self._disconnectAction)
         self.settingsWidget.setTButton.clicked.connect(self._setTAction)
+        self.connection_signal.connect(self._GUIchange_deviceConnected)
         self.settingsWidget.directoryButton.clicked.connect(self._getAddress)
         self.settingsWidget.periodCheck.clicked.connect(self._displayAction)
         self.settingsWidget.saveButton.clicked.connect(self._createFile)
@@ -101,16 +104,10 @@ class itc503GUI(QObject):
     ########GUI Slots
     def _connectAction(self):
         self._parse_settings_source()
-        self.settings["source"] = self.settingsWidget.source.text()
-        try:
-            self.itc503.open(self.settings["source"])
-            self._GUIchange_deviceConnected(True)
-            self.closeLock.emit(True)
-            return [0, "OK"]
-        except Exception as e:
-            self.log_message.emit(datetime.now().strftime("%H:%M:%S.%f") + f" : itc503 plugin : {e}, status = 4")
-            self.info_message.emit(f"itc503 plugin : {e}")
-            return [e, {"Error message": f"{e}"}]
+        [status, info] = self.temperatureConnect()
+        if status:
+            self.info_message.emit(f"itc503 plugin : {info['Error message']}")
+        return [status, info]
 
     def _disconnectAction(self):
         if self.timer.isActive():
@@ -269,7 +266,7 @@ class itc503GUI(QObject):
         self.axes.set_xlim(xmin, xmax)
         self.axes.set_ylim(ymin, ymax)
         self.axes.set_title(f"T = {self.arraytemp[-1]} K")
-        self.sc.draw()
+        self.sc.request_draw()
         return [0]
 
     def _update_display(self):
@@ -281,7 +278,7 @@ class itc503GUI(QObject):
         self.axes.plot(self.arrayT, self.arraytemp, "b-")
         self.axes.set_xlim(xmin, xmax)
         self.axes.set_ylim(ymin, ymax)
-        self.sc.draw()
+        self.sc.request_draw()
         return [0]
 
     def _setT(self):
@@ -579,6 +576,24 @@ class itc503GUI(QObject):
     def getIterations(self):
         return self.settings["sweeppts"]
 
+    def temperatureConnect(self, parse_settings=True):
+        """Opens the controller at the source address in the settings widget.
+        May be called from other threads with parse_settings=False after parsing the settings in the GUI thread, the
+        GUI is updated through connection_signal.
+
+        Returns [status, message]
+        """
+        if parse_settings:
+            self.settings["source"] = self.settingsWidget.source.text()
+        try:
+            self.itc503.open(self.settings["source"])
+        except Exception as e:
+            self.log_message.emit(datetime.now().strftime("%H:%M:%S.%f") + f" : itc503 plugin : {e}, status = 4")
+            return [4, {"Error message": f"{e}"}]
+        self.connection_signal.emit(True)
+        self.closeLock.emit(True)
+        return [0, "OK"]
+
     """def loopingIteration(self, iteration):
         if self.runningFlag:
             self.run_thread.thread_stop()
@@ -15,10 +15,11 @@ from MplCanvas import MplCanvas
 from oo_utils import millis_to_s, s_to_micros, s_to_millis
 from oousb2000 import OODRV
 from pathvalidate import is_valid_filename
-from plugin_components import CloseLockSignalProvider, ConnectionIndicatorStyle, LoggingHelper
+from plugin_components import CloseLockSignalProvider, ConnectionIndicatorStyle, IntegrationTimeSolver, LoggingHelper
 from PyQt6 import uic
 from PyQt6.QtCore import QObject, Qt
 from PyQt6.QtWidgets import QFileDialog, QVBoxLayout
+from spectral_dataset import DEFAULT_DATASET_NAME, SpectralDatasetWriter
 from threadStopped import ThreadStopped, thread_with_exception
 
 
@@ -82,6 +83,10 @@ class OOUSB2000_GUI(QObject):
         self.settings = {}
 
         self._scan_lock = Lock()
+        # open spectral datasets by address, spectra are appended to them when savedataset is set
+        self._datasets = {}
+        # model based search for auto integration time, keeps the signal rate of previous points between calls
+        self._autoTime_solver = IntegrationTimeSolver(self.autoTime_min, self.autoTime_max, self.autoValue_min, self.autoValue_max)
 
     def _log_verbose(self, message):
         """Logs a message if verbose mode is enabled."""
@@ -106,6 +111,7 @@ class OOUSB2000_GUI(QObject):
         self.axes.set_ylabel("Intensity (calib. arb. un.)")
 
         self.axes.set_xlim(utils.OO_MIN_WL, utils.OO_MAX_WL)  # limits are given by spectral range of the device
+        self._preview_line = None
 
         layout = QVBoxLayout()
         layout.addWidget(self.sc._create_toolbar(self.previewWidget))
@@ -128,15 +134,12 @@ class OOUSB2000_GUI(QObject):
         preview_data = info
         wl = self.drv.spectro.wavelengths()
         try:
-            xmin, xmax = self.axes.get_xlim()
-            ymin, ymax = self.axes.get_ylim()
-            self.axes.cla()
-            self.axes.set_xlabel("Wavelength (nm)")
-            self.axes.set_ylabel("Intensity (calib. arb. un.)")
-            self.axes.plot(wl, preview_data, "b-")
-            self.axes.set_xlim(xmin, xmax)
-            self.axes.set_ylim(ymin, ymax)
-            self.sc.draw()
+            # the line is kept between scans, only its data is replaced, so the plot can be blitted
+            if self._preview_line is None:
+                self._preview_line = self.sc.add_live_artist(self.axes.plot(wl, preview_data, "b-")[0])
+            else:
+                self._preview_line.set_data(wl, preview_data)
+            self.sc.request_draw()
             self.lastspectrum = [info, self.settings]
             return [0, [wl, info]]
         except Exception as e:
@@ -290,9 +293,11 @@ class OOUSB2000_GUI(QObject):
         external_cleanup_args=None,
         pause_duration: float = 0.0,
         last_integration_time: float | None = None,
+        cache_key=None,
     ) -> tuple[int, float | dict]:
         """
         Calculates the optimal integration time, allowing external actions and cleanup with arguments.
+        The next guess is predicted from the measured spectrum values (see IntegrationTimeSolver), so usually one or two scans are needed.
 
         Args:
             external_action (callable): External function to execute during auto time calculation.
@@ -301,13 +306,12 @@ class OOUSB2000_GUI(QObject):
             external_cleanup_args (tuple): Arguments for the external cleanup function.
             pause_duration (float): Duration to pause after each iteration.
             last_integration_time (float): Optional initial guess for integration time in seconds.
+            cache_key (hashable): Optional key (e.g. SMU set value) for caching the signal rate of the sample, it is used as initial guess on the next call.
 
         Returns:
             tuple[int, float | dict]: Status and integration time or error information.
         """
         self._log_verbose("Calculating auto integration time.")
-        low = self.autoTime_min * 1000  # time min ms
-        high = self.autoTime_max * 1000  # time max ms
         low_spectrum = self.autoValue_min  # min spectrum value
         high_spectrum = self.autoValue_max  # max spectrum value
 
@@ -323,6 +327,8 @@ class OOUSB2000_GUI(QObject):
             # initial guess provided as argument, use that.
             else:
                 guessIntTime = last_integration_time * 1000  # ms
+            # signal rate cached from earlier points overrides the guess, the solver works in s
+            guessIntTime = int(round(self._autoTime_solver.start(guessIntTime / 1000.0, key=cache_key, sample=self.settings["samplename"]) * 1000))  # ms
 
             # start iterating through integration times using guessIntTime as initial guess
             for iter in range(self.intTimeMaxIterations):
@@ -382,26 +388,23 @@ class OOUSB2000_GUI(QObject):
                     time.sleep(pause_duration)
 
                 target = max(info[1])  # target value to optimize
+                result, nextIntTime = self._autoTime_solver.update(guessIntTime / 1000.0, target)
                 # if spectrum is in the range, found good integration time
-                if low_spectrum <= target <= high_spectrum:
+                if result == "done":
                     self._log_verbose(f"Optimal integration time found: {guessIntTime / 1000.0} seconds.")
                     return [0, guessIntTime / 1000.0]  # return in seconds
-                # if spectrum is below the range, increase integration time
+                if result == "too high":
+                    self._log_verbose(f"Integration time is too high, returning: {guessIntTime / 1000.0} seconds.")
+                    return [1, {"Error message": "Integration time too high"}]
+                if result == "too low":
+                    self._log_verbose(f"Integration time is too low, returning: {guessIntTime / 1000.0} seconds.")
+                    return [1, {"Error message": "Integration time too low"}]
                 if target < low_spectrum:
                     self._log_verbose(f"Spectrum value {target} is below the range ({low_spectrum}), increasing integration time.")
-                    if guessIntTime >= high:
-                        self._log_verbose(f"Integration time is too high, returning: {guessIntTime / 1000.0} seconds.")
-                        return [1, {"Error message": "Integration time too high"}]
-                    low = guessIntTime
-                # if spectrum is above the range, decrease integration time
                 else:
                     self._log_verbose(f"Spectrum value {target} is above the range ({high_spectrum}), decreasing integration time.")
-                    if guessIntTime <= low:
-                        self._log_verbose(f"Integration time is too low, returning: {guessIntTime / 1000.0} seconds.")
-                        return [1, {"Error message": "Integration time too low"}]
-                    high = guessIntTime
-                # Compute new guess in milliseconds, rounded to nearest millisecond
-                guessIntTime = int(round((low + high) / 2))
+                # new guess in milliseconds, rounded to nearest millisecond
+                guessIntTime = int(round(nextIntTime * 1000))
 
             self._log_verbose(f"Auto integration time calculation completed: {guessIntTime / 1000.0} seconds.")
             return [0, guessIntTime / 1000.0]  # return in seconds
@@ -440,6 +443,8 @@ class OOUSB2000_GUI(QObject):
         self.settingsWidget.saveButton.setEnabled(False)
         self.settingsWidget.lineEdit_path.setText(plugin_info["address"])
         self.settingsWidget.lineEdit_filename.setText(plugin_info["filename"])
+        if plugin_info.get("savedataset") == "True" or plugin_info.get("savedataset") is True:
+            self.settingsWidget.saveDataset_check.setChecked(True)
         self.settingsWidget.lineEdit_sampleName.setText(plugin_info["samplename"])
         self.settingsWidget.lineEdit_comment.setText(plugin_info["comment"])
 
@@ -546,6 +551,7 @@ class OOUSB2000_GUI(QObject):
             self.logger.log_info("address string should point to a valid directory")
             return [1, {"Error message": "address string should point to a valid directory"}]
         self.settings["filename"] = self.settingsWidget.lineEdit_filename.text()
+        self.settings["savedataset"] = self.settingsWidget.saveDataset_check.isChecked()
         if not is_valid_filename(self.settings["filename"]):
             self.logger.log_info("filename is not valid")
             self.logger.info_popup("filename is not valid")
@@ -635,6 +641,7 @@ class OOUSB2000_GUI(QObject):
             return [4, {"Error message": f"{e}"}]
 
     def spectrometerDisconnect(self):
+        self._closeDatasets()
         return [0, "OK"]
 
     def spectrometerSetIntegrationTime(self, integrationTime):
@@ -698,6 +705,8 @@ class OOUSB2000_GUI(QObject):
     ###############save data
 
     def createFile(self, varDict, filedelimeter, address, data):
+        if self.settings.get("savedataset", False):
+            return self._appendToDataset(varDict, address, data)
         fileheader = self._spectrometerMakeHeader(varDict, separator=filedelimeter)
         wl = self.drv.get_wavelengths()
         self._log_verbose(f"Creating file at {address} with data shape {data.shape}")
@@ -711,6 +720,26 @@ class OOUSB2000_GUI(QObject):
             footer="#[EndOfFile]",
             comments="#",
         )
+        return [0, {}]
+
+    def _appendToDataset(self, varDict, address, data):
+        """Appends the spectrum to the dataset in the directory of address, the filename is kept as the label of the spectrum."""
+        dataset_address = os.path.join(os.path.dirname(address), DEFAULT_DATASET_NAME)
+        try:
+            writer = self._datasets.get(dataset_address)
+            if writer is None or writer.closed:
+                writer = SpectralDatasetWriter(dataset_address, self.drv.get_wavelengths())
+                self._datasets[dataset_address] = writer
+            self._log_verbose(f"Appending spectrum {os.path.basename(address)} to {dataset_address}")
+            writer.append(data, label=os.path.basename(address), **varDict)
+        except (OSError, ValueError) as e:
+            return [1, {"Error message": f"Failed to append spectrum to dataset: {e}"}]
+        return [0, {}]
+
+    def _closeDatasets(self):
+        for writer in self._datasets.values():
+            writer.close()
+        self._datasets = {}
 
     def _spectrometerMakeHeader(self, varDict={}, separator=";"):
         ###following the structure of files generated by Thorlabs software
@@ -256,7 +256,7 @@ class peltierControllerGUI(QObject):
                         self.Xdata[-1] + timedelta(seconds=self.settings["period"]),
                     )
             self.axes.set_ylim(min(self.Ydata) - 10, max(self.Ydata) + 10)  # +/- 10 just a random margin for plotting
-            self.sc.draw()
+            self.sc.request_draw()
 
     ########Functions
     ###############GUI setting up
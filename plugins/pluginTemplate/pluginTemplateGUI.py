@@ -143,7 +143,7 @@ class pluginTemplateGUI(QObject):
     def _update_plot(self, x, y):
         self.axes.clear()
         self.axes.plot(x, y)
-        self.sc.draw()
+        self.sc.request_draw()
 
     ########Functions
     ################################### internal
@@ -18,7 +18,7 @@ import pandas as pd
 from annotated_types import Gt
 from MplCanvas import MplCanvas  # this should be moved to some pluginsShare
 from pathvalidate import is_valid_filename
-from plugin_components import DataOrder, DependencyManager, FileManager, LoggingHelper, PluginException, load_widget
+from plugin_components import DataFileWriter, DataOrder, DependencyManager, FileManager, LoggingHelper, PluginException, load_widget
 from pydantic import BaseModel, DirectoryPath, field_validator
 from PyQt6.QtWidgets import QFileDialog, QVBoxLayout
 from threadStopped import ThreadStopped, thread_with_exception
@@ -131,6 +131,7 @@ class specTimeIVGUI:
             ],
         }
         self.settings = {}
+        self._writer = None
 
         # Load the settings based on the name of this file.
         self.path = os.path.dirname(__file__) + os.path.sep
@@ -637,6 +638,23 @@ class specTimeIVGUI:
             f.write(fileheader + "\n")
             pd.DataFrame(data).to_csv(f, index=False, header=False, float_format="%.12e", sep=",")
 
+    def _openDataFile(self, header):
+        """Opens the data file for appending the readings as they are measured. The file is synced to the disk every autosave interval.
+
+        Returns:
+            DataFileWriter or None if autosave is off (data is saved with _saveData at the end)
+        """
+        if not self.settings["autosave"]:
+            return None
+        fulladdress = os.path.join(self.settings["address"], self.settings["filename"] + ".dat")
+        self.logger.log_debug("Appending data to file: " + fulladdress)
+        return DataFileWriter(fulladdress, header, sync_interval=self.settings["autosaveinterval"] * 60)  # convert to sec from min
+
+    def _closeDataFile(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
     def sequenceStep(self, postfix):
         function_dict = self.dependency_manager.function_dict
         self.logger.log_debug("Running sequence step with postfix: " + postfix)
@@ -750,7 +768,7 @@ class specTimeIVGUI:
 
         timeData = []
         startTic = time.time()
-        saveTic = startTic
+        self._writer = self._openDataFile(header)
         scan_counter = 0  # Counter for spectrometer file naming
         self.logger.log_debug("_timeIVimplementation: SMU initialized successfully.")
 
@@ -781,6 +799,11 @@ class specTimeIVGUI:
 
             currentTime = time.time()
             toc = currentTime - startTic
+            if self._writer is not None:
+                if drainIV is None:
+                    self._writer.append([toc, sourceIV[DataOrder.I.value], sourceIV[DataOrder.V.value]])
+                else:
+                    self._writer.append([toc, sourceIV[DataOrder.I.value], sourceIV[DataOrder.V.value], drainIV[DataOrder.I.value], drainIV[DataOrder.V.value]])
 
             # Plot doesn't exist yet, initialize it
             if not timeData:
@@ -824,10 +847,10 @@ class specTimeIVGUI:
                     self.axes_twinx.plot(timeData, drainI, "g*")
                     self.axes.plot(timeData, drainV, "go")
 
-            # plot is now updated, redraw the canvas
+            # plot is now updated, redraw the canvas (rendered in the GUI thread)
             self.axes.relim()
             self.axes.autoscale_view()
-            self.sc.draw()
+            self.sc.request_draw()
 
             # Take spectrometer scan after each plot update
             self.logger.log_debug("_timeIVimplementation: Taking spectrometer scan.")
@@ -873,17 +896,13 @@ class specTimeIVGUI:
             if self.settings["stoptimer"]:
                 if (currentTime - startTic) >= self.settings["stopafter"] * 60:  # convert to sec from min
                     self.logger.log_debug("_timeIVimplementation: Stop timer reached, saving data and exiting.")
-                    self._saveData(header, timeData, sourceI, sourceV, drainI, drainV)
+                    if self._writer is not None:
+                        self._closeDataFile()
+                    else:
+                        self._saveData(header, timeData, sourceI, sourceV, drainI, drainV)
                     time.sleep(self.settings["timestep"])  # ensure the last data is saved before exiting
                     break
 
-            # check if it is time to autosave
-            if self.settings["autosave"]:
-                if (currentTime - saveTic) >= self.settings["autosaveinterval"] * 60:  # convert to sec from min
-                    self.logger.log_debug("_timeIVimplementation: Autosave interval reached, saving data.")
-                    self._saveData(header, timeData, sourceI, sourceV, drainI, drainV)
-                    saveTic = currentTime
-
             # take a nap until we need to take the next measurement
             time.sleep(self.settings["timestep"])
 
@@ -911,6 +930,10 @@ class specTimeIVGUI:
             self.logger.log_error(f"timeIV plugin implementation stopped because of unexpected exception: {e}")
             exception = 3
         finally:
+            try:
+                self._closeDataFile()
+            except Exception as e:
+                self.logger.log_warn(f"timeIV plugin: closing data file failed because of unexpected exception: {e}")
             try:
                 function_dict["smu"][self.settings["smu"]]["smu_outputOFF"]()
                 # if status:
@@ -11,7 +11,7 @@ from plugin_components import CloseLockSignalProvider, LoggingHelper, PyIVLSRetu
 from PyQt6 import uic
 from PyQt6.QtCore import QObject, Qt, pyqtSlot
 from PyQt6.QtWidgets import QComboBox, QFileDialog, QLabel, QVBoxLayout, QWidget
-from sweepCommon import create_file_header, create_sweep_reciepe
+from sweepCommon import create_file_header, create_sweep_reciepe, prescaler_stop_check
 from threadStopped import (
     ThreadStopped,
     thread_with_exception,
@@ -56,8 +56,7 @@ class sweepGUI(QObject):
                 "smu_abort",
                 "smu_outputOFF",
                 "smu_disconnect",
-                "smu_getLastBufferValue",
-                "smu_bufferRead",
+                "smu_streamBuffers",
                 "set_running",
                 "smu_channelNames",
             ],
@@ -691,61 +690,64 @@ class sweepGUI(QObject):
             if self.function_dict["smu"][self.settings["smu"]]["smu_runSweep"](measurement):
                 raise sweepException("sweep plugin : smu_runSweep failed")
 
-            # plotting while measuring
+            # plotting while measuring, all readings are collected from the stream, so the buffers do not need to be read after the sweep
             self.axes.cla()
             self.axes.set_xlabel("Voltage (V)")
             self.axes.set_ylabel("Current (A)")
-            self.sc.draw()
-            buffer_prev = 0
-            while True:
-                time.sleep(self.settings["plotupdate"])
-                [lastI, lastV, lastPoints] = self.function_dict["smu"][self.settings["smu"]]["smu_getLastBufferValue"](measurement["source"])
-                if lastPoints >= measurement["steps"] * measurement["repeat"]:
-                    break
-                if lastPoints > buffer_prev:
-                    if buffer_prev == 0:
-                        Xdata_source = [lastV]
-                        Ydata_source = [lastI]
-                        plot_refs = self.axes.plot(Xdata_source, Ydata_source, "bo")
-                        _plot_ref_source = plot_refs[0]
-                        if not measurement["single_ch"]:
-                            [lastI_drain, lastV_drain, lastPoints_drain] = self.function_dict["smu"][self.settings["smu"]]["smu_getLastBufferValue"](measurement["source"], lastPoints)
-                            Xdata_drain = [lastV]
-                            Ydata_drain = [lastI]
-                            plot_refs = self.axes.plot(Xdata_drain, Ydata_drain, "go")
-                            _plot_ref_drain = plot_refs[0]
-                    else:
-                        Xdata_source.append(lastV)
-                        Ydata_source.append(lastI)
-                        _plot_ref_source.set_xdata(Xdata_source)
-                        _plot_ref_source.set_ydata(Ydata_source)
-                        if not measurement["single_ch"]:
-                            [lastI_drain, lastV_drain, lastPoints_drain] = self.function_dict["smu"][self.settings["smu"]]["smu_getLastBufferValue"](measurement["drain"], lastPoints)
-                            Xdata_drain.append(lastV_drain)
-                            Ydata_drain.append(lastI_drain)
-                            _plot_ref_drain.set_xdata(Xdata_source)
-                            _plot_ref_drain.set_ydata(Ydata_drain)
-                    self.axes.relim()
-                    self.axes.autoscale_view()
-                    self.sc.draw()
-                    if (measurement["type"] == "i" and (abs(lastV) > self.settings["prescaler"] * abs(measurement["limit"]))) or (
-                        measurement["type"] == "v" and (abs(lastI) > self.settings["prescaler"] * abs(measurement["limit"]))
+            self.sc.clear_live_artists()
+            _plot_ref_source = self.sc.add_live_artist(self.axes.plot([], [], "bo")[0])
+            if not measurement["single_ch"]:
+                _plot_ref_drain = self.sc.add_live_artist(self.axes.plot([], [], "go")[0])
+            self.sc.request_draw()
+            drain = None if measurement["single_ch"] else measurement["drain"]
+            # readings are copied into arrays sized for the whole sweep, the plot shows the rows filled so far
+            points = measurement["steps"] * measurement["repeat"]
+            IV_source = np.empty((points, 2))
+            IV_drain = np.empty((points, 2))
+            received = 0
+            stream = self.function_dict["smu"][self.settings["smu"]]["smu_streamBuffers"](measurement["source"], points, self.settings["plotupdate"], drain)
+            for source_chunk, drain_chunk in stream:
+                chunk_end = received + len(source_chunk)
+                IV_source[received:chunk_end] = source_chunk[:, :2]
+                if not measurement["single_ch"]:
+                    IV_drain[received:chunk_end] = drain_chunk[:, :2]
+                received = chunk_end
+                _plot_ref_source.set_data(IV_source[:received, 1], IV_source[:received, 0])
+                if not measurement["single_ch"]:
+                    _plot_ref_drain.set_data(IV_source[:received, 1], IV_drain[:received, 0])
+                self.axes.relim()
+                self.axes.autoscale_view()
+                self.sc.request_draw()
+                # a chunk holds all readings since the previous one, check the largest for crossing the limit
+                [maxI, maxV] = np.abs(source_chunk[:, :2]).max(axis=0) if len(source_chunk) else (0.0, 0.0)
+                if prescaler_stop_check(measurement, self.settings, maxV, maxI):
+                    self.function_dict["smu"][self.settings["smu"]]["smu_abort"](measurement["source"])
+                    stream.close()
+                    # collect the readings made before the abort
+                    time.sleep(self.settings["plotupdate"])
+                    for source_chunk, drain_chunk in self.function_dict["smu"][self.settings["smu"]]["smu_streamBuffers"](
+                        measurement["source"], 0, self.settings["plotupdate"], drain, received
                     ):
-                        self.function_dict["smu"][self.settings["smu"]]["smu_abort"](measurement["source"])
-                        break
-                    buffer_prev = lastPoints
+                        chunk_end = received + len(source_chunk)
+                        IV_source[received:chunk_end] = source_chunk[:, :2]
+                        if not measurement["single_ch"]:
+                            IV_drain[received:chunk_end] = drain_chunk[:, :2]
+                        received = chunk_end
+                    break
             #### Keithley may produce a 5042 error, so make a delay here
             time.sleep(self.settings["plotupdate"])
             self.function_dict["smu"][self.settings["smu"]]["smu_outputOFF"]()
-            IV_source = self.function_dict["smu"][self.settings["smu"]]["smu_bufferRead"](measurement["source"])
+            # drop timestamps, files contain only current and voltage
+            IV_source = IV_source[:received]
+            IV_drain = IV_drain[:received]
             self.axes.cla()
+            self.sc.clear_live_artists()
             self.axes.set_xlabel("Voltage (V)")
             self.axes.set_ylabel("Current (A)")
-            plot_refs = self.axes.plot(IV_source[:, 1], IV_source[:, 0], "bo")
+            self.axes.plot(IV_source[:, 1], IV_source[:, 0], "bo")
             if not measurement["single_ch"]:
-                IV_drain = self.function_dict["smu"][self.settings["smu"]]["smu_bufferRead"](measurement["drain"])
-                plot_refs = self.axes.plot(IV_source[:, 1], IV_drain[:, 0], "go")
-            self.sc.draw()
+                self.axes.plot(IV_source[:, 1], IV_drain[:, 0], "go")
+            self.sc.request_draw()
             IVresize = 0
             if data.size == 0:
                 data = IV_source
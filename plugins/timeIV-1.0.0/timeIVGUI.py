@@ -15,10 +15,11 @@ import time
 from datetime import datetime
 from enum import Enum
 
+import numpy as np
 import pandas as pd
-from MplCanvas import MplCanvas  # this should be moved to some pluginsShare
+from MplCanvas import LiveTrace, MplCanvas  # this should be moved to some pluginsShare
 from pathvalidate import is_valid_filename
-from plugin_components import CloseLockSignalProvider, LoggingHelper, get_public_methods, public
+from plugin_components import CloseLockSignalProvider, DataFileWriter, LoggingHelper, get_public_methods, public
 from PyQt6 import uic
 from PyQt6.QtCore import QObject, Qt
 from PyQt6.QtWidgets import QFileDialog, QVBoxLayout
@@ -29,6 +30,10 @@ class timeIVexception(Exception):
     pass
 
 
+# number of readings requested per hardware-timed segment when there is no stop timer, the SMU limits it to its buffer capacity
+HW_SEGMENT_POINTS = 1000000
+
+
 class dataOrder(Enum):
     V = 1
     I = 0
@@ -81,9 +86,14 @@ class timeIVGUI(QObject):
                 "set_running",
                 "smu_setOutput",
                 "smu_channelNames",
+                "smu_getIVs",
+                "smu_runTimed",
+                "smu_streamBuffers",
+                "smu_abort",
             ],
         }
         self.settings = {}
+        self._writer = None
 
         # Load the settings based on the name of this file.
         self.path = os.path.dirname(__file__) + os.path.sep
@@ -209,6 +219,7 @@ class timeIVGUI(QObject):
                 {"Error message": "Value error in timeIV plugin: autosave interval field should be greater than 0"},
             )
         new_settings["stoptimer"] = self.settingsWidget.stopTimerCheckBox.isChecked()
+        new_settings["hwtimed"] = self.settingsWidget.hwTimedCheckBox.isChecked()
         new_settings["autosave"] = self.settingsWidget.autosaveCheckBox.isChecked()
 
         # SMU settings
@@ -344,6 +355,16 @@ class timeIVGUI(QObject):
                 1,
                 {"Error message": "Value error in timeIV plugin: drain delay field should be positive"},
             )
+        # in hardware-timed mode a measurement should fit in the time step, otherwise timer events are lost
+        if new_settings["hwtimed"]:
+            measurement_time = new_settings["sourcenplc"] + (new_settings["sourcedelay"] if new_settings["sourcedelaymode"] == "manual" else 0)
+            if not new_settings["singlechannel"]:
+                measurement_time = max(measurement_time, new_settings["drainnplc"] + (new_settings["draindelay"] if new_settings["draindelaymode"] == "manual" else 0))
+            if new_settings["timestep"] <= measurement_time:
+                return (
+                    1,
+                    {"Error message": "Value error in timeIV plugin: in instrument timed mode time step should be longer than nplc and delay"},
+                )
         # Commit internal state only after all validation passed.
         new_settings["smu"] = smu_selection
         new_settings["smu_settings"] = smu_settings
@@ -377,6 +398,11 @@ class timeIVGUI(QObject):
         else:
             self.settingsWidget.stopTimerCheckBox.setChecked(False)
 
+        if plugin_info["hwtimed"] == "True":
+            self.settingsWidget.hwTimedCheckBox.setChecked(True)
+        else:
+            self.settingsWidget.hwTimedCheckBox.setChecked(False)
+
         if plugin_info["autosave"] == "True":
             self.settingsWidget.autosaveCheckBox.setChecked(True)
         else:
@@ -607,6 +633,7 @@ class timeIVGUI(QObject):
         self.settingsWidget.autosaveLineEdit.setText(str(self.settings["autosaveinterval"]))
 
         self.settingsWidget.stopTimerCheckBox.setChecked(self.settings["stoptimer"])
+        self.settingsWidget.hwTimedCheckBox.setChecked(self.settings.get("hwtimed", False))
         self.settingsWidget.autosaveCheckBox.setChecked(self.settings["autosave"])
 
         # SMU settings
@@ -747,7 +774,10 @@ class timeIVGUI(QObject):
             f"{comment}NPLC value {settings['sourcenplc'] * 1000 / smu_settings['lineFrequency']} ms (for detected line frequency {smu_settings['lineFrequency']} Hz is {settings['sourcenplc']})\n#"
         )
         comment = f"{comment}\n#\n#"
-        comment = f"{comment}Continuous operation of the source with step time settings['timestep'] \n#\n#\n#"
+        if settings.get("hwtimed", False):
+            comment = f"{comment}Continuous operation of the source with step time {settings['timestep']} s timed by the instrument\n#\n#\n#"
+        else:
+            comment = f"{comment}Continuous operation of the source with step time settings['timestep'] \n#\n#\n#"
 
         if not settings["singlechannel"]:
             comment = f"{comment}Drain in {settings['draininject']} injection mode\n#"
@@ -860,6 +890,23 @@ class timeIVGUI(QObject):
             f.write(fileheader + "\n")
             pd.DataFrame(data).to_csv(f, index=False, header=False, float_format="%.12e", sep=",")
 
+    def _openDataFile(self, header):
+        """Opens the data file for appending the readings as they are measured. The file is synced to the disk every autosave interval.
+
+        Returns:
+            DataFileWriter or None if autosave is off (data is saved with _saveData at the end)
+        """
+        if not self.settings["autosave"]:
+            return None
+        fulladdress = self.settings["address"] + os.sep + self.settings["filename"] + ".dat"
+        self.logger.log_debug("Appending data to file: " + fulladdress)
+        return DataFileWriter(fulladdress, header, sync_interval=self.settings["autosaveinterval"] * 60)  # convert to sec from min
+
+    def _closeDataFile(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
     @public
     def sequenceStep(self, postfix):
         self.logger.log_debug("Running sequence step with postfix: " + postfix)
@@ -902,7 +949,9 @@ class timeIVGUI(QObject):
 
         timeData = []
         startTic = time.time()
-        saveTic = startTic
+        # sample times are taken from the instrument clock, relative to the first sample
+        channels = [self.settings["channel"]] if self.settings["singlechannel"] else [self.settings["channel"], self.settings["drainchannel"]]
+        instrumentStart = None
         self.logger.log_debug("_timeIVimplementation: SMU initialized successfully.")
 
         if not self.settings["singlechannel"]:
@@ -912,78 +961,65 @@ class timeIVGUI(QObject):
             self.logger.log_debug("_timeIVimplementation: Turning on SMU output for source channel.")
             self.function_dict["smu"][self.settings["smu"]]["smu_outputON"](self.settings["channel"])
 
+        self._writer = self._openDataFile(header)
+
+        if self.settings.get("hwtimed", False):
+            self._timeIVtimed(header)
+            self._closeDataFile()
+            self.logger.log_debug("_timeIVimplementation: Turning off SMU output and disconnecting.")
+            self.function_dict["smu"][self.settings["smu"]]["smu_outputOFF"]()
+            self.function_dict["smu"][self.settings["smu"]]["smu_disconnect"]()
+            self.set_running(False)
+            self.logger.log_debug("_timeIVimplementation: Completed successfully.")
+            return (0, "OK")
+
         while True:
-            self.logger.log_debug("_timeIVimplementation: Fetching IV data for source channel.")
-            status, sourceIV = self.function_dict["smu"][self.settings["smu"]]["smu_getIV"](self.settings["channel"])
+            self.logger.log_debug("_timeIVimplementation: Fetching IV data for source and drain channels.")
+            status, IVs = self.function_dict["smu"][self.settings["smu"]]["smu_getIVs"](channels)
             if status:
-                raise timeIVexception(sourceIV["Error message"])
-
+                raise timeIVexception(IVs["Error message"])
+            sourceIV = IVs[0]
             if not self.settings["singlechannel"]:
-                self.logger.log_debug("_timeIVimplementation: Fetching IV data for drain channel.")
-                status, drainIV = self.function_dict["smu"][self.settings["smu"]]["smu_getIV"](self.settings["drainchannel"])
-                if status:
-                    raise timeIVexception(drainIV["Error message"])
+                drainIV = IVs[1]
 
             currentTime = time.time()
-            toc = currentTime - startTic
+            if instrumentStart is None:
+                instrumentStart = sourceIV[2]
+            toc = sourceIV[2] - instrumentStart
+            if self._writer is not None:
+                if self.settings["singlechannel"]:
+                    self._writer.append([toc, sourceIV[dataOrder.I.value], sourceIV[dataOrder.V.value]])
+                else:
+                    self._writer.append([toc, sourceIV[dataOrder.I.value], sourceIV[dataOrder.V.value], drainIV[dataOrder.I.value], drainIV[dataOrder.V.value]])
 
             if not timeData:
                 self.logger.log_debug("_timeIVimplementation: Initializing plots.")
-                self.axes.cla()
-                self.axes_twinx.cla()
-                timeData.append(toc)
-                sourceV = [sourceIV[dataOrder.V.value]]
-                plot_refs = self.axes.plot(timeData, sourceV, "bo")
-                self.axes.set_xlabel("time (s)")
-                self.axes.set_ylabel("Voltage (V)")
-                self._plot_sourceV = plot_refs[0]
-                self.axes_twinx.set_ylabel("Current (A)")
-                sourceI = [sourceIV[dataOrder.I.value]]
-                plot_refs = self.axes_twinx.plot(timeData, sourceI, "b*")
-                self._plot_sourceI = plot_refs[0]
-
+                self._initLivePlot()
+                sourceV = []
+                sourceI = []
                 if not self.settings["singlechannel"]:
-                    drainV = [drainIV[dataOrder.V.value]]
-                    plot_refs = self.axes.plot(timeData, drainV, "go")
-                    self._plot_drainV = plot_refs[0]
-                    drainI = [drainIV[dataOrder.I.value]]
-                    plot_refs = self.axes_twinx.plot(timeData, drainI, "g*")
-                    self._plot_drainI = plot_refs[0]
+                    drainV = []
+                    drainI = []
                 else:
                     drainI = None
                     drainV = None
-            else:
-                self.logger.log_debug("_timeIVimplementation: Updating plots.")
-                timeData.append(toc)
-                self.axes.cla()
-                sourceV.append(sourceIV[dataOrder.V.value])
-                sourceI.append(sourceIV[dataOrder.I.value])
-                self.axes.plot(timeData, sourceV, "bo")
-                self.axes_twinx.cla()
-                self.axes_twinx.plot(timeData, sourceI, "b*")
-
-                if not self.settings["singlechannel"]:
-                    drainV.append(drainIV[dataOrder.V.value])
-                    drainI.append(drainIV[dataOrder.I.value])
-                    self.axes_twinx.plot(timeData, drainI, "g*")
-                    self.axes.plot(timeData, drainV, "go")
-
-            self.axes.relim()
-            self.axes.autoscale_view()
-            self.sc.draw()
+            timeData.append(toc)
+            sourceV.append(sourceIV[dataOrder.V.value])
+            sourceI.append(sourceIV[dataOrder.I.value])
+            if not self.settings["singlechannel"]:
+                drainV.append(drainIV[dataOrder.V.value])
+                drainI.append(drainIV[dataOrder.I.value])
+            self._updateLivePlot([toc], IVs[0:1], None if self.settings["singlechannel"] else IVs[1:2])
 
             if self.settings["stoptimer"]:
                 if (currentTime - startTic) >= self.settings["stopafter"] * 60:  # convert to sec from min
                     self.logger.log_debug("_timeIVimplementation: Stop timer reached, saving data and exiting.")
-                    self._saveData(header, timeData, sourceI, sourceV, drainI, drainV)
+                    if self._writer is not None:
+                        self._closeDataFile()
+                    else:
+                        self._saveData(header, timeData, sourceI, sourceV, drainI, drainV)
                     break
 
-            if self.settings["autosave"]:
-                if (currentTime - saveTic) >= self.settings["autosaveinterval"] * 60:  # convert to sec from min
-                    self.logger.log_debug("_timeIVimplementation: Autosave interval reached, saving data.")
-                    self._saveData(header, timeData, sourceI, sourceV, drainI, drainV)
-                    saveTic = currentTime
-
             time.sleep(self.settings["timestep"])
 
         self.logger.log_debug("_timeIVimplementation: Turning off SMU output and disconnecting.")
@@ -993,6 +1029,106 @@ class timeIVGUI(QObject):
         self.logger.log_debug("_timeIVimplementation: Completed successfully.")
         return (0, "OK")
 
+    def _initLivePlot(self):
+        """Clears the plot and creates persistent lines for the readings. Line data is kept in LiveTrace buffers
+        limited to about 2 points per pixel of the axes width, so an update takes the same time for any length of the run.
+        """
+        self.axes.cla()
+        self.axes_twinx.cla()
+        self.sc.clear_live_artists()
+        self.axes.set_xlabel("time (s)")
+        self.axes.set_ylabel("Voltage (V)")
+        self.axes_twinx.set_ylabel("Current (A)")
+        capacity = 2 * int(self.axes.bbox.width)
+        self._plot_sourceV = self.sc.add_live_artist(self.axes.plot([], [], "bo")[0])
+        self._plot_sourceI = self.sc.add_live_artist(self.axes_twinx.plot([], [], "b*")[0])
+        self._traces = [(LiveTrace(capacity), self._plot_sourceV, "source", dataOrder.V.value), (LiveTrace(capacity), self._plot_sourceI, "source", dataOrder.I.value)]
+        if not self.settings["singlechannel"]:
+            self._plot_drainV = self.sc.add_live_artist(self.axes.plot([], [], "go")[0])
+            self._plot_drainI = self.sc.add_live_artist(self.axes_twinx.plot([], [], "g*")[0])
+            self._traces += [(LiveTrace(capacity), self._plot_drainV, "drain", dataOrder.V.value), (LiveTrace(capacity), self._plot_drainI, "drain", dataOrder.I.value)]
+
+    def _updateLivePlot(self, timeData, sourceIV, drainIV=None):
+        """Adds readings to the plot and requests a redraw
+
+        Args:
+            timeData (array_like): times of the readings
+            sourceIV (np.ndarray): source readings, rows [i, v, ...]
+            drainIV (np.ndarray, optional): drain readings, rows [i, v, ...]
+        """
+        readings = {"source": sourceIV, "drain": drainIV}
+        for trace, line, channel, column in self._traces:
+            trace.extend(timeData, readings[channel][:, column])
+            line.set_data(*trace.data())
+        for axes in (self.axes, self.axes_twinx):
+            axes.relim()
+            axes.autoscale_view()
+        self.sc.request_draw()
+
+    def _timeIVtimed(self, header):
+        """Hardware-timed acquisition: the SMU takes readings with its trigger timer, the host only drains the buffers in chunks.
+        The sample period does not depend on the host load. When the buffer capacity is reached the acquisition is restarted
+        for the next segment, sample times are taken from the instrument clock, so they stay correct over segments.
+        Outputs should be switched on before.
+        """
+        smu = self.function_dict["smu"][self.settings["smu"]]
+        drain = None if self.settings["singlechannel"] else self.settings["drainchannel"]
+        # the stop timer defines the number of readings, the run is stopped by the instrument and not by the host clock
+        remaining = int(self.settings["stopafter"] * 60 / self.settings["timestep"]) + 1 if self.settings["stoptimer"] else None
+        poll = max(self.settings["timestep"], 0.2)
+        timed = {
+            "source": self.settings["channel"],
+            "drain": self.settings["drainchannel"],
+            "single_ch": self.settings["singlechannel"],
+            "period": self.settings["timestep"],
+        }
+
+        self._initLivePlot()
+
+        sourceChunks = []
+        drainChunks = []
+        instrumentStart = None
+        finished = False
+        try:
+            while remaining is None or remaining > 0:
+                timed["points"] = HW_SEGMENT_POINTS if remaining is None else remaining
+                points = smu["smu_runTimed"](timed)
+                self.logger.log_debug(f"_timeIVtimed: started segment of {points} readings.")
+                for source_chunk, drain_chunk in smu["smu_streamBuffers"](self.settings["channel"], points, poll, drain, 0, True):
+                    if instrumentStart is None:
+                        instrumentStart = source_chunk[0, 2]
+                    sourceChunks.append(source_chunk)
+                    if drain_chunk is not None:
+                        drainChunks.append(drain_chunk)
+                    if self._writer is not None:
+                        rows = [source_chunk[:, 2] - instrumentStart, source_chunk[:, dataOrder.I.value], source_chunk[:, dataOrder.V.value]]
+                        if drain_chunk is not None:
+                            rows += [drain_chunk[:, dataOrder.I.value], drain_chunk[:, dataOrder.V.value]]
+                        self._writer.append(np.column_stack(rows))
+                    self._updateLivePlot(source_chunk[:, 2] - instrumentStart, source_chunk, drain_chunk)
+                if remaining is not None:
+                    remaining -= points
+            finished = True
+        finally:
+            if not finished:
+                smu["smu_abort"](self.settings["channel"])
+                if drain is not None:
+                    smu["smu_abort"](drain)
+        self.logger.log_debug("_timeIVtimed: Stop timer reached, saving data.")
+        if self._writer is None:
+            self._saveTimedData(header, sourceChunks, drainChunks, instrumentStart)
+
+    def _saveTimedData(self, header, sourceChunks, drainChunks, instrumentStart):
+        if not sourceChunks:
+            return
+        sourceData = np.vstack(sourceChunks)
+        timeData = sourceData[:, 2] - instrumentStart
+        if drainChunks:
+            drainData = np.vstack(drainChunks)
+            self._saveData(header, timeData, sourceData[:, dataOrder.I.value], sourceData[:, dataOrder.V.value], drainData[:, dataOrder.I.value], drainData[:, dataOrder.V.value])
+        else:
+            self._saveData(header, timeData, sourceData[:, dataOrder.I.value], sourceData[:, dataOrder.V.value])
+
     def _sequenceImplementation(self):
         """
         Performs a timeIV on SMU, saves the result in a file
@@ -1013,6 +1149,10 @@ class timeIVGUI(QObject):
             self.logger.log_error(f"TimeIV plugin implementation stopped because of unexpected exception: {e}")
             exception = 3
         finally:
+            try:
+                self._closeDataFile()
+            except Exception as e:
+                self.logger.log_error(f"Closing data file failed because of unexpected exception: {e}")
             try:
                 self.function_dict["smu"][self.settings["smu"]]["smu_outputOFF"]()
                 self.function_dict["smu"][self.settings["smu"]]["smu_disconnect"]()
@@ -1031,6 +1171,7 @@ class timeIVGUI(QObject):
         settings["stopafter"] = self.settingsWidget.stopAfterLineEdit.text()
         settings["autosaveinterval"] = self.settingsWidget.autosaveLineEdit.text()
         settings["stoptimer"] = self.settingsWidget.stopTimerCheckBox.isChecked()
+        settings["hwtimed"] = self.settingsWidget.hwTimedCheckBox.isChecked()
         settings["autosave"] = self.settingsWidget.autosaveCheckBox.isChecked()
         settings["channel"] = self.settingsWidget.comboBox_channel.currentText().lower()
         currentIndex = self.settingsWidget.comboBox_channel.currentIndex()
@@ -1,6 +1,8 @@
+import threading
 import time
 from dataclasses import dataclass
 
+import numpy as np
 from threadStopped import ThreadStopped
 
 
@@ -115,16 +117,188 @@ class ManipulatorInfo:
         # since the manipulators are filtered out
 
 
+class ContactHeightCache:
+    """Contact heights found for each manipulator at sample positions.
+
+    A plane z = a*x + b*y + c is fitted by least squares over the contacts of a manipulator, it follows the tilt of the
+    sample as the measurement moves over it. The plane is used only inside the convex hull of the contacts, the fit is
+    not trusted for extrapolation. With less than MIN_FIT_POINTS contacts, so that the residual says nothing about the
+    fit, contacts on a line, or positions outside the hull, the height of the nearest contact is used.
+    """
+
+    MAX_POINTS = 32  # contacts kept per manipulator, the oldest ones are dropped
+    MIN_FIT_POINTS = 4  # contacts needed for a plane fit, three always fit exactly
+    SAME_POSITION = 1.0  # microns, a contact closer than this to a cached one replaces it
+
+    def __init__(self):
+        self._points: dict[int, list[tuple[float, float, float]]] = {}
+
+    def add(self, mm_number: int, x: float, y: float, z: float):
+        points = [p for p in self._points.get(mm_number, []) if np.hypot(p[0] - x, p[1] - y) >= self.SAME_POSITION]
+        points.append((float(x), float(y), float(z)))
+        self._points[mm_number] = points[-self.MAX_POINTS :]
+
+    def clear(self, mm_number: int | None = None):
+        """Forgets the contacts of a manipulator, or of all manipulators if mm_number is None."""
+        if mm_number is None:
+            self._points.clear()
+        else:
+            self._points.pop(mm_number, None)
+
+    def predict(self, mm_number: int, x: float, y: float) -> tuple[float, float | None] | None:
+        """Predicts the contact height at a position.
+
+        Returns:
+            tuple[float, float | None] | None: predicted height and RMS residual of the plane fit, the residual is None
+            if the height is taken from the nearest contact. None if there are no contacts for the manipulator.
+        """
+        points = self._points.get(mm_number)
+        if not points:
+            return None
+        data = np.asarray(points)
+        if len(data) >= self.MIN_FIT_POINTS and self._inside_hull(data[:, :2], x, y):
+            design = np.column_stack((data[:, 0], data[:, 1], np.ones(len(data))))
+            coefficients, _, rank, _ = np.linalg.lstsq(design, data[:, 2], rcond=None)
+            if rank == 3:
+                rms = float(np.sqrt(np.mean((design @ coefficients - data[:, 2]) ** 2)))
+                return float(coefficients @ (x, y, 1.0)), rms
+        nearest = np.argmin(np.hypot(data[:, 0] - x, data[:, 1] - y))
+        return float(data[nearest, 2]), None
+
+    @classmethod
+    def _inside_hull(cls, xy: np.ndarray, x: float, y: float) -> bool:
+        """Checks if a position is inside the convex hull of the positions xy, or within SAME_POSITION of it."""
+        # monotone chain, counterclockwise hull
+        ordered = sorted(map(tuple, xy))
+
+        def cross(o, a, b):
+            return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+        hull = []
+        for chain in (ordered, ordered[::-1]):
+            part = []
+            for p in chain:
+                while len(part) >= 2 and cross(part[-2], part[-1], p) <= 0:
+                    part.pop()
+                part.append(p)
+            hull.extend(part[:-1])
+        if len(hull) < 3:
+            return False
+        for a, b in zip(hull, hull[1:] + hull[:1]):
+            # distance of the position to the left of the edge, negative outside
+            if cross(a, b, (x, y)) / np.hypot(b[0] - a[0], b[1] - a[1]) < -cls.SAME_POSITION:
+                return False
+        return True
+
+
+class ProbeScheduler:
+    """Serializes the access of concurrently probing manipulators to the shared micromanipulator controller and SMU.
+
+    Every manipulator gets its own view of the micromanipulator methods dict. A call through the view makes the
+    manipulator active and runs the call under the same lock, so relative moves of one manipulator can not end up
+    on another one. SMU calls are serialized by a second lock, so a move of one manipulator and a resistance
+    measurement of another one may overlap.
+    """
+
+    JOIN_INTERVAL = 0.1  # seconds, waiting for workers in short joins lets ThreadStopped reach the calling thread
+
+    def __init__(self, mm: dict, smu: dict):
+        self._mm = mm
+        self._mm_lock = threading.Lock()
+        self._smu_lock = threading.Lock()
+        self._stop = threading.Event()
+        self.smu = {name: self._serialized(self._smu_lock, function) for name, function in smu.items()}
+
+    def _check_stop(self):
+        if self._stop.is_set():
+            raise ThreadStopped("Parallel probing stopped")
+
+    def _serialized(self, lock, function):
+        def call(*args, **kwargs):
+            self._check_stop()
+            with lock:
+                return function(*args, **kwargs)
+
+        return call
+
+    def mm_for(self, mm_number: int) -> dict:
+        """Returns the micromanipulator methods dict with all calls directed to manipulator mm_number."""
+
+        def on_device(function):
+            def call(*args, **kwargs):
+                self._check_stop()
+                with self._mm_lock:
+                    status, state = self._mm["mm_change_active_device"](mm_number)
+                    if status != 0:
+                        return status, state
+                    return function(*args, **kwargs)
+
+            return call
+
+        return {name: (on_device(function) if name != "mm_change_active_device" else self._serialized(self._mm_lock, function)) for name, function in self._mm.items()}
+
+    def run(self, function, infos: list) -> list:
+        """Calls function(mm, smu, info) for every manipulator in its own thread.
+
+        Args:
+            function: called with the scheduled micromanipulator view, the scheduled SMU dict and the ManipulatorInfo
+            infos (list[ManipulatorInfo]): manipulators to run
+
+        Returns:
+            list: return values of the calls in the order of infos
+
+        Raises:
+            The first exception raised by a call, after stopping the others. ThreadStopped raised in the calling
+            thread stops all workers before it is re-raised.
+        """
+        self._stop.clear()
+        results = [None] * len(infos)
+        errors = [None] * len(infos)
+
+        def worker(index, info):
+            try:
+                results[index] = function(self.mm_for(info.mm_number), self.smu, info)
+            except BaseException as e:
+                errors[index] = e
+                self._stop.set()
+
+        threads = [threading.Thread(target=worker, args=(index, info), daemon=True) for index, info in enumerate(infos)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(self.JOIN_INTERVAL)
+        except ThreadStopped:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            raise
+
+        # workers stopped because of another worker's error raise ThreadStopped, report the original error
+        raised = [e for e in errors if e is not None]
+        for e in raised:
+            if not isinstance(e, ThreadStopped):
+                raise e
+        if raised:
+            raise raised[0]
+        return results
+
+
 class touchDetect:
     MAX_CORRECTION_ATTEMPTS = 10  # maximum attempts to correct non-contacting manipulators
     MONITORING_DURATION = 2  # seconds, to monitor stability after initial contact
     APPROACH_MARGIN = 200  # microns, margin before last known position
+    PARALLEL_PROBING = True  # probe manipulators with separate SMU channels and contact detection lines at the same time
+    FINE_SEARCH_MARGIN = 30  # microns, minimum margin above a contact height predicted by a plane fit
 
     def __init__(self, log=None):
         # Store logging functions from GUI if provided
         self.log = log
         # Store last known Z positions for each manipulator
         self.last_z_positions = {}
+        # Contact heights over the sample for predicting the next approach
+        self.contact_heights = ContactHeightCache()
 
     def _log(self, message):
         if self.log:
@@ -192,62 +366,70 @@ class touchDetect:
                     error_callback(error_msg)
                 return (1, {"Error message": error_msg})
 
-            # Process each configured manipulator
-            for info in configured_manipulators:
+            # Process the configured manipulators, the ones in a batch are monitored at the same time
+            for batch in self._parallel_batches(configured_manipulators):
                 if stop_requested_callback and stop_requested_callback():
                     break
 
-                self._log(f"Starting monitoring for manipulator {info.mm_number}")
-                if progress_callback:
-                    progress_callback(f"Starting monitoring for manipulator {info.mm_number} (SMU: {info.smu_channel}, Con: {info.condet_channel}, Threshold: {info.threshold})")
+                for info in batch:
+                    self._log(f"Starting monitoring for manipulator {info.mm_number}")
+                    if progress_callback:
+                        progress_callback(f"Starting monitoring for manipulator {info.mm_number} (SMU: {info.smu_channel}, Con: {info.condet_channel}, Threshold: {info.threshold})")
 
-                # Set up measurement for this manipulator
-                status, state = self._manipulator_measurement_setup(mm, smu, con, info)
+                # Set up measurement for the manipulators of the batch
+                status, state = self._batch_measurement_setup(mm, smu, con, batch)
                 if status != 0:
                     if error_callback:
-                        error_callback(f"Failed to setup manipulator {info.mm_number}: {state}")
+                        error_callback(f"Failed to setup manipulators {[info.mm_number for info in batch]}: {state}")
                     continue
 
                 if progress_callback:
-                    progress_callback(f"MANUAL CONTROL: Move manipulator {info.mm_number} manually until contact is detected")
-                    progress_callback(f"Monitoring resistance on {info.smu_channel} with threshold {info.threshold}...")
+                    for info in batch:
+                        progress_callback(f"MANUAL CONTROL: Move manipulator {info.mm_number} manually until contact is detected")
+                        progress_callback(f"Monitoring resistance on {info.smu_channel} with threshold {info.threshold}...")
 
-                # Monitor loop for this manipulator
-                contact_detected = False
-                last_resistance_log = None
+                # Monitor loop for the manipulators of the batch
+                pending = list(batch)
+                last_resistance_log = {}
 
-                while not contact_detected and not (stop_requested_callback and stop_requested_callback()):
+                while pending and not (stop_requested_callback and stop_requested_callback()):
                     try:
-                        contacting, r = self._contacting(smu, info)
-                        if r < 0:
-                            raise Exception("Keithley HW exception")
-
-                        # Log resistance updates less frequently to avoid spam
-                        if last_resistance_log is None or abs(r - last_resistance_log) > info.threshold * 0.1:
-                            if progress_callback:
-                                progress_callback(f"Manipulator {info.mm_number} resistance: {r:.1f} Ω (threshold: {info.threshold} Ω)")
-                            last_resistance_log = r
-
-                        if contacting:
-                            # Contact detected! Save the z-position to both ManipulatorInfo and low-level storage
-                            position_data = mm["mm_current_position"]()
-                            x, y, z_position = position_data
-                            info.last_z = int(z_position)
-                            # Store in low-level dictionary for move_to_contact to use
-                            self.last_z_positions[info.mm_number] = int(z_position)
-                            self._log(f"Contact detected for manipulator {info.mm_number} at Z={z_position}")
-                            if progress_callback:
-                                progress_callback(f"Contact detected for manipulator {info.mm_number} at Z={z_position}")
-                            contact_detected = True
+                        for info in list(pending):
+                            contacting, r = self._contacting(smu, info)
+                            if r < 0:
+                                raise Exception("Keithley HW exception")
+
+                            # Log resistance updates less frequently to avoid spam
+                            last_r = last_resistance_log.get(info.mm_number)
+                            if last_r is None or abs(r - last_r) > info.threshold * 0.1:
+                                if progress_callback:
+                                    progress_callback(f"Manipulator {info.mm_number} resistance: {r:.1f} Ω (threshold: {info.threshold} Ω)")
+                                last_resistance_log[info.mm_number] = r
+
+                            if contacting:
+                                # Contact detected! Save the z-position to both ManipulatorInfo and low-level storage
+                                # the manipulator was moved by hand, read the device
+                                position_data = mm["mm_current_position"](manipulator_name=info.mm_number if len(batch) > 1 else None, verify=True)
+                                x, y, z_position = position_data
+                                info.last_z = int(z_position)
+                                # Store in low-level dictionary for move_to_contact to use
+                                self.last_z_positions[info.mm_number] = int(z_position)
+                                # a manual contact starts the height cache of the manipulator over
+                                self.contact_heights.clear(info.mm_number)
+                                self.contact_heights.add(info.mm_number, x, y, z_position)
+                                self._log(f"Contact detected for manipulator {info.mm_number} at Z={z_position}")
+                                if progress_callback:
+                                    progress_callback(f"Contact detected for manipulator {info.mm_number} at Z={z_position}")
+                                pending.remove(info)
 
                         time.sleep(0.1)
 
                     except Exception as e:
                         if error_callback:
-                            error_callback(f"Exception during monitoring for manipulator {info.mm_number}: {e!s}")
+                            error_callback(f"Exception during monitoring for manipulators {[info.mm_number for info in pending]}: {e!s}")
                         break
 
-                # Clean up for this manipulator
+                # Clean up for this batch
                 self._channels_off_single_manipulator(con, smu)
 
             if not (stop_requested_callback and stop_requested_callback()):
@@ -284,18 +466,77 @@ class touchDetect:
         if status != 0:
             return status, {"Error message": f"Failed to set up measurement: {state}"}
 
-        # move to last known position
-        status, state = self._move_manipulator_to_last_contact(mm, info)
-        if status != 0:
-            return status, {"Error message": f"Failed to move to last contact position: {state}"}
+        return self._approach_contact(mm, smu, info)
 
-        # compute the maximum move distance for the initial move
-        effective_max_distance = self.APPROACH_MARGIN + info.sample_width
+    def _approach_contact(self, mm: dict, smu: dict, info: ManipulatorInfo) -> tuple[int, dict]:
+        """Moves a manipulator with measurement already set up down until contact.
 
-        # move down until contact is detected
-        status, result = self._move_until_contact(mm, smu, info, effective_max_distance)
+        If contact heights fitted to a plane predict the contact at the current position, the manipulator is moved
+        directly to the predicted height minus a margin from the fit residual, and searched within twice the margin.
+        If the contact is not found there, the search continues down to the sample width below the prediction. If the
+        manipulator is already in contact at the start height, the prediction overshot: the manipulator is retracted by
+        APPROACH_MARGIN and the contact is searched again from there.
+        Otherwise the manipulator is moved to the last contact position minus APPROACH_MARGIN and searched from there.
+        Contacts found are added to the height cache.
+        """
+        position = self._current_position(mm)
+        prediction = self.contact_heights.predict(info.mm_number, position[0], position[1]) if position else None
+
+        if prediction is None or prediction[1] is None:
+            # move to last known position
+            status, state = self._move_manipulator_to_last_contact(mm, info)
+            if status != 0:
+                return status, {"Error message": f"Failed to move to last contact position: {state}"}
+
+            # compute the maximum move distance for the initial move
+            effective_max_distance = self.APPROACH_MARGIN + info.sample_width
+
+            # move down until contact is detected
+            status, result = self._move_until_contact(mm, smu, info, effective_max_distance)
+        else:
+            predicted_z, rms = prediction
+            margin = min(max(self.FINE_SEARCH_MARGIN, 3 * rms + 2 * info.stride), self.APPROACH_MARGIN)
+            start_z = int(predicted_z - margin)
+            self._log(f"Moving manipulator {info.mm_number} to Z={start_z}, {margin:.0f} microns above predicted contact at {predicted_z:.0f}")
+            status, state = mm["mm_move"](z=start_z)
+            if status != 0:
+                return status, {"Error message": f"Failed to move to predicted contact position: {state}"}
+
+            contacting, r = self._contacting(smu, info)
+            if contacting is True:
+                # the sample is higher than predicted, the contact height is not known from here
+                retract_z = max(0, start_z - self.APPROACH_MARGIN)
+                self._log(f"Manipulator {info.mm_number} already in contact at Z={start_z}, retracting to Z={retract_z}")
+                status, state = mm["mm_move"](z=retract_z)
+                if status != 0:
+                    return status, {"Error message": f"Failed to retract after overshooting the predicted contact: {state}"}
+                contacting, r = self._contacting(smu, info)
+                if contacting is True:
+                    return 3, {"Error message": f"Manipulator {info.mm_number} still in contact after retracting to Z={retract_z}"}
+                margin += start_z - retract_z
+            elif contacting is not False:
+                return contacting, r
+
+            # fine search around the predicted height
+            status, result = self._move_until_contact(mm, smu, info, 2 * margin)
+            if status == 3 and info.sample_width > margin:
+                self._log(f"Contact for manipulator {info.mm_number} not found near predicted height, continuing the search")
+                status, result = self._move_until_contact(mm, smu, info, info.sample_width - margin)
+
+        if status == 0:
+            position = self._current_position(mm)
+            if position:
+                self.contact_heights.add(info.mm_number, *position)
         return status, result
 
+    def _current_position(self, mm: dict) -> tuple[float, float, float] | None:
+        """Position of the active manipulator, None if it could not be read."""
+        position = mm["mm_current_position"]()
+        if len(position) != 3:
+            self._log(f"Reading manipulator position failed: {position}")
+            return None
+        return position
+
     def move_to_contact(self, mm: dict, con: dict, smu: dict, manipulator_info: list[ManipulatorInfo]):
         """Moves the specified micromanipulators to contact with the sample.
 
@@ -365,13 +606,19 @@ class touchDetect:
             # PHASE 1: Move all manipulators of type normal to contact:
             self._log("PHASE 1: Moving all manipulators to initial contact")
 
-            for info in manipulator_info:
-                self._log(f"Processing manipulator {info.mm_number} with threshold {info.threshold}, stride {info.stride}, max distance {info.sample_width}")
-                status, result = self._setup_and_move_to_contact(mm, smu, con, info)
+            for batch in self._parallel_batches(manipulator_info):
+                for info in batch:
+                    self._log(f"Processing manipulator {info.mm_number} with threshold {info.threshold}, stride {info.stride}, max distance {info.sample_width}")
+                status, state = self._batch_measurement_setup(mm, smu, con, batch)
                 if status != 0:
-                    error_msg = f"Contact detection connection failed: {result}"
+                    error_msg = f"Failed to set up measurement: {state}"
                     return (status, {"Error message": error_msg})
 
+                for status, result in self._run_batch(mm, smu, self._approach_contact, batch):
+                    if status != 0:
+                        error_msg = f"Contact detection connection failed: {result}"
+                        return (status, {"Error message": error_msg})
+
             # PHASE 2: Iterative contact verification and correction
             self._log("PHASE 2: Starting iterative contact verification")
 
@@ -390,26 +637,16 @@ class touchDetect:
                 self._log(f"Found {len(uncontacting)} non-contacting manipulators: {[m.mm_number for m in uncontacting]}")
 
                 # Move non-contacting manipulators further toward sample
-                for info in uncontacting:
-                    self._log(f"Correcting contact for manipulator {info.mm_number}")
+                for batch in self._parallel_batches(uncontacting):
+                    for info in batch:
+                        self._log(f"Correcting contact for manipulator {info.mm_number}")
 
-                    status, state = self._manipulator_measurement_setup(mm, smu, con, info)
+                    status, state = self._batch_measurement_setup(mm, smu, con, batch)
                     if status != 0:
-                        error_msg = f"Measurement setup for manipulator {info.mm_number} failed: {state}"
+                        error_msg = f"Measurement setup for manipulators {[info.mm_number for info in batch]} failed: {state}"
                         return (status, {"Error message": error_msg})
 
-                    correction_max_distance = info.stride * 8  # Limited correction distance
-
-                    # move until contact is detected using the method that does not use the last known position
-                    status, result = self._move_until_contact(mm, smu, info, correction_max_distance)
-                    if status == 0:
-                        self._log(f"Manipulator {info.mm_number} corrected successfully, starting monitoring")
-                        # After moving, monitor stability for a few seconds
-                        stable = self._monitor_contact_stability(smu, info, duration_seconds=self.MONITORING_DURATION)
-                        if stable:
-                            self._log(f"Manipulator {info.mm_number} contact is stable after correction")
-                    else:
-                        self._log(f"Failed to correct contact for manipulator {info.mm_number}: {result}")
+                    self._run_batch(mm, smu, self._correct_contact, batch)
 
             self._log("Move to contact operation completed successfully - all contacts verified and stable")
 
@@ -447,6 +684,27 @@ class touchDetect:
         finally:
             self._channels_off(con, smu)
 
+    def _correct_contact(self, mm: dict, smu: dict, info: ManipulatorInfo) -> bool:
+        """Moves a non-contacting manipulator with measurement already set up a limited distance down and monitors the new contact.
+
+        Returns:
+            bool: True if contact was found and stayed stable
+        """
+        correction_max_distance = info.stride * 8  # Limited correction distance
+
+        # move until contact is detected using the method that does not use the last known position
+        status, result = self._move_until_contact(mm, smu, info, correction_max_distance)
+        if status != 0:
+            self._log(f"Failed to correct contact for manipulator {info.mm_number}: {result}")
+            return False
+
+        self._log(f"Manipulator {info.mm_number} corrected successfully, starting monitoring")
+        # After moving, monitor stability for a few seconds
+        stable = self._monitor_contact_stability(smu, info, duration_seconds=self.MONITORING_DURATION)
+        if stable:
+            self._log(f"Manipulator {info.mm_number} contact is stable after correction")
+        return stable
+
     def _monitor_contact_stability(self, smu: dict, info: ManipulatorInfo, duration_seconds: int) -> bool:
         """
         Monitors contact stability for a specified duration after initial contact detection.
@@ -527,20 +785,21 @@ class touchDetect:
         """
         contact_status = []
 
-        for info in mi:
-            status, state = self._manipulator_measurement_setup(mm, smu, con, info)
+        for batch in self._parallel_batches(mi):
+            status, state = self._batch_measurement_setup(mm, smu, con, batch)
             if status != 0:
-                error_msg = f"Failed to set up measurement for manipulator {info.mm_number}: {state}"
+                error_msg = f"Failed to set up measurement for manipulators {[info.mm_number for info in batch]}: {state}"
                 self._log(error_msg)
                 # raised here instead of returning since _get_uncontacting is expected to return a list.
                 raise RuntimeError(error_msg)
 
-            contacting = self._monitor_contact_stability(smu, info, duration_seconds=self.MONITORING_DURATION)
-            if not contacting:
-                self._log(f"Manipulator {info.mm_number} not contacting (above threshold)")
-                contact_status.append(info)
-            else:
-                self._log(f"Manipulator {info.mm_number} is contacting")
+            stable = self._run_batch(mm, smu, lambda batch_mm, batch_smu, info: self._monitor_contact_stability(batch_smu, info, duration_seconds=self.MONITORING_DURATION), batch)
+            for info, contacting in zip(batch, stable):
+                if not contacting:
+                    self._log(f"Manipulator {info.mm_number} not contacting (above threshold)")
+                    contact_status.append(info)
+                else:
+                    self._log(f"Manipulator {info.mm_number} is contacting")
 
         return contact_status
 
@@ -626,6 +885,59 @@ class touchDetect:
 
         return (0, {"Error message": f"SMU setup successful for manipulator {mi.mm_number}"})
 
+    def _parallel_batches(self, infos: list[ManipulatorInfo]) -> list[list[ManipulatorInfo]]:
+        """Groups manipulators into batches that are probed at the same time.
+
+        Manipulators in a batch use different SMU channels and different contact detection lines, so their resistances
+        can be measured independently. Batches keep the order of infos.
+        """
+        if not self.PARALLEL_PROBING:
+            return [[info] for info in infos]
+        batches = []
+        for info in infos:
+            for batch in batches:
+                if all(info.smu_channel != other.smu_channel and info.condet_channel != other.condet_channel for other in batch):
+                    batch.append(info)
+                    break
+            else:
+                batches.append([info])
+        return batches
+
+    def _batch_measurement_setup(self, mm: dict, smu: dict, con: dict, batch: list[ManipulatorInfo]) -> tuple[int, dict]:
+        """Set up SMU channels and contact detection lines for all manipulators of a batch.
+
+        A single manipulator is also made the active one. Batches of more than one manipulator are run through
+        ProbeScheduler, which selects the manipulator for every call.
+        """
+        if len(batch) == 1:
+            return self._manipulator_measurement_setup(mm, smu, con, batch[0])
+
+        for mi in batch:
+            if mi.condet_channel not in ("Hi", "Lo"):
+                raise ValueError(f"Invalid contact detection channel {mi.condet_channel}")
+            smu_status, smu_state = smu["smu_setup_resmes"](mi.smu_channel)
+            if smu_status != 0:
+                error_msg = f"SMU setup for manipulator {mi.mm_number} failed: {smu_state}"
+                return (smu_status, {"Error message": error_msg})
+
+        con["deviceLoCheck"](False)
+        con["deviceHiCheck"](False)
+        for mi in batch:
+            con[f"device{mi.condet_channel}Check"](True)
+
+        return (0, {"Error message": f"SMU setup successful for manipulators {[mi.mm_number for mi in batch]}"})
+
+    def _run_batch(self, mm: dict, smu: dict, function, batch: list[ManipulatorInfo]) -> list:
+        """Calls function(mm, smu, info) for the manipulators of a batch, concurrently if there is more than one.
+
+        Returns:
+            list: return values in the order of the batch
+        """
+        if len(batch) == 1:
+            return [function(mm, smu, batch[0])]
+        self._log(f"Probing manipulators {[info.mm_number for info in batch]} in parallel")
+        return ProbeScheduler(mm, smu).run(function, batch)
+
     def _channels_off(self, con: dict, smu: dict):
         """Cleanup function to reset contact detection and SMU state."""
         con["deviceLoCheck"](False)
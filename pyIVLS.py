@@ -82,6 +82,12 @@ def update_settings_widget():
             pass
 
 
+@pyqtSlot(str)
+def plugin_loaded(plugin_name):
+    # a plugin registered with lazy = True was loaded on first use, add its MDI window
+    GUI_mainWindow.setMDIArea(pluginsContainer.get_plugin_info_for_MDIarea())
+
+
 ############################### main function
 
 if __name__ == "__main__":
@@ -99,6 +105,7 @@ if __name__ == "__main__":
     GUI_mainWindow.pluginloader.register_plugins_signal.connect(pluginsContainer.update_registration)
     # signals to the main window
     pluginsContainer.plugins_updated_signal.connect(update_settings_widget)
+    pluginsContainer.plugin_loaded_signal.connect(plugin_loaded)
     pluginsContainer.show_message_signal.connect(GUI_mainWindow.show_message)
     pluginsContainer.log_message.connect(GUI_mainWindow.addDataLog)
 
@@ -124,6 +131,9 @@ if __name__ == "__main__":
     # show main window, which owns all GUI widgets
     GUI_mainWindow.window.show()
 
+    # connect the instruments of plugins with autoconnect = True in the background
+    pluginsContainer.connect_instruments()
+
     # write config to file after startup if config valid. This is done to update the file if incomplete plugins resulted in an incomplete config file.
     pluginsContainer.cleanup()
 
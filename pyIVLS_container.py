@@ -1,7 +1,10 @@
 #!/usr/bin/python3.8
+import functools
 import importlib
 import logging
 import sys
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from configparser import ConfigParser
 from os.path import basename, dirname, sep
 
@@ -11,6 +14,8 @@ import pluggy
 from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
 
 from components.pyIVLS_hookspec import pyIVLS_hookspec
+from components.pyIVLS_lazyPlugin import LazyPlugin
+from components.pyIVLS_pluginRegistry import PluginRegistry
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -34,6 +39,8 @@ class pyIVLS_container(QObject):
     show_message_signal = pyqtSignal(str)
     # add info to log
     log_message = pyqtSignal(str)
+    # a plugin registered with lazy = True was loaded, its MDI window can be added
+    plugin_loaded_signal = pyqtSignal(str)
 
     def emit_log(self, message: str):
         self.logger.info(message)
@@ -212,6 +219,7 @@ class pyIVLS_container(QObject):
         self.pm.add_hookspecs(pyIVLS_hookspec)
         self.register_start_up()
         self.plugins_updated_signal.emit()
+        self.connect_instruments()
 
     @pyqtSlot()
     def save_settings(self):
@@ -300,31 +308,49 @@ class pyIVLS_container(QObject):
         # Iterate through all sections in the parser
         for plugin in self.config.sections():
             if plugin.rsplit("_", 1)[1] == "plugin":
-                option_dict = {}
-                for option in [
-                    "type",
-                    "function",
-                    "hidden",
-                    "class",
-                    "load",
-                    "dependencies",
-                    "address",
-                    "version",
-                    "load_widget",
-                ]:
-                    if self.config.has_option(plugin, option):
-                        option_dict[option] = self.config[plugin][option]
-                    else:
-                        option_dict[option] = ""
-                if self.config.has_section(f"{self.config[plugin]['name']}_settings"):
-                    option_dict["settings"] = dict(self.config.items(f"{self.config[plugin]['name']}_settings"))
-                else:
-                    option_dict["settings"] = {}
-                section_dict[self.config[plugin]["name"]] = option_dict
+                plugin_name = self.config[plugin]["name"]
+                # only plugins whose sections have changed are read again
+                section_dict[plugin_name] = self.registry.metadata(self.config, plugin_name, lambda plugin=plugin: self._plugin_metadata(plugin))
         return section_dict
 
+    def _plugin_metadata(self, plugin) -> dict:
+        """Reads the properties and settings of a plugin from the config.
+
+        Args:
+            plugin (str): section name in the ini file, aka x_plugin
+
+        Returns:
+            dict: option -> value, and settings -> dict of settings
+        """
+        option_dict = {}
+        for option in [
+            "type",
+            "function",
+            "hidden",
+            "class",
+            "load",
+            "dependencies",
+            "address",
+            "version",
+            "load_widget",
+            "lazy",
+        ]:
+            if self.config.has_option(plugin, option):
+                option_dict[option] = self.config[plugin][option]
+            else:
+                option_dict[option] = ""
+        if self.config.has_section(f"{self.config[plugin]['name']}_settings"):
+            option_dict["settings"] = dict(self.config.items(f"{self.config[plugin]['name']}_settings"))
+        else:
+            option_dict["settings"] = {}
+        return option_dict
+
+    def _plugin_folder(self, plugin_name: str) -> str:
+        return self.path + "plugins" + sep + self.config[f"{plugin_name}_plugin"].get("address", "")
+
     def _register(self, plugin) -> bool:
         """Registers a plugin with the plugin manager. Dynamically imports the plugin and creates an instance of the plugin class.
+        Plugins with lazy = True are registered as a LazyPlugin that imports the plugin on first use.
         Handles errors, checks if the plugin is already registered and if it is a dependency for another plugin.
 
         Args:
@@ -336,32 +362,142 @@ class pyIVLS_container(QObject):
         # read the plugin name from the config
         plugin_name = self.config[plugin]["name"]
 
-        module_name = f"pyIVLS_{plugin_name}"
-        class_name = f"pyIVLS_{plugin_name}_plugin"
         # add the plugin path if stored in a weird place. For future use.
         sys.path.append(self.path + "plugins" + sep + self.config[plugin]["address"])
+        # Check if the plugin is already registered
+        if self.pm.get_plugin(plugin_name) is not None:
+            # sys.path.remove(self.path + "plugins" + sep + self.config[plugin]["address"])
+            # Commented out since I think it is not needed. Might lead to issues where reloading the plugin removes the path.
+            return False
         try:
-            # Dynamic import using importlib
-            module = importlib.import_module(module_name)
-            plugin_class = getattr(module, class_name)
-            plugin_instance = plugin_class()
-            # Check if the plugin is already registered
-            if self.pm.get_plugin(plugin_name) is None:
-                # Register the plugin with the standard name to prevent multiple instances
-                self.pm.register(plugin_instance, name=plugin_name)
-                self.config[plugin]["load"] = "True"
-                self.emit_log(f"Plugin {plugin_name} loaded")
-                return True
+            if self.config[plugin].get("lazy", "False") == "True":
+                # public functions saved when the plugin was last loaded, unknown if the plugin has changed since
+                functions = list(self.registry.signatures(plugin_name, self._plugin_folder(plugin_name)) or [])
+                settings_section = f"{plugin_name}_settings"
+                settings = dict(self.config.items(settings_section)) if self.config.has_section(settings_section) else {}
+                plugin_instance = LazyPlugin(
+                    plugin_name,
+                    self.config[plugin].get("function", ""),
+                    functions,
+                    settings,
+                    factory=lambda: self._create_plugin(plugin),
+                    on_loaded=self._lazy_plugin_loaded,
+                )
+            else:
+                plugin_instance = self._create_plugin(plugin)
+            # Register the plugin with the standard name to prevent multiple instances
+            self.pm.register(plugin_instance, name=plugin_name)
+            self.config[plugin]["load"] = "True"
+            if isinstance(plugin_instance, LazyPlugin):
+                self.emit_log(f"Plugin {plugin_name} registered, loading on first use")
             else:
-                # sys.path.remove(self.path + "plugins" + sep + self.config[plugin]["address"])
-                # Commented out since I think it is not needed. Might lead to issues where reloading the plugin removes the path.
-                return False
+                self.emit_log(f"Plugin {plugin_name} loaded")
+            return True
         except (ImportError, AttributeError) as e:
             self.emit_error(f"Failed to load plugin {plugin_name}: {e}")
             self.config[plugin]["load"] = "False"
             sys.path.remove(self.path + "plugins" + sep + self.config[plugin]["address"])
             return False
 
+    def _create_plugin(self, plugin):
+        """Imports the plugin module and creates an instance of the plugin class. The time taken is logged and saved in load_times.
+
+        Args:
+            plugin (str): section name in the ini file, aka x_plugin
+
+        Returns:
+            object: plugin instance
+        """
+        plugin_name = self.config[plugin]["name"]
+        module_name = f"pyIVLS_{plugin_name}"
+        class_name = f"pyIVLS_{plugin_name}_plugin"
+        start = time.perf_counter()
+        # Dynamic import using importlib
+        module = importlib.import_module(module_name)
+        imported = time.perf_counter()
+        plugin_instance = getattr(module, class_name)()
+        created = time.perf_counter()
+        # modules imported in the thread pool at startup were timed there
+        import_time = self._import_times.pop(plugin_name, imported - start)
+        self.load_times[plugin_name] = (import_time, created - imported)
+        logger.info(f"Plugin {plugin_name} imported in {import_time:.2f} s, initialized in {created - imported:.2f} s")
+        return plugin_instance
+
+    def _dependency_levels(self, plugins: list) -> list[list]:
+        """Orders plugins by their dependencies. The plugins in a level only depend on plugins in the earlier levels.
+
+        Args:
+            plugins (list): section names in the ini file, aka x_plugin
+
+        Returns:
+            list[list]: levels of section names
+        """
+        providers = {}
+        for plugin in plugins:
+            dependencies = [dep.strip() for dep in self.config[plugin].get("dependencies", "").split(",") if dep.strip()]
+            providers[plugin] = {other for other in plugins if other != plugin and self.config[other].get("function") in dependencies}
+        levels = []
+        done = set()
+        remaining = list(plugins)
+        while remaining:
+            level = [plugin for plugin in remaining if providers[plugin] <= done]
+            if not level:
+                self.emit_error(f"Circular dependencies between plugins {remaining}")
+                level = remaining
+            levels.append(level)
+            done.update(level)
+            remaining = [plugin for plugin in remaining if plugin not in done]
+        return levels
+
+    def _import_plugin_module(self, plugin) -> None:
+        """Imports the module of a plugin and saves the time taken. Runs in the import thread pool, errors are left for _register to report.
+
+        Args:
+            plugin (str): section name in the ini file, aka x_plugin
+        """
+        plugin_name = self.config[plugin]["name"]
+        start = time.perf_counter()
+        try:
+            importlib.import_module(f"pyIVLS_{plugin_name}")
+        except Exception as e:
+            logger.debug(f"Import of plugin {plugin_name} in the thread pool failed: {e}")
+            return
+        self._import_times[plugin_name] = time.perf_counter() - start
+
+    def _import_plugins(self, levels: list[list]) -> None:
+        """Imports the modules of the plugins in a thread pool, one dependency level at a time.
+        Plugins are only imported here, the instances are created in the GUI thread by _register since they create widgets.
+
+        Args:
+            levels (list[list]): section names in the ini file from _dependency_levels
+        """
+        with ThreadPoolExecutor(thread_name_prefix="pluginImport") as pool:
+            for level in levels:
+                level = [plugin for plugin in level if self.config[plugin].get("lazy", "False") != "True"]
+                for plugin in level:
+                    address = self.path + "plugins" + sep + self.config[plugin]["address"]
+                    if address not in sys.path:
+                        sys.path.append(address)
+                # barrier, a level is imported after the plugins it depends on
+                list(pool.map(self._import_plugin_module, level))
+
+    def _lazy_plugin_loaded(self, lazy_plugin: LazyPlugin, missing):
+        """Called when a plugin registered with lazy = True has been loaded on first use."""
+        import_time, init_time = self.load_times.get(lazy_plugin.name, (0.0, 0.0))
+        self.emit_log(f"Plugin {lazy_plugin.name} loaded on first use in {import_time + init_time:.2f} s")
+        if missing and missing.get(lazy_plugin.name):
+            self.emit_error(f"Plugin {lazy_plugin.name} is missing dependencies: {missing[lazy_plugin.name]}")
+        # the stand-ins collected before loading are replaced by the real functions
+        self.registry.forget(lazy_plugin.name)
+        functions = sorted(lazy_plugin._functions)
+        if functions != sorted(lazy_plugin.function_names):
+            # the plugin has changed since its functions were saved, give the others the real ones
+            lazy_plugin.function_names = functions
+            self.public_function_exchange()
+        else:
+            self.registry.functions(lazy_plugin.name, lazy_plugin, self._plugin_folder(lazy_plugin.name))
+        self.plugin_loaded_signal.emit(lazy_plugin.name)
+
     def _unregister(self, plugin: str, reg_list: list | None = None) -> bool:
         """unregisters a plugin with the plugin manager. Checks if the plugin is a dependency for another plugin.
         Handles errors.
@@ -388,6 +524,7 @@ class pyIVLS_container(QObject):
                     return False
                 # if not, unregister the plugin
                 self.pm.unregister(plugin_instance)
+                self.registry.forget(plugin_name)
                 self.config[plugin]["load"] = "False"
                 self.emit_log(f"Plugin {plugin_name} unloaded")
                 return True
@@ -401,15 +538,25 @@ class pyIVLS_container(QObject):
             return False
 
     def register_start_up(self):
-        """Checks the .ini file for saved settings and registers all plugins that are set to load on startup."""
+        """Checks the .ini file for saved settings and registers all plugins that are set to load on startup.
+        The plugin modules are imported in a thread pool in dependency order before the plugins are registered."""
         self.config = ConfigParser()
         self.config.read(self.path + self.configFileName)
+        start = time.perf_counter()
+        # sections contain at least _settings and _plugin, extract the ones that are plugins:
+        plugins = [plugin for plugin in self.config.sections() if plugin.rsplit("_", 1)[1] == "plugin" and self.config[plugin]["load"] == "True"]
+        levels = self._dependency_levels(plugins)
+        self._import_plugins(levels)
         # FIXME: Naive implementation. If a pluginload fails on startup, it's not retried. This makes it possible for the user™ to break something.
-        for plugin in self.config.sections():
-            # sections contain at least _settings and _plugin, extract the ones that are plugins:
-            _, type = plugin.rsplit("_", 1)
-            if type == "plugin" and self.config[plugin]["load"] == "True":
+        for level in levels:
+            for plugin in level:
                 self._register(plugin)
+        deferred = [name for name, instance in self.pm.list_name_plugin() if isinstance(instance, LazyPlugin) and not instance.loaded]
+        slowest = sorted(self.load_times.items(), key=lambda item: -sum(item[1]))[:3]
+        message = f"Plugins registered in {time.perf_counter() - start:.2f} s, {len(deferred)} deferred until first use."
+        if slowest:
+            message += " Slowest: " + ", ".join(f"{name} {sum(times):.2f} s" for name, times in slowest)
+        self.emit_log(message)
 
         # everything is loaded, exchange public functions
         self.public_function_exchange()
@@ -417,14 +564,27 @@ class pyIVLS_container(QObject):
         self.cleanup()
 
     def public_function_exchange(self):
+        """Gives the public functions of the plugins to the plugins that depend on them.
+        The exchange is differential: set_function is only called for newly registered plugins and for plugins whose
+        dependencies gained, lost or replaced a provider since the last exchange."""
         # Get all the plugin public functions by plugin name
         if self.pm.list_name_plugin() == []:
+            self._function_providers = {}
+            self._exchanged_plugins = {}
             return  # No plugins registered, nothing to do
-        plugin_public_functions = self.pm.hook.get_functions()
+        # the functions are collected once per plugin instance, only newly registered plugins are asked
+        plugin_public_functions = []
+        for plugin_name, plugin_instance in self.pm.list_name_plugin():
+            stand_in = isinstance(plugin_instance, LazyPlugin) and not plugin_instance.loaded
+            functions = self.registry.functions(plugin_name, plugin_instance, self._plugin_folder(plugin_name), save_signatures=not stand_in)
+            if functions:
+                plugin_public_functions.append(functions)
         function_map = {}
+        self.public_functions = {}
 
         for single_dict in plugin_public_functions:
             for plugin_name, methods in single_dict.items():
+                self.public_functions[plugin_name] = methods
                 plugin_function = self.config[plugin_name + "_plugin"]["function"]
 
                 if plugin_function not in function_map:
@@ -440,14 +600,116 @@ class pyIVLS_container(QObject):
                         # Add to existing nested structure
                         function_map[plugin_function][plugin_name] = methods
 
-        ret = self.pm.hook.set_function(function_dict=function_map)
-        for plg_ret in ret:
-            for plugin_name, missing in plg_ret.items():
+        changed_functions = self._changed_functions(function_map)
+        notified = []
+        exchanged_plugins = {}
+        for plugin_name, plugin_instance in self.pm.list_name_plugin():
+            exchanged_plugins[plugin_name] = plugin_instance
+            if not hasattr(plugin_instance, "set_function"):
+                continue
+            if self._exchanged_plugins.get(plugin_name) is plugin_instance and not self._depends_on(plugin_name, changed_functions):
+                continue
+            notified.append(plugin_name)
+            plg_ret = plugin_instance.set_function(function_dict=function_map)
+            for name, missing in (plg_ret or {}).items():
                 if missing:
-                    self.emit_error(f"Plugin {plugin_name} is missing dependencies: {missing}")
-                    self.show_message_signal.emit(f"Plugin {plugin_name} is missing one of the following dependencies: {missing}. Running without these dependencies WILL cause errors.")
+                    self.emit_error(f"Plugin {name} is missing dependencies: {missing}")
+                    self.show_message_signal.emit(f"Plugin {name} is missing one of the following dependencies: {missing}. Running without these dependencies WILL cause errors.")
+        self._exchanged_plugins = exchanged_plugins
+        logger.debug(f"Public functions exchanged, changed functions: {sorted(changed_functions)}, plugins updated: {notified}")
+
+        if changed_functions or notified:
+            self.seqComponents_signal.emit(self.get_plugin_dict(), plugin_public_functions)
 
-        self.seqComponents_signal.emit(self.get_plugin_dict(), plugin_public_functions)
+    def _changed_functions(self, function_map: dict) -> set:
+        """Plugin functions whose providers have changed since the last exchange, and saves the current providers.
+
+        Args:
+            function_map (dict): plugin function -> plugin name -> public methods
+
+        Returns:
+            set: plugin functions that gained, lost or replaced a provider
+        """
+        previous = self._function_providers
+        changed = set()
+        for plugin_function in previous.keys() | function_map.keys():
+            old = previous.get(plugin_function, {})
+            new = function_map.get(plugin_function, {})
+            # the methods are collected once per plugin instance, a new dict means a new or reloaded plugin
+            if old.keys() != new.keys() or any(old[plugin_name] is not new[plugin_name] for plugin_name in new):
+                changed.add(plugin_function)
+        self._function_providers = {plugin_function: dict(providers) for plugin_function, providers in function_map.items()}
+        return changed
+
+    def _depends_on(self, plugin_name: str, plugin_functions: set) -> bool:
+        """Checks if a plugin depends on any of the plugin functions. Plugins that do not declare dependencies in the .ini file
+        may use any function."""
+        if not plugin_functions:
+            return False
+        section = f"{plugin_name}_plugin"
+        if not self.config.has_option(section, "dependencies"):
+            return True
+        dependencies = {dep.strip() for dep in self.config[section]["dependencies"].split(",") if dep.strip()}
+        return bool(dependencies & plugin_functions)
+
+    def connect_instruments(self) -> list[Future]:
+        """Connects the instruments of the plugins with autoconnect = True concurrently in background threads.
+        The connect option of the plugin section names the public function that connects the instrument. The settings
+        widgets are parsed with the public parse_settings_widget of the plugin here in the GUI thread, and the connect
+        function is called with parse_settings=False in a background thread, so that only the blocking open runs there.
+        Called after the settings widgets are built.
+
+        Returns:
+            list[Future]: one future per connect function, the result is the return value of the function
+        """
+        connects = {}
+        for plugin in self.config.sections():
+            if plugin.rsplit("_", 1)[1] != "plugin" or self.config[plugin].get("autoconnect", "False") != "True":
+                continue
+            plugin_name = self.config[plugin]["name"]
+            plugin_instance = self.pm.get_plugin(plugin_name)
+            if plugin_instance is None:
+                continue
+            if isinstance(plugin_instance, LazyPlugin) and not plugin_instance.loaded:
+                self.emit_log(f"Plugin {plugin_name} is loaded on first use, not connecting its instrument at startup")
+                continue
+            connect_name = self.config[plugin].get("connect", "")
+            connect_function = self.public_functions.get(plugin_name, {}).get(connect_name)
+            if connect_function is None:
+                self.emit_error(f"Plugin {plugin_name} has no public function '{connect_name}' to connect its instrument")
+                continue
+            parse_settings = self.public_functions[plugin_name].get("parse_settings_widget")
+            if parse_settings is not None:
+                status, info = parse_settings()[:2]
+                if status:
+                    message = info.get("Error message", info) if isinstance(info, dict) else info
+                    self.emit_error(f"Failed to read the settings of plugin {plugin_name}, not connecting its instrument: {message}")
+                    continue
+            connects[plugin_name] = functools.partial(connect_function, parse_settings=False)
+        if not connects:
+            return []
+        pool = ThreadPoolExecutor(max_workers=len(connects), thread_name_prefix="instrumentConnect")
+        futures = [pool.submit(self._connect_instrument, plugin_name, connect_function) for plugin_name, connect_function in connects.items()]
+        # the threads finish the connects, the GUI is not kept waiting
+        pool.shutdown(wait=False)
+        return futures
+
+    def _connect_instrument(self, plugin_name: str, connect_function):
+        """Calls the connect function of a plugin and logs the result. Runs in a connect thread."""
+        start = time.perf_counter()
+        try:
+            ret = connect_function()
+        except Exception as e:
+            self.emit_error(f"Failed to connect the instrument of plugin {plugin_name}: {e}")
+            return (4, {"Error message": f"{e}"})
+        status, info = ret[0], ret[1]
+        if status:
+            message = info.get("Error message", info) if isinstance(info, dict) else info
+            self.emit_error(f"Failed to connect the instrument of plugin {plugin_name}: {message}")
+            self.show_message_signal.emit(f"Plugin {plugin_name} could not connect its instrument: {message}")
+        else:
+            self.emit_log(f"Plugin {plugin_name} connected its instrument in {time.perf_counter() - start:.2f} s")
+        return ret
 
     def getLogSignals(self):
         plugin_logSignals = self.pm.hook.get_log()
@@ -577,9 +839,21 @@ class pyIVLS_container(QObject):
         self.pm = pluggy.PluginManager("pyIVLS")
         self.pm.add_hookspecs(pyIVLS_hookspec)
         self.logger = logger
+        # plugin name -> (import time, init time) in seconds
+        self.load_times: dict[str, tuple[float, float]] = {}
+        # plugin name -> import time in seconds, for modules imported in the thread pool at startup
+        self._import_times: dict[str, float] = {}
+        # plugin name -> public functions, from the last function exchange
+        self.public_functions: dict[str, dict] = {}
+        # state of the last function exchange: plugin function -> plugin name -> public methods, and plugin name -> instance given the functions
+        self._function_providers: dict[str, dict] = {}
+        self._exchanged_plugins: dict[str, object] = {}
+        # metadata and public functions of the plugins, the signature tables are saved next to the config
+        self.registry = PluginRegistry(self.path + "plugin_registry.json")
 
     def cleanup(self) -> None:
         """Explicitly cleanup resources, such as writing the config file."""
         config_path = self.path + self.configFileName
         with open(config_path, "w") as configfile:
             self.config.write(configfile)
+        self.registry.save()
@@ -28,6 +28,8 @@ class pyIVLS_pluginloader(QtWidgets.QDialog):
         else:
             self.window: QtWidgets.QDialog = window_option
             self.table_widget: QtWidgets.QTableWidget = self.window.pluginList
+            # plugin properties shown in the table, rows are only rebuilt for plugins that changed
+            self._shown_plugins: dict[str, dict] = {}
             # Link buttons
             self.applyButton.clicked.connect(self.apply)
             self.uploadButton.clicked.connect(self.upload)
@@ -55,17 +57,28 @@ class pyIVLS_pluginloader(QtWidgets.QDialog):
     def populate_list(self, plugins: dict[str, dict[str, str]]):
         """Populates the list of plugins in the plugin GUI. This is called from the container signal "available_plugins_signal".
 
+        Only the rows of plugins whose properties have changed are rebuilt, unless plugins were added or removed.
+
         Args:
             plugins (dict): dictionary of plugin information from the container.
         """
-        self.table_widget.clear()
-        self.table_widget.setRowCount(len(plugins))
-        self.table_widget.setColumnCount(7)
+        if list(plugins) != list(self._shown_plugins):
+            self.table_widget.clear()
+            self.table_widget.setRowCount(len(plugins))
+            self.table_widget.setColumnCount(7)
 
-        # set header labels
-        self.table_widget.setHorizontalHeaderLabels(["load", "hidden", "Plugin Name", "Type", "Version", "Function", "Dependencies"])
+            # set header labels
+            self.table_widget.setHorizontalHeaderLabels(["load", "hidden", "Plugin Name", "Type", "Version", "Function", "Dependencies"])
+            self._shown_plugins = {}
 
+        changed = False
         for row, (item, properties) in enumerate(plugins.items()):
+            if self._shown_plugins.get(item) == properties:
+                # reset the checkboxes to the applied state, they may have been changed without applying
+                self.table_widget.item(row, 0).setCheckState(Qt.CheckState.Checked if properties["load"] == "True" else Qt.CheckState.Unchecked)
+                self.table_widget.item(row, 1).setCheckState(Qt.CheckState.Checked if properties["hidden"] == "True" else Qt.CheckState.Unchecked)
+                continue
+            changed = True
             # Create the items for each column
             load_item = QtWidgets.QTableWidgetItem()
             hidden_item = QtWidgets.QTableWidgetItem()
@@ -89,7 +102,9 @@ class pyIVLS_pluginloader(QtWidgets.QDialog):
             self.table_widget.setItem(row, 4, version_item)
             self.table_widget.setItem(row, 5, function_item)
             self.table_widget.setItem(row, 6, dependencies_item)
-        self.table_widget.resizeColumnsToContents()
+        self._shown_plugins = dict(plugins)
+        if changed:
+            self.table_widget.resizeColumnsToContents()
         # self.table_widget.resizeRowsToContents()
 
 
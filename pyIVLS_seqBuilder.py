@@ -15,6 +15,7 @@ from PyQt6 import uic
 from PyQt6.QtCore import QModelIndex, QObject, Qt, pyqtSignal, pyqtSlot
 from PyQt6.QtGui import QAction, QStandardItem, QStandardItemModel
 from PyQt6.QtWidgets import QFileDialog, QMenu
+from pyIVLS_seqProgram import SequenceExecutor, compile_recipe
 from threadStopped import ThreadStopped, thread_with_exception
 
 logger = logging.getLogger(__name__)
@@ -37,11 +38,6 @@ class pyIVLS_seqBuilder(QObject):
         else:
             raise TypeError("seqBuilder: Tried to assign a non-QStandardItem")
 
-    # flags
-
-    skip_iteration = False
-    # should be set when a skippable exceptions occurs in the sequence
-
     #### Signals for communication
 
     info_message = pyqtSignal(str)
@@ -75,6 +71,8 @@ class pyIVLS_seqBuilder(QObject):
                         self.available_instructions[plugin] = {
                             "class": class_list,
                             "functions": functions[plugin],
+                            "function": plugin_dict[plugin].get("function", ""),
+                            "dependencies": {dependency.strip() for dependency in plugin_dict[plugin].get("dependencies", "").split(",") if dependency.strip()},
                         }
                         break
         self.widget.comboBox_function.currentIndexChanged.connect(self.update_classView)
@@ -93,7 +91,6 @@ class pyIVLS_seqBuilder(QObject):
         ui_file_name = path + "components" + sep + "pyIVLS_seqBuilder.ui"
         self.widget = uic.loadUi(ui_file_name)
         self.path = path
-        self.skip_iteration = False
         self.logger = logger
 
         self._connect_signals()
@@ -475,71 +472,16 @@ class pyIVLS_seqBuilder(QObject):
         return data
 
     def _runParser(self):
-        """Runs the sequence parser, iterates through the sequence and executes the steps."""
+        """Runs the sequence parser. The sequence is compiled to a flat program once and the program is executed."""
         try:
-            # Ensure a previous stop/error does not leak skip state into a new run.
-            self.skip_iteration = False
             ###############Main logic of iteration: 0 - no iterations, 1 - only start point, 2 - start end end point, iterstep = (end-start)/(iternum -1).The same is used in sweepCommon for drainVoltage. !!!Adapt to logic of iteration, do not modify it!!!
             self.logger.info("sequence parser started")
             data = self.extract_data(self.model.invisibleRootItem().child(0))
-            stackData = copy.deepcopy(data)  #### it is necessary to make sure that we did not modify original data
-            looping = []  # this will keep track of the steps inside the loop, every element is a dict[{looping -the steps to repeat, loopFunction - looping Function, totalSteps - number of steps in loop, currentStep, totalIterations, currentIteration}]
-            # stackData has the extracted data from the model
-            # looping has the current loop
-            while (stackData != []) or (looping != []):
-                if looping != []:
-                    if looping[-1]["currentStep"] == 0:
-                        [status, iterText] = self.available_instructions[looping[-1]["loopFunction"]]["functions"]["loopingIteration"](looping[-1]["currentIteration"])
-                        if status:
-                            raise ValueError(iterText)
-                        looping[-1]["namePostfix"] = iterText
-                        looping[-1]["currentIteration"] = looping[-1]["currentIteration"] + 1
-                        looping[-1]["currentStep"] = looping[-1]["currentStep"] + 1
-                        # Reset skip flag at the start of each new iteration
-                        self.skip_iteration = False
-                    elif looping[-1]["currentStep"] == looping[-1]["totalSteps"]:
-                        if looping[-1]["currentIteration"] < looping[-1]["totalIterations"]:
-                            looping[-1]["currentStep"] = 0
-                            stackData = looping[-1]["looping"] + stackData
-                        else:
-                            looping.pop(-1)
-                        continue
-                    else:
-                        looping[-1]["currentStep"] = looping[-1]["currentStep"] + 1
-                stackItem = stackData.pop(0)
-                nextStepFunction = stackItem["function"]
-                nextStepSettings = stackItem["settings"]
-                nextStepClass = stackItem["class"]
-                self.available_instructions[nextStepFunction]["functions"]["setSettings"](nextStepSettings)
-                if nextStepClass == "step":
-                    # If skip flag is set, skip all steps until next iteration boundary
-                    if self.skip_iteration:
-                        continue
-                    namePostfix = ""
-                    for loopItem in looping:
-                        namePostfix = namePostfix + loopItem["namePostfix"]
-                    [status, message] = self.available_instructions[nextStepFunction]["functions"]["sequenceStep"](namePostfix)
-                    if status:
-                        # Set skip flag and continue skipping steps until next iteration
-                        self.skip_iteration = True
-                        # Inform user and continue to process control flow
-                        self.logger.info(f"Skipping iteration due to step error: {message}")
-                        continue
-                if nextStepClass == "loop":
-                    iter = self.available_instructions[nextStepFunction]["functions"]["getIterations"]()
-                    looping.append(
-                        {
-                            "looping": stackItem["looping"],
-                            "loopFunction": nextStepFunction,
-                            "totalSteps": len(stackItem["looping"]),
-                            "currentStep": 0,
-                            "totalIterations": iter,
-                            "currentIteration": 0,
-                            "namePostfix": "",
-                        }
-                    )
-                    stackData = stackItem["looping"] + stackData
-            self.logger.info("Sequence parser finished")
+            # the settings are copied, so that the plugins can not modify the original data
+            program = compile_recipe(copy.deepcopy(data))
+            executor = SequenceExecutor(program, self.available_instructions)
+            executor.run()
+            self.logger.info(f"Sequence parser finished, settings set {executor.settings_pushed} times, {executor.settings_skipped} unchanged settings not set again")
             self._sigSeqEnd.emit()
         except ThreadStopped as ts:
             self.logger.info(f"Sequence stopped: {ts}")
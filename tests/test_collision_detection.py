@@ -10,6 +10,7 @@ import os
 import sys
 from unittest.mock import Mock
 
+import numpy as np
 import pytest
 
 # Add the plugins directory to the path so we can import the module
@@ -241,6 +242,54 @@ class TestCollisionDetector:
         collision = detector.check_move_collision(moves)
         assert collision is False
 
+    def test_check_move_collision_thin_obstacle(self, detector):
+        """Test that an obstacle thinner than a trajectory step is not passed through"""
+        detector.set_manipulator_bounding_box(0, [(-0.1, -0.1), (0.1, 0.1)])
+        detector.set_manipulator_bounding_box(1, [(-0.1, -5), (0.1, 5)])
+        detector.update_manipulator_tip_position(1, 52.5, 0.0)
+
+        # a box at every 1/20 of the move misses the obstacle
+        moves = {0: ((0.0, 0.0), (100.0, 0.0))}
+        assert detector.check_move_collision(moves) is True
+
+    def test_first_collision_time_and_pair(self, detector, square_corners):
+        """Test first contact of simultaneous moves over all pairs"""
+        for idx, x in enumerate([0.0, 10.0, 20.0]):
+            detector.set_manipulator_bounding_box(idx, square_corners)
+            detector.update_manipulator_tip_position(idx, x, 0.0)
+
+        # 0 and 1 approach head on and touch when the gap of 8 is closed, 2 moves away
+        moves = {0: ((0.0, 0.0), (10.0, 0.0)), 1: ((10.0, 0.0), (0.0, 0.0)), 2: ((20.0, 0.0), (20.0, 10.0))}
+        time, pair = detector.first_collision(moves)
+        assert time == pytest.approx(0.4)
+        assert pair == (0, 1)
+
+        # moving in parallel, and passing at touching distance, is no collision
+        assert detector.first_collision({0: ((0.0, 0.0), (0.0, 5.0)), 1: ((10.0, 0.0), (10.0, 5.0))}) is None
+        assert detector.first_collision({0: ((0.0, 2.0), (20.0, 2.0))}) is None
+
+    def test_first_collision_covers_sampled_check(self, detector):
+        """Test that every collision found at trajectory samples is found by the swept check"""
+        rng = np.random.default_rng(1)
+        for _ in range(200):
+            detector.bounding_boxes.clear()
+            for idx in range(3):
+                width, height = rng.uniform(0.5, 3.0, 2)
+                detector.set_manipulator_bounding_box(idx, [(-width, -height), (width, height)])
+                detector.update_manipulator_tip_position(idx, *rng.uniform(-10, 10, 2))
+            box = detector.bounding_boxes[0]
+            start = (box.tip_x, box.tip_y)
+            target = tuple(rng.uniform(-10, 10, 2))
+
+            sampled = False
+            for x, y in detector._generate_linear_trajectory(start, target, 50):
+                box.move_bbox(x, y)
+                sampled = sampled or any(box.colliding_with(detector.bounding_boxes[other]) for other in (1, 2))
+            box.move_bbox(*start)
+
+            if sampled:
+                assert detector.check_move_collision({0: (start, target)}) is True
+
     def test_generate_linear_trajectory(self, detector):
         """Test linear trajectory generation"""
         start = (0.0, 0.0)
@@ -323,6 +372,53 @@ class TestCollisionDetector:
         # Should return empty list for impossible moves
         assert sequence == []
 
+    def test_planner_orders_chain_of_moves(self, detector, square_corners):
+        """Test that eight manipulators each moving into the place of the next are ordered front to back"""
+        moves = {}
+        for idx in range(8):
+            detector.set_manipulator_bounding_box(idx, square_corners)
+            moves[idx] = ((3.0 * idx, 0.0), (3.0 * idx + 3.0, 0.0))
+
+        sequence = detector.generate_safe_movement_sequence(moves)
+
+        # direct moves only, the manipulator in front goes first
+        assert sequence == [(idx, moves[idx][1]) for idx in reversed(range(8))]
+        assert detector._test_complete_sequence(sequence, moves)
+
+    def test_planner_swap_steps_aside(self, detector, square_corners):
+        """Test that two manipulators swapping places on a line get one out of the way"""
+        detector.set_manipulator_bounding_box(0, square_corners)
+        detector.set_manipulator_bounding_box(1, square_corners)
+        moves = {0: ((0.0, 0.0), (10.0, 0.0)), 1: ((10.0, 0.0), (0.0, 0.0))}
+
+        sequence = detector.generate_safe_movement_sequence(moves)
+
+        assert len(sequence) == 3
+        assert detector._test_complete_sequence(sequence, moves)
+        # positions are restored after planning
+        assert (detector.get_bounding_box(0).tip_x, detector.get_bounding_box(1).tip_x) == (0.0, 10.0)
+
+    def test_planner_prefers_shortest_detour(self, detector, square_corners):
+        """Test that a corner move is used instead of stepping aside when a diagonal move is blocked"""
+        detector.set_manipulator_bounding_box(0, square_corners)
+        detector.set_manipulator_bounding_box(1, square_corners)
+        detector.update_manipulator_tip_position(1, 5.0, 5.0)
+        moves = {0: ((0.0, 0.0), (10.0, 10.0))}
+
+        sequence = detector.generate_safe_movement_sequence(moves)
+
+        assert sequence in ([(0, (10.0, 0.0)), (0, (10.0, 10.0))], [(0, (0.0, 10.0)), (0, (10.0, 10.0))])
+
+    def test_all_manipulators_at_target(self, detector, square_corners):
+        """Test that manipulators already at their targets get the trivial sequence, not a failure"""
+        detector.set_manipulator_bounding_box(0, square_corners)
+        detector.set_manipulator_bounding_box(1, square_corners)
+        moves = {0: ((0.0, 0.0), (0.0, 0.0)), 1: ((10.0, 0.0), (10.0, 0.0))}
+
+        sequence = detector.generate_safe_movement_sequence(moves)
+
+        assert sequence == [(0, (0.0, 0.0)), (1, (10.0, 0.0))]
+
     def test_create_segmented_moves(self, detector):
         """Test breaking moves into X and Y components"""
         moves = {0: ((0.0, 0.0), (5.0, 3.0)), 1: ((10.0, 5.0), (15.0, 8.0))}
@@ -0,0 +1,156 @@
+"""
+Tests for the startup of pyIVLS_container.py
+
+This module tests the dependency levels used to import plugins in parallel, the import thread pool,
+and the concurrent connection of instruments of plugins with autoconnect = True.
+"""
+
+import os
+import sys
+import threading
+import time
+from configparser import ConfigParser
+
+import pytest
+
+# Add the repository root to the path so we can import the container
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    import pluggy
+    from PyQt6.QtWidgets import QApplication
+
+    from pyIVLS_container import pyIVLS_container
+
+    # Create QApplication if it doesn't exist (needed for queued signals)
+    if not QApplication.instance():
+        app = QApplication(sys.argv)
+    else:
+        app = QApplication.instance()
+except ImportError as e:
+    pytest.skip(f"Cannot import required modules: {e}", allow_module_level=True)
+
+
+def make_config(plugins: dict) -> ConfigParser:
+    """plugins: section name -> plugin options"""
+    config = ConfigParser()
+    config.read_dict(plugins)
+    return config
+
+
+class FakeInstrument:
+    hookimpl = pluggy.HookimplMarker("pyIVLS")
+
+    def __init__(self, name, delay, status=0, parse_status=0):
+        self.name = name
+        self.delay = delay
+        self.status = status
+        self.parse_status = parse_status
+        self.threads = []
+        self.parse_threads = []
+
+    def parse_settings_widget(self):
+        self.parse_threads.append(threading.current_thread().name)
+        return (self.parse_status, {"Error message": "bad address"} if self.parse_status else {})
+
+    def connect(self, parse_settings=True):
+        if parse_settings:
+            self.parse_settings_widget()
+        self.threads.append(threading.current_thread().name)
+        time.sleep(self.delay)
+        return (self.status, {"Error message": "OK" if self.status == 0 else "no device"})
+
+    @hookimpl
+    def get_functions(self, args=None):
+        return {self.name: {"connect": self.connect, "parse_settings_widget": self.parse_settings_widget}}
+
+
+@pytest.fixture
+def container():
+    return pyIVLS_container()
+
+
+class TestStartup:
+    """Test the parallel startup of the container."""
+
+    def test_dependency_levels(self, container):
+        """Test that plugins are ordered after the plugins providing their dependencies."""
+        container.config = make_config(
+            {
+                "sweep_plugin": {"name": "sweep", "function": "script", "dependencies": "smu, spectrometer"},
+                "Keithley_plugin": {"name": "Keithley", "function": "smu"},
+                "TLCCS_plugin": {"name": "TLCCS", "function": "spectrometer"},
+                "affine_plugin": {"name": "affine", "function": "positioning", "dependencies": "camera"},
+                "touch_plugin": {"name": "touch", "function": "touch", "dependencies": "positioning,smu"},
+            }
+        )
+        levels = container._dependency_levels(container.config.sections())
+        assert levels == [["Keithley_plugin", "TLCCS_plugin", "affine_plugin"], ["sweep_plugin", "touch_plugin"]]
+
+    def test_circular_dependencies(self, container):
+        """Test that plugins depending on each other are put in the same level."""
+        container.config = make_config(
+            {
+                "a_plugin": {"name": "a", "function": "fa", "dependencies": "fb"},
+                "b_plugin": {"name": "b", "function": "fb", "dependencies": "fa"},
+                "c_plugin": {"name": "c", "function": "fc"},
+            }
+        )
+        assert container._dependency_levels(container.config.sections()) == [["c_plugin"], ["a_plugin", "b_plugin"]]
+
+    def test_import_plugins(self, container, tmp_path):
+        """Test that plugin modules are imported in the pool and failures are left for registration."""
+        for name, source in (("fastplug", "VALUE = 1\n"), ("brokenplug", "raise ImportError('broken')\n")):
+            (tmp_path / "plugins" / name).mkdir(parents=True)
+            (tmp_path / "plugins" / name / f"pyIVLS_{name}.py").write_text(source)
+        container.path = str(tmp_path) + os.sep
+        container.config = make_config(
+            {
+                "fastplug_plugin": {"name": "fastplug", "function": "f", "address": "fastplug"},
+                "brokenplug_plugin": {"name": "brokenplug", "function": "g", "address": "brokenplug", "dependencies": "f"},
+            }
+        )
+        container._import_plugins(container._dependency_levels(container.config.sections()))
+        assert "pyIVLS_fastplug" in sys.modules
+        assert "fastplug" in container._import_times
+        assert "brokenplug" not in container._import_times
+
+    def test_connect_instruments(self, container):
+        """Test that instruments connect concurrently and only for plugins with autoconnect = True."""
+        container.config = make_config(
+            {
+                "smu_plugin": {"name": "smu", "function": "smu", "connect": "connect", "autoconnect": "True"},
+                "stage_plugin": {"name": "stage", "function": "mm", "connect": "connect", "autoconnect": "True"},
+                "spec_plugin": {"name": "spec", "function": "spectrometer", "connect": "connect", "autoconnect": "False"},
+                "temp_plugin": {"name": "temp", "function": "temperature", "connect": "connect", "autoconnect": "True"},
+            }
+        )
+        instruments = {
+            "smu": FakeInstrument("smu", 0.3),
+            "stage": FakeInstrument("stage", 0.3, status=4),
+            "spec": FakeInstrument("spec", 0.0),
+            "temp": FakeInstrument("temp", 0.0, parse_status=1),
+        }
+        for name, instrument in instruments.items():
+            container.pm.register(instrument, name=name)
+        container.public_function_exchange()
+        messages = []
+        container.show_message_signal.connect(messages.append)
+
+        start = time.perf_counter()
+        futures = container.connect_instruments()
+        assert time.perf_counter() - start < 0.2
+        results = [future.result(5) for future in futures]
+        assert time.perf_counter() - start < 0.55
+
+        assert sorted(status for status, _ in results) == [0, 4]
+        assert instruments["spec"].threads == []
+        assert instruments["smu"].threads != instruments["stage"].threads
+        # the settings widgets are parsed in the GUI thread only, a plugin with bad settings is not connected
+        main_thread = threading.current_thread().name
+        assert all(instruments[name].parse_threads == [main_thread] for name in ("smu", "stage", "temp"))
+        assert instruments["temp"].threads == []
+        assert main_thread not in instruments["smu"].threads
+        # messages from the connect threads are queued to the GUI thread
+        app.processEvents()
+        assert len(messages) == 1 and "stage" in messages[0]
@@ -0,0 +1,124 @@
+"""
+Tests for the public function exchange of pyIVLS_container.py
+
+This module tests that the exchange only calls set_function for newly registered plugins and for plugins whose
+declared dependencies gained, lost or replaced a provider.
+"""
+
+import os
+import sys
+from configparser import ConfigParser
+
+import pytest
+
+# Add the repository root to the path so we can import the container
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    import pluggy
+
+    from pyIVLS_container import pyIVLS_container
+except ImportError as e:
+    pytest.skip(f"Cannot import required modules: {e}", allow_module_level=True)
+
+
+class FakePlugin:
+    hookimpl = pluggy.HookimplMarker("pyIVLS")
+
+    def __init__(self, name):
+        self.name = name
+        self.received = []
+
+    def ping(self):
+        return self.name
+
+    @hookimpl
+    def get_functions(self, args=None):
+        return {self.name: {"ping": self.ping}}
+
+    @hookimpl
+    def set_function(self, function_dict):
+        self.received.append(function_dict)
+        return {self.name: []}
+
+
+@pytest.fixture
+def container():
+    container = pyIVLS_container()
+    container.config = ConfigParser()
+    container.config.read_dict(
+        {
+            "Keithley_plugin": {"name": "Keithley", "function": "smu", "dependencies": ""},
+            "smu2_plugin": {"name": "smu2", "function": "smu", "dependencies": ""},
+            "TLCCS_plugin": {"name": "TLCCS", "function": "spectrometer", "dependencies": ""},
+            "sweep_plugin": {"name": "sweep", "function": "script", "dependencies": "smu"},
+            "specSMU_plugin": {"name": "specSMU", "function": "script", "dependencies": "smu, spectrometer"},
+            "camera_plugin": {"name": "camera", "function": "camera", "dependencies": ""},
+            "affine_plugin": {"name": "affine", "function": "positioning", "dependencies": "camera"},
+        }
+    )
+    return container
+
+
+def register(container, *names):
+    plugins = {name: FakePlugin(name) for name in names}
+    for name, plugin in plugins.items():
+        container.pm.register(plugin, name=name)
+    return plugins
+
+
+class TestFunctionExchange:
+    """Test the differential public function exchange."""
+
+    def test_only_affected_plugins_are_updated(self, container):
+        """Test that adding and removing a provider only updates the plugins depending on its function."""
+        plugins = register(container, "Keithley", "TLCCS", "sweep", "specSMU", "camera", "affine")
+        emitted = []
+        container.seqComponents_signal.connect(lambda plugin_dict, functions: emitted.append(functions))
+        container.public_function_exchange()
+        assert all(len(plugin.received) == 1 for plugin in plugins.values())
+        assert list(plugins["sweep"].received[0]["smu"]) == ["Keithley"]
+
+        # nothing changed, nobody is updated
+        container.public_function_exchange()
+        assert all(len(plugin.received) == 1 for plugin in plugins.values())
+        assert len(emitted) == 1
+
+        # a second smu provider reaches the smu users only
+        plugins.update(register(container, "smu2"))
+        container.public_function_exchange()
+        counts = {name: len(plugin.received) for name, plugin in plugins.items()}
+        assert counts == {"Keithley": 1, "TLCCS": 1, "sweep": 2, "specSMU": 2, "camera": 1, "affine": 1, "smu2": 1}
+        assert sorted(plugins["specSMU"].received[-1]["smu"]) == ["Keithley", "smu2"]
+        assert len(emitted) == 2
+
+        # removing the camera updates affine only
+        container.pm.unregister(plugins["camera"])
+        container.registry.forget("camera")
+        container.public_function_exchange()
+        counts = {name: len(plugin.received) for name, plugin in plugins.items()}
+        assert counts == {"Keithley": 1, "TLCCS": 1, "sweep": 2, "specSMU": 2, "camera": 1, "affine": 2, "smu2": 1}
+        assert "camera" not in plugins["affine"].received[-1]
+
+    def test_reloaded_provider(self, container):
+        """Test that a provider registered again as a new instance updates its dependents."""
+        plugins = register(container, "Keithley", "sweep", "TLCCS")
+        container.public_function_exchange()
+        container.pm.unregister(plugins["Keithley"])
+        container.registry.forget("Keithley")
+        reloaded = register(container, "Keithley")["Keithley"]
+        container.public_function_exchange()
+        assert len(plugins["sweep"].received) == 2
+        assert len(plugins["TLCCS"].received) == 1
+        assert plugins["sweep"].received[-1]["smu"]["Keithley"]["ping"]() == "Keithley"
+        assert plugins["sweep"].received[-1]["smu"]["Keithley"]["ping"].__self__ is reloaded
+
+    def test_undeclared_dependencies(self, container):
+        """Test that a plugin without a dependencies option is updated on every change."""
+        container.config.remove_option("camera_plugin", "dependencies")
+        plugins = register(container, "camera", "Keithley")
+        container.public_function_exchange()
+        register(container, "TLCCS")
+        container.public_function_exchange()
+        assert len(plugins["camera"].received) == 2
+        assert len(plugins["Keithley"].received) == 1
@@ -417,3 +417,178 @@ class TestKeithley2612B:
         assert "mockb.measure.nplc = 0.01" not in self.commands_sent
         assert "mockb.source.highc = mockb.ENABLE" not in self.commands_sent
 
+
+    def test_tsp_cache_uploads_script_once(self):
+        """Test that the TSP script is uploaded once and each step is a single command."""
+        self.keithley.keithley_connect("", "", "MOCK", "")
+        self.keithley.use_tsp_cache = True
+
+        settings = dict(STANDARD_SETTINGS)
+        self.keithley.keithley_init(settings)
+
+        assert "loadscript pyIVLS_setup" in self.commands_sent
+        assert "endscript" in self.commands_sent
+        assert self.commands_sent[-1].startswith("pyivls_init({")
+
+        self.commands_sent.clear()
+        self.keithley.keithley_init(settings)
+        self.keithley.keithley_run_sweep(settings)
+
+        assert len(self.commands_sent) == 2
+        assert self.commands_sent[0].startswith("pyivls_init({")
+        assert self.commands_sent[1].startswith("pyivls_sweep({")
+
+    def test_tsp_cache_skips_upload_when_loaded(self):
+        """Test that the script is not uploaded if the instrument reports the current version."""
+        from Keithley2612B import TSP_SCRIPT_VERSION
+
+        self.keithley.keithley_connect("", "", "MOCK", "")
+        self.keithley.backend = "Ethernet"  # version is queried only for real backends
+        self.keithley.safequery = lambda command: f"{TSP_SCRIPT_VERSION}\n" if "pyivls_version" in command else "OK"
+        self.keithley.use_tsp_cache = True
+
+        self.keithley.keithley_init(dict(STANDARD_SETTINGS))
+
+        assert "loadscript pyIVLS_setup" not in self.commands_sent
+        assert len(self.commands_sent) == 1
+
+    def test_tsp_cache_checks_upload(self):
+        """Test that the uploaded version is cached only if the instrument reports the functions as defined."""
+        from Keithley2612B import TSP_SCRIPT_VERSION
+
+        self.keithley.keithley_connect("", "", "MOCK", "")
+        self.keithley.backend = "Ethernet"
+        self.keithley.use_tsp_cache = True
+        self.keithley.safequery = lambda command: "nil\n"
+
+        with pytest.raises(ValueError):
+            self.keithley.keithley_init(dict(STANDARD_SETTINGS))
+        assert "loadscript pyIVLS_setup" in self.commands_sent
+        assert not any(command.startswith("pyivls_init(") for command in self.commands_sent)
+        assert self.keithley.tsp_loaded_version is None
+
+        # the script is defined after the next upload
+        self.commands_sent.clear()
+        replies = iter(["nil\n", f"{TSP_SCRIPT_VERSION}\n"])
+        self.keithley.safequery = lambda command: next(replies)
+        self.keithley.keithley_init(dict(STANDARD_SETTINGS))
+        assert "loadscript pyIVLS_setup" in self.commands_sent
+        assert self.keithley.tsp_loaded_version == TSP_SCRIPT_VERSION
+
+    def test_tsp_table_reserved_keys(self):
+        """Test that settings are converted to a TSP table with quoted keys and lua literals."""
+        from Keithley2612B import to_tsp_table
+
+        table = to_tsp_table({"source": "smua", "end": 1.5, "repeat": 2, "pulse": False, "delay": "auto"})
+
+        assert table == '{["source"] = "smua", ["end"] = 1.5, ["repeat"] = 2, ["pulse"] = false, ["delay"] = true}'
+
+    def test_read_buffers_binary(self):
+        """Test that binary buffer transfer is decoded into (current, voltage) rows and format is restored to ASCII."""
+        import numpy as np
+
+        self.keithley.keithley_connect("", "", "MOCK", "")
+        self.keithley.backend = "Ethernet"
+        self.keithley.transfer_format = "REAL64"
+        expected = np.arange(20, dtype=float).reshape(10, 2)
+        queries = []
+
+        def mock_safequery_binary(command, nbytes):
+            queries.append((command, nbytes))
+            return b"#0" + expected.astype("<f8").tobytes() + b"\n"
+
+        self.keithley.safequery_binary = mock_safequery_binary
+
+        iv = self.keithley.read_buffers("smua")
+
+        assert np.array_equal(iv, expected)
+        assert queries == [("printbuffer(1, 10, smua.nvbuffer1, smua.nvbuffer2)", 2 + 20 * 8 + 1)]
+        assert "format.data = format.REAL64" in self.commands_sent
+        assert self.commands_sent[-1] == "format.data = format.ASCII"
+
+    def test_stream_buffers_reads_new_ranges(self):
+        """Test that the stream reads only the readings that appeared since the previous chunk."""
+        import numpy as np
+
+        self.keithley.keithley_connect("", "", "MOCK", "")
+        self.keithley.backend = "Ethernet"
+        counts = iter(["3", "3", "5"])
+        queries = []
+
+        def mock_safequery(command):
+            queries.append(command)
+            if command.startswith("printbuffer"):
+                first, last = (int(value) for value in command[len("printbuffer(") :].split(",")[:2])
+                return ",".join(str(float(value)) for value in range(3 * first, 3 * (last + 1)))
+            return next(counts)
+
+        self.keithley.safequery = mock_safequery
+
+        chunks = [source for source, drain in self.keithley.stream_buffers("smua", 5, interval=0)]
+
+        assert [len(chunk) for chunk in chunks] == [3, 2]
+        assert np.array_equal(chunks[1][0], [12.0, 13.0, 14.0])
+        assert "printbuffer(1, 3, smua.nvbuffer1, smua.nvbuffer2, smua.nvbuffer1.timestamps)" in queries
+        assert "printbuffer(4, 5, smua.nvbuffer1, smua.nvbuffer2, smua.nvbuffer1.timestamps)" in queries
+
+    def test_get_ivs_single_query(self):
+        """Test that both channels are measured with overlapped measurements in a single query."""
+        self.keithley.keithley_connect("", "", "MOCK", "")
+        self.keithley.backend = "Ethernet"
+        queries = []
+
+        def mock_safequery(command):
+            queries.append(command)
+            return "1e-3\t0.5\t100.25\t2e-3\t1.5\t100.2500004\n"
+
+        self.keithley.safequery = mock_safequery
+
+        ivs = self.keithley.getIVs(["smua", "smub"])
+
+        assert len(queries) == 1
+        assert "smua.measure.overlappediv(smua.nvbuffer1, smua.nvbuffer2) smub.measure.overlappediv(smub.nvbuffer1, smub.nvbuffer2) waitcomplete()" in queries[0]
+        assert ivs.shape == (2, 3)
+        assert ivs[1, 0] == 2e-3
+        assert ivs[1, 2] - ivs[0, 2] < 1e-3
+
+    def test_run_timed_paces_both_channels_with_timer(self):
+        """Test that both channels are measured on the timer events and the readings are limited by the buffer capacity."""
+        self.keithley.keithley_connect("", "", "MOCK", "")
+        self.keithley.backend = "Ethernet"
+        self.keithley.safequery = lambda command: "1000\n"
+
+        points = self.keithley.keithley_run_timed({"source": "smua", "drain": "smub", "single_ch": False, "period": 0.5, "points": 5000})
+
+        assert points == 1000
+        assert "trigger.timer[1].delay = 0.5" in self.commands_sent
+        assert "trigger.timer[1].count = 999" in self.commands_sent
+        assert "smua.trigger.measure.stimulus = trigger.timer[1].EVENT_ID" in self.commands_sent
+        assert "smub.trigger.measure.stimulus = trigger.timer[1].EVENT_ID" in self.commands_sent
+        assert "smua.trigger.source.action = smua.DISABLE" in self.commands_sent
+        # drain waits for the timer before the source starts it
+        assert self.commands_sent.index("smub.trigger.initiate()") < self.commands_sent.index("smua.trigger.initiate()")
+
+    def test_stream_buffers_absolute_timestamps(self):
+        """Test that basetimestamp is queried once and added to the timestamps."""
+        import numpy as np
+
+        self.keithley.keithley_connect("", "", "MOCK", "")
+        self.keithley.backend = "Ethernet"
+        counts = iter(["2", "4"])
+        queries = []
+
+        def mock_safequery(command):
+            queries.append(command)
+            if command.startswith("printbuffer"):
+                first, last = (int(value) for value in command[len("printbuffer(") :].split(",")[:2])
+                return ",".join(f"0,0,{index}" for index in range(first, last + 1))
+            if "basetimestamp" in command:
+                return "100.0\n"
+            return next(counts)
+
+        self.keithley.safequery = mock_safequery
+
+        chunks = [source for source, drain in self.keithley.stream_buffers("smua", 4, interval=0, absolute=True)]
+
+        assert np.array_equal(np.vstack(chunks)[:, 2], [101.0, 102.0, 103.0, 104.0])
+        assert sum("basetimestamp" in query for query in queries) == 1
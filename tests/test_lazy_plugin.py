@@ -0,0 +1,130 @@
+"""
+Tests for pyIVLS_lazyPlugin.py
+
+This module tests that a LazyPlugin answers the hooks from the .ini data before the plugin is loaded,
+loads the plugin on the first call of a public function, and loads it in the GUI thread when called from a worker.
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+# Add the repository root to the path so we can import the components package
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    import pluggy
+    from PyQt6.QtCore import QObject, QThread, pyqtSignal
+    from PyQt6.QtWidgets import QApplication, QLabel
+
+    from components.pyIVLS_hookspec import pyIVLS_hookspec
+    from components.pyIVLS_lazyPlugin import LazyPlugin
+
+    # Create QApplication if it doesn't exist (needed for Qt widgets)
+    if not QApplication.instance():
+        app = QApplication(sys.argv)
+    else:
+        app = QApplication.instance()
+
+except ImportError as e:
+    pytest.skip(f"Cannot import required modules: {e}", allow_module_level=True)
+
+
+class FakePlugin(QObject):
+    """Plugin with one public function, created by the factory of the LazyPlugin."""
+
+    log = pyqtSignal(str)
+
+    def __init__(self):
+        super().__init__()
+        self.function_dict = None
+        self.thread_created = QThread.currentThread()
+
+    def get_setup_interface(self, plugin_data):
+        return {"fake": QLabel("settings")}
+
+    def get_functions(self, args=None):
+        return {"fake": {"double": lambda x: (0, 2 * x)}}
+
+    def set_function(self, function_dict):
+        self.function_dict = function_dict
+        return {"fake": []}
+
+    def get_log(self, args=None):
+        return {"fake": self.log}
+
+    def get_plugin_settings(self, args=None):
+        return ("fake", 0, {"value": "from widget"})
+
+
+@pytest.fixture
+def created():
+    return []
+
+
+@pytest.fixture
+def lazy(created):
+    def factory():
+        created.append(FakePlugin())
+        return created[-1]
+
+    return LazyPlugin("fake", "test", ["double"], {"value": "from ini"}, factory)
+
+
+class TestLazyPlugin:
+    """Test the LazyPlugin class."""
+
+    def test_hooks_before_load(self, lazy, created):
+        """Test that the hooks are answered from the .ini data without loading the plugin."""
+        pm = pluggy.PluginManager("pyIVLS")
+        pm.add_hookspecs(pyIVLS_hookspec)
+        pm.register(lazy, name="fake")
+        functions = pm.hook.get_functions(args={"function": "test"})
+        assert list(functions[0]["fake"]) == ["double"]
+        assert pm.hook.get_plugin_settings(args={"function": "test"}) == [("fake", 0, {"value": "from ini"})]
+        assert pm.hook.get_MDI_interface() == []
+        pm.hook.set_function(function_dict={"other": {}})
+        assert not created
+
+    def test_stub_loads_plugin(self, lazy, created):
+        """Test that calling a public function loads the plugin once and forwards the call and signals."""
+        loaded = []
+        lazy._on_loaded = lambda plugin, missing: loaded.append(missing)
+        lazy.set_function({"other": {}})
+        stub = lazy.get_functions()["fake"]["double"]
+        messages = []
+        lazy.log_signal.connect(messages.append)
+        assert stub(3) == (0, 6)
+        assert stub(4) == (0, 8)
+        assert len(created) == 1
+        assert loaded == [{"fake": []}]
+        assert created[0].function_dict == {"other": {}}
+        created[0].log.emit("hello")
+        assert messages == ["hello"]
+        assert lazy.get_plugin_settings() == ("fake", 0, {"value": "from widget"})
+
+    def test_failed_load(self):
+        """Test that a plugin that fails to import reports status 3 from its stubs."""
+
+        def factory():
+            raise ImportError("no module named fake")
+
+        lazy = LazyPlugin("fake", "test", ["double"], {}, factory)
+        status, state = lazy.get_functions()["fake"]["double"](1)
+        assert status == 3
+        assert "no module named fake" in state["Error message"]
+        assert not lazy.loaded
+
+    def test_load_from_worker_thread(self, lazy, created):
+        """Test that a call from a worker thread loads the plugin in the GUI thread."""
+        stub = lazy.get_functions()["fake"]["double"]
+        result = []
+        worker = threading.Thread(target=lambda: result.append(stub(5)))
+        worker.start()
+        while worker.is_alive():
+            app.processEvents()
+            worker.join(0.01)
+        assert result == [(0, 10)]
+        assert created[0].thread_created is app.thread()
@@ -0,0 +1,107 @@
+"""
+Tests for MplCanvas.py
+
+This module tests the following classes:
+- MplCanvas: coalesced, rate-limited live plot updates
+- LiveTrace: preallocated min/max decimating buffer for live plot lines
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add the components directory to the path so we can import the module
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "components"))
+
+try:
+    from PyQt6.QtWidgets import QApplication  # matplotlib selects the Qt binding that is already imported
+
+    from MplCanvas import LiveTrace, MplCanvas
+
+    if not QApplication.instance():
+        app = QApplication(sys.argv)
+    else:
+        app = QApplication.instance()
+except ImportError as e:
+    pytest.skip(f"Cannot import required modules: {e}", allow_module_level=True)
+
+
+class TestMplCanvas:
+    """Test the live plot API of MplCanvas."""
+
+    def test_requests_are_coalesced(self):
+        """Test that several requests before the rendering produce a single frame."""
+        canvas = MplCanvas()
+        rendered = []
+        canvas.draw = lambda: rendered.append(True)
+
+        for _ in range(10):
+            canvas.request_draw()
+        canvas._render()
+
+        assert len(rendered) == 1
+        assert not canvas._pending
+
+    def test_live_artists_are_blitted(self):
+        """Test that after a full draw only the live artists are redrawn while the axes limits are the same."""
+        canvas = MplCanvas()
+        axes = canvas.fig.add_subplot(111)
+        axes.set_xlim(0, 1)
+        axes.set_ylim(0, 1)
+        line = canvas.add_live_artist(axes.plot([0, 1], [0, 1])[0])
+        canvas.draw()
+        full_draws = []
+        canvas.draw = lambda: full_draws.append(True)
+        blits = []
+        canvas.blit = lambda bbox=None: blits.append(bbox)
+
+        line.set_data([0, 1], [1, 0])
+        canvas._render()
+        assert not full_draws
+        assert len(blits) == 1
+
+        axes.set_ylim(0, 2)
+        canvas._render()
+        assert len(full_draws) == 1
+
+
+class TestLiveTrace:
+    """Test the LiveTrace buffer."""
+
+    def test_short_run_is_not_decimated(self):
+        """Test that all samples are plotted while the buffer is not full."""
+        trace = LiveTrace(capacity=100)
+        trace.extend([0.0, 1.0, 2.0], [5.0, 6.0, 7.0])
+
+        x, y = trace.data()
+
+        assert np.array_equal(np.unique(x), [0.0, 1.0, 2.0])
+        assert trace.stride == 1
+
+    def test_long_run_is_bounded(self):
+        """Test that the number of points is limited by the capacity and x stays sorted."""
+        trace = LiveTrace(capacity=64)
+        x = np.arange(100000.0)
+        trace.extend(x, np.sin(x / 300))
+
+        x_plot, y_plot = trace.data()
+
+        assert len(x_plot) <= trace.capacity + 2
+        assert np.all(np.diff(x_plot) >= 0)
+        assert trace.count == 100000
+
+    def test_spikes_are_kept(self):
+        """Test that the min/max decimation keeps single sample extremes."""
+        trace = LiveTrace(capacity=16)
+        y = np.zeros(10000)
+        y[1234] = 10.0
+        y[8765] = -3.0
+        trace.extend(np.arange(10000.0), y)
+
+        x_plot, y_plot = trace.data()
+
+        assert y_plot.max() == 10.0
+        assert y_plot.min() == -3.0
+        assert x_plot[np.argmax(y_plot)] == 1234.0
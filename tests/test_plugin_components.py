@@ -3,6 +3,8 @@ Comprehensive tests for plugin_components.py
 
 This module tests the following classes:
 - FileManager: File header creation functionality
+- DataFileWriter: Incremental writing of measurement data
+- IntegrationTimeSolver: Model based search for spectrometer integration time
 - DependencyManager: Plugin dependency management and validation
 - LoggingHelper: Logging functionality with Qt signals
 - DataOrder: Enum for data ordering
@@ -22,8 +24,10 @@ try:
     import sys
 
     from plugin_components import (
+        DataFileWriter,
         DependencyManager,
         FileManager,
+        IntegrationTimeSolver,
         LoggingHelper,
         PluginException,
         filter_to_valid_methods,
@@ -150,6 +154,117 @@ class TestFileManager:
         assert "No sample name test" in header
 
 
+class TestDataFileWriter:
+    """Test the DataFileWriter class for appending measurement data."""
+
+    def test_header_and_rows_match_csv_format(self, tmp_path):
+        """Test that appended rows are written in the same format as the complete file saves."""
+        import pandas as pd
+
+        address = tmp_path / "data.dat"
+        rows = [[0.0, 1e-3, 0.5], [1.0, -2e-3, 0.25]]
+        with DataFileWriter(str(address), "#header\nstime, IS, VS") as writer:
+            writer.append(rows[0])
+            writer.append(rows[1:])
+            assert writer.rows == 2
+
+        expected = tmp_path / "expected.dat"
+        with open(expected, "w") as f:
+            f.write("#header\nstime, IS, VS" + "\n")
+            pd.DataFrame(rows).to_csv(f, index=False, header=False, float_format="%.12e", sep=",")
+        assert address.read_text() == expected.read_text()
+
+    def test_rows_are_flushed_on_append(self, tmp_path):
+        """Test that appended data is visible in the file before close."""
+        address = tmp_path / "data.dat"
+        writer = DataFileWriter(str(address), "#header")
+        writer.append([1.0, 2.0])
+        assert address.read_text().splitlines()[-1] == "1.000000000000e+00,2.000000000000e+00"
+        writer.close()
+        writer.close()
+        assert writer.closed
+
+    def test_sync_interval(self, tmp_path):
+        """Test that data is synced to the disk only when the sync interval has passed."""
+        writer = DataFileWriter(str(tmp_path / "data.dat"), "#header", sync_interval=3600)
+        with patch("plugin_components.os.fsync") as fsync:
+            writer.append([1.0])
+            fsync.assert_not_called()
+            writer._last_sync -= 3600
+            writer.append([2.0])
+            fsync.assert_called_once()
+        writer.close()
+
+
+class TestIntegrationTimeSolver:
+    """Test the IntegrationTimeSolver class on a linear detector with saturation."""
+
+    @staticmethod
+    def solve(solver, cps, guess, key=None, dark=0.0, sample=None):
+        """Runs the solver against a detector with peak = dark + cps * t clipped to 1, returns (result, time, exposures)."""
+        t = solver.start(guess, key=key, sample=sample)
+        for exposure in range(1, 11):
+            result, t_next = solver.update(t, min(dark + cps * t, 1.0))
+            if result != "next":
+                return result, t, exposure
+            t = t_next
+        return result, t, exposure
+
+    def test_linear_detector_needs_few_exposures(self):
+        """Test that the linear model finds the range far from the initial guess in two exposures."""
+        solver = IntegrationTimeSolver(0.004, 30, 0.2, 0.8)
+        result, t, exposures = self.solve(solver, cps=0.05, guess=0.01)
+        assert result == "done"
+        assert 0.2 <= 0.05 * t <= 0.8
+        assert exposures == 2
+
+    def test_secant_corrects_offset(self):
+        """Test that a dark offset, which makes the proportional step miss, is corrected by the secant step."""
+        solver = IntegrationTimeSolver(0.004, 30, 0.2, 0.8)
+        result, t, exposures = self.solve(solver, cps=0.05, guess=0.01, dark=0.02)
+        assert result == "done"
+        assert 0.2 <= 0.02 + 0.05 * t <= 0.8
+        assert exposures <= 3
+
+    def test_saturated_exposure_falls_back_to_bisection(self):
+        """Test that a saturated exposure is not used for the model and the range is still found."""
+        solver = IntegrationTimeSolver(0.004, 30, 0.2, 0.8)
+        result, t, exposures = self.solve(solver, cps=50.0, guess=15.0)
+        assert result == "done"
+        assert 0.2 <= 50.0 * t <= 0.8
+        assert exposures <= 6
+
+    def test_limits(self):
+        """Test that too high and too low are reported at the time limits."""
+        solver = IntegrationTimeSolver(0.004, 30, 0.2, 0.8)
+        assert self.solve(solver, cps=0.001, guess=1.0)[0] == "too high"
+        assert self.solve(solver, cps=1e4, guess=1.0)[0] == "too low"
+
+    def test_cached_rate_seeds_next_solve(self):
+        """Test that the signal rate of a successful solve is used as the initial guess."""
+        solver = IntegrationTimeSolver(0.004, 30, 0.2, 0.8)
+        self.solve(solver, cps=2.0, guess=0.01, key=1.0)
+        assert solver.start(0.01, key=1.0) == pytest.approx(0.5 / 2.0)
+        # unknown key, the last cached rate is used
+        assert solver.start(0.01, key=2.0) == pytest.approx(0.5 / 2.0)
+        assert self.solve(solver, cps=2.0, guess=0.01, key=1.0)[2] == 1
+
+    def test_cache_is_per_sample_and_bounded(self):
+        """Test that rates of one sample do not seed solves of another and that old entries are dropped."""
+        solver = IntegrationTimeSolver(0.004, 30, 0.2, 0.8, max_cached=2)
+        self.solve(solver, cps=2.0, guess=0.01, key=1.0, sample="a")
+        # unknown sample, the guess is used
+        assert solver.start(0.01, key=1.0, sample="b") == pytest.approx(0.01)
+        self.solve(solver, cps=4.0, guess=0.01, key=1.0, sample="b")
+        assert solver.start(0.01, key=2.0, sample="a") == pytest.approx(0.5 / 2.0)
+        assert solver.start(0.01, key=2.0, sample="b") == pytest.approx(0.5 / 4.0)
+        # the least recently used entry (a, 1.0) is dropped
+        solver.start(0.01, key=1.0, sample="b")
+        self.solve(solver, cps=8.0, guess=0.01, key=3.0, sample="b")
+        assert len(solver.cache) == 2
+        assert ("a", 1.0) not in solver.cache
+
+
 class TestFilterToValidMethods:
     """Test filtering of function dictionaries by required methods."""
 
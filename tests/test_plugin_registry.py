@@ -0,0 +1,117 @@
+"""
+Tests for pyIVLS_pluginRegistry.py
+
+This module tests that plugin metadata is read again only when the .ini sections change, that public functions are
+collected once per plugin instance, and that the saved signature tables follow the plugin folder.
+"""
+
+import os
+import sys
+from configparser import ConfigParser
+
+import pytest
+
+# Add the components directory to the path so we can import the module
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "components"))
+
+try:
+    from pyIVLS_pluginRegistry import PluginRegistry
+except ImportError as e:
+    pytest.skip(f"Cannot import required modules: {e}", allow_module_level=True)
+
+
+class FakePlugin:
+    def __init__(self):
+        self.calls = 0
+
+    def move(self, x, y=None):
+        return (0, {"Error message": "OK"})
+
+    def get_functions(self, args=None):
+        self.calls += 1
+        return {"fake": {"move": self.move}}
+
+
+@pytest.fixture
+def config():
+    config = ConfigParser()
+    config.read_dict({"fake_plugin": {"name": "fake", "load": "True"}, "fake_settings": {"speed": "1"}})
+    return config
+
+
+@pytest.fixture
+def folder(tmp_path):
+    folder = tmp_path / "fake"
+    folder.mkdir()
+    (folder / "pyIVLS_fake.py").write_text("")
+    return str(folder)
+
+
+class TestPluginRegistry:
+    """Test the PluginRegistry class."""
+
+    def test_metadata_rebuilt_on_change(self, tmp_path, config):
+        """Test that metadata is built again only when the ini sections change, and copies are returned."""
+        registry = PluginRegistry(str(tmp_path / "registry.json"))
+        builds = []
+
+        def build():
+            builds.append(1)
+            return {"load": config["fake_plugin"]["load"], "settings": dict(config["fake_settings"])}
+
+        first = registry.metadata(config, "fake", build)
+        first["settings"]["speed"] = "changed"
+        assert registry.metadata(config, "fake", build)["settings"]["speed"] == "1"
+        assert len(builds) == 1
+        config["fake_settings"]["speed"] = "2"
+        assert registry.metadata(config, "fake", build)["settings"]["speed"] == "2"
+        assert len(builds) == 2
+
+    def test_functions_collected_once_per_instance(self, tmp_path, folder):
+        """Test that the functions of a plugin instance are collected once, and again for a new instance or after forget."""
+        registry = PluginRegistry(str(tmp_path / "registry.json"))
+        plugin = FakePlugin()
+        for _ in range(3):
+            assert list(registry.functions("fake", plugin, folder)["fake"]) == ["move"]
+        assert plugin.calls == 1
+        registry.forget("fake")
+        registry.functions("fake", plugin, folder)
+        assert plugin.calls == 2
+        other = FakePlugin()
+        registry.functions("fake", other, folder)
+        assert other.calls == 1
+
+    def test_signatures_saved_and_invalidated(self, tmp_path, folder):
+        """Test that the signature table survives a restart and is dropped when a plugin file changes."""
+        cache_file = str(tmp_path / "registry.json")
+        registry = PluginRegistry(cache_file)
+        registry.functions("fake", FakePlugin(), folder)
+        registry.save()
+
+        restarted = PluginRegistry(cache_file)
+        assert restarted.signatures("fake", folder) == {"move": "(x, y=None)"}
+        assert restarted.signatures("other", folder) is None
+
+        module = os.path.join(folder, "pyIVLS_fake.py")
+        mtime = os.stat(module).st_mtime_ns + 10**9
+        os.utime(module, ns=(mtime, mtime))
+        assert restarted.signatures("fake", folder) is None
+
+    def test_stand_in_functions_do_not_replace_signatures(self, tmp_path, folder):
+        """Test that functions collected with save_signatures=False leave the saved table alone."""
+        registry = PluginRegistry(str(tmp_path / "registry.json"))
+        registry.functions("fake", FakePlugin(), folder)
+
+        class StandIn:
+            def get_functions(self, args=None):
+                return {"fake": {"move": lambda *args, **kwargs: None}}
+
+        registry.forget("fake")
+        registry.functions("fake", StandIn(), folder, save_signatures=False)
+        assert registry.signatures("fake", folder) == {"move": "(x, y=None)"}
+
+    def test_broken_cache_file(self, tmp_path):
+        """Test that a broken cache file leaves the registry empty."""
+        cache_file = tmp_path / "registry.json"
+        cache_file.write_text("{not json")
+        assert PluginRegistry(str(cache_file)).signatures("fake", str(tmp_path)) is None
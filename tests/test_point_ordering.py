@@ -0,0 +1,61 @@
+"""
+Tests for measurement point ordering in affineMove.
+
+This module tests the travel cost and the nearest neighbour + 2-opt ordering of measurement points.
+"""
+
+import itertools
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add the plugins directory to the path so we can import the module
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "plugins", "affineMove"))
+
+try:
+    from pointOrdering import order_points, path_cost, travel_cost_matrix
+except ImportError as e:
+    pytest.skip(f"Cannot import required modules: {e}", allow_module_level=True)
+
+
+class TestPointOrdering:
+    """Test cases for the point ordering functions"""
+
+    def test_travel_cost_sums_manipulators(self):
+        """Test that the cost of a move is the sum of the distances of all manipulators"""
+        points = [[(0, 0), (10, 0)], [(3, 4), (10, 1)]]
+        cost = travel_cost_matrix(points)
+        assert cost[0, 1] == pytest.approx(6.0)
+        assert cost[1, 0] == cost[0, 1]
+        assert cost[0, 0] == 0
+
+    def test_shuffled_grid(self):
+        """Test that a shuffled grid of devices is ordered with a fraction of the travel and every point once"""
+        rng = np.random.default_rng(0)
+        grid = [[(x * 100.0, y * 100.0), (x * 100.0 + 50.0, y * 100.0)] for x in range(10) for y in range(10)]
+        points = [grid[i] for i in rng.permutation(len(grid))]
+
+        order, original, optimized = order_points(points)
+
+        assert sorted(order) == list(range(len(points)))
+        assert order[0] == 0
+        assert optimized == pytest.approx(path_cost(travel_cost_matrix(points), order))
+        assert optimized * 4 < original
+
+    def test_close_to_optimal(self):
+        """Test against all orders of a few points"""
+        rng = np.random.default_rng(1)
+        for _ in range(10):
+            points = rng.uniform(0, 100, (7, 2, 2))
+            cost = travel_cost_matrix(points)
+            best = min(path_cost(cost, (0, *rest)) for rest in itertools.permutations(range(1, 7)))
+            _, _, optimized = order_points(points)
+            assert optimized <= 1.1 * best
+
+    def test_good_order_is_kept(self):
+        """Test that points already in the best order, and too few points, are not reordered"""
+        points = [[(x, 0.0)] for x in range(5)]
+        assert order_points(points)[0] == [0, 1, 2, 3, 4]
+        assert order_points(points[:2])[0] == [0, 1]
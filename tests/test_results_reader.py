@@ -0,0 +1,135 @@
+"""
+Tests for results_reader.py
+
+This module tests indexing and querying of SMU files, spectrum files and spectral datasets.
+"""
+
+import os
+import shutil
+import sys
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+# Add the components directory to the path so we can import the module
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "components"))
+
+try:
+    from plugin_components import FileManager
+    from results_reader import ResultsIndex, read_iv_file
+    from spectral_dataset import SpectralDatasetWriter
+except ImportError as e:
+    pytest.skip(f"Cannot import required modules: {e}", allow_module_level=True)
+
+LEGACY_FILE = os.path.join(os.path.dirname(__file__), "..", "plugins", "Keithley2612B", "ivls_data.dat")
+
+SWEEP_HEADER = """#####################
+#
+# measurement of chip 3
+#
+#date 16-Oct-2026, 10:00:00
+#Keithley source smua
+#Source in voltage injection mode
+#Steps in sweep 3
+#Back voltage set to drain is 1.5 V
+#Comment: test
+#Sourse in 4 point measurement mode
+#Drain in 2 point measurement mode
+IS_4pr, VS_4pr, ID_2pr, VD_2pr
+"""
+
+
+def write_sweep(address, rows):
+    with open(address, "w") as f:
+        f.write(SWEEP_HEADER)
+        np.savetxt(f, rows, fmt="%.12e", delimiter=",")
+
+
+def write_spectrum(address, wavelength, intensity, varDict):
+    # same as createFile of the spectrometer plugins
+    np.savetxt(
+        address,
+        list(zip(wavelength, intensity)),
+        fmt="%.9e",
+        delimiter=";",
+        newline="\n",
+        header=FileManager.create_spectrometer_header(varDict, separator=";"),
+        footer="#[EndOfFile]",
+        comments="#",
+    )
+
+
+@pytest.fixture
+def results(tmp_path):
+    rows = np.arange(12, dtype=float).reshape(3, 4)
+    write_sweep(tmp_path / "chip3_x1.dat", rows)
+    write_sweep(tmp_path / "chip3_x2.dat", rows + 1)
+    shutil.copy(LEGACY_FILE, tmp_path / "legacy.dat")
+    wavelength = np.linspace(400, 800, 8)
+    write_spectrum(tmp_path / "spec_x1.csv", wavelength, np.full(8, 0.5), {"integrationtime": 0.1, "triggermode": 0, "name": "chip 3", "comment": "c"})
+    with SpectralDatasetWriter(str(tmp_path / "spectra.spds"), wavelength) as writer:
+        for i in range(3):
+            writer.append(np.full(8, float(i)), label=f"spec_{i}_x{i}.csv", integrationtime=0.2, name="chip 4")
+    (tmp_path / "notes.csv").write_text("a;b\n1;2\n")
+    return tmp_path, rows
+
+
+class TestResultsIndex:
+    """Test the ResultsIndex class."""
+
+    def test_sweep_header_and_data(self, results):
+        """Test that the SMU header is parsed and data is read from the right position."""
+        directory, rows = results
+        index = ResultsIndex(str(directory))
+        record = index.query(name="chip3_x1.dat")[0]
+        assert record.metadata["sample"] == "chip 3"
+        assert record.metadata["date"] == datetime(2026, 10, 16, 10, 0, 0)
+        assert record.metadata["drainvoltage"] == 1.5
+        assert record.metadata["sourcesensemode"] == "4 wire"
+        assert record.metadata["drainsensemode"] == "2 wire"
+        assert record.columns == ["IS_4pr", "VS_4pr", "ID_2pr", "VD_2pr"]
+        assert np.array_equal(record.data, rows)
+        assert np.array_equal(record.column("ID_2pr"), rows[:, 2])
+
+    def test_legacy_file(self, results):
+        """Test that the legacy mock data file gives the same data as the fixed header length read."""
+        directory, _ = results
+        metadata, columns, data = read_iv_file(str(directory / "legacy.dat"))
+        assert metadata["sample"] == "10C"
+        assert metadata["drainvoltage"] == 0.1
+        assert columns == ["IS", "VS", "ID", "VD"]
+        assert np.array_equal(data, np.genfromtxt(LEGACY_FILE, skip_header=44, delimiter=","))
+
+    def test_query(self, results):
+        """Test filters by kind, metadata, postfix and predicate, files without a header are not indexed."""
+        directory, _ = results
+        index = ResultsIndex(str(directory))
+        assert len(index) == 7
+        assert len(index.query(kind="iv")) == 3
+        assert {r.name for r in index.query(sample="CHIP 3")} == {"chip3_x1.dat", "chip3_x2.dat", "spec_x1.csv"}
+        assert {r.name for r in index.query(postfix="_x1")} == {"chip3_x1.dat", "spec_x1.csv", "spec_1_x1.csv"}
+        assert index.query(drainvoltage=1.5, sourcesensemode="4 wire", postfix="_x2")[0].name == "chip3_x2.dat"
+        assert len(index.query(integrationtime=lambda t: t > 0.15)) == 3
+
+    def test_spectra(self, results):
+        """Test that spectra from files and datasets are stacked in the order of the records."""
+        directory, _ = results
+        index = ResultsIndex(str(directory))
+        records = index.query(name="spec_*")
+        records.sort(key=lambda r: r.name)
+        wavelength, intensity = index.spectra(records)
+        assert np.allclose(wavelength, np.linspace(400, 800, 8))
+        assert intensity.shape == (4, 8)
+        assert np.allclose(intensity[:, 0], [0.0, 1.0, 2.0, 0.5])
+
+    def test_refresh(self, results):
+        """Test that refresh picks up appended spectra and new files."""
+        directory, rows = results
+        index = ResultsIndex(str(directory))
+        with SpectralDatasetWriter(str(directory / "spectra.spds"), np.linspace(400, 800, 8)) as writer:
+            writer.append(np.full(8, 7.0), label="spec_new.csv")
+        write_sweep(directory / "chip3_x3.dat", rows)
+        index.refresh()
+        assert len(index) == 9
+        assert index.query(name="spec_new.csv")[0].data[0, 1] == 7.0
@@ -0,0 +1,233 @@
+"""
+Tests for pyIVLS_seqProgram.py
+
+This module tests that compiled sequences run the same loop iterations and steps as the original stack based
+parser of the sequence builder, and that settings are set before every executed step.
+"""
+
+import copy
+import os
+import sys
+
+import pytest
+
+# Add the components directory to the path so we can import the module
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "components"))
+
+try:
+    from pyIVLS_seqProgram import END, ITERATE, LOOP, STEP, SequenceExecutor, compile_recipe
+except ImportError as e:
+    pytest.skip(f"Cannot import required modules: {e}", allow_module_level=True)
+
+
+class FakePlugin:
+    """Records calls in a shared trace. Steps modify their settings like sweep does with the file name."""
+
+    def __init__(self, name, trace, iterations=0, fail_steps=()):
+        self.name = name
+        self.trace = trace
+        self.iterations = iterations
+        self.fail_steps = set(fail_steps)
+        self.settings = None
+        self.steps = 0
+
+    def functions(self):
+        return {
+            "setSettings": self.setSettings,
+            "sequenceStep": self.sequenceStep,
+            "getIterations": lambda: self.iterations,
+            "loopingIteration": self.loopingIteration,
+        }
+
+    def setSettings(self, settings):
+        self.settings = copy.deepcopy(settings)
+
+    def sequenceStep(self, postfix):
+        self.settings["filename"] += postfix
+        self.steps += 1
+        self.trace.append((self.name, "step", self.settings["filename"]))
+        if self.steps in self.fail_steps:
+            return [1, {"Error message": "failed"}]
+        return [0, {}]
+
+    def loopingIteration(self, iteration):
+        self.trace.append((self.name, "iteration", iteration))
+        return [0, f"_{self.name}{iteration}"]
+
+
+def reference_parser(data, instructions):
+    """The stack based parser that compile_recipe and SequenceExecutor replace."""
+    skip_iteration = False
+    stackData = copy.deepcopy(data)
+    looping = []
+    while (stackData != []) or (looping != []):
+        if looping != []:
+            if looping[-1]["currentStep"] == 0:
+                [status, iterText] = instructions[looping[-1]["loopFunction"]]["functions"]["loopingIteration"](looping[-1]["currentIteration"])
+                looping[-1]["namePostfix"] = iterText
+                looping[-1]["currentIteration"] = looping[-1]["currentIteration"] + 1
+                looping[-1]["currentStep"] = looping[-1]["currentStep"] + 1
+                skip_iteration = False
+            elif looping[-1]["currentStep"] == looping[-1]["totalSteps"]:
+                if looping[-1]["currentIteration"] < looping[-1]["totalIterations"]:
+                    looping[-1]["currentStep"] = 0
+                    stackData = looping[-1]["looping"] + stackData
+                else:
+                    looping.pop(-1)
+                continue
+            else:
+                looping[-1]["currentStep"] = looping[-1]["currentStep"] + 1
+        stackItem = stackData.pop(0)
+        instructions[stackItem["function"]]["functions"]["setSettings"](stackItem["settings"])
+        if stackItem["class"] == "step":
+            if skip_iteration:
+                continue
+            namePostfix = "".join(loopItem["namePostfix"] for loopItem in looping)
+            [status, message] = instructions[stackItem["function"]]["functions"]["sequenceStep"](namePostfix)
+            if status:
+                skip_iteration = True
+                continue
+        if stackItem["class"] == "loop":
+            looping.append(
+                {
+                    "looping": stackItem["looping"],
+                    "loopFunction": stackItem["function"],
+                    "totalSteps": len(stackItem["looping"]),
+                    "currentStep": 0,
+                    "totalIterations": instructions[stackItem["function"]]["functions"]["getIterations"](),
+                    "currentIteration": 0,
+                    "namePostfix": "",
+                }
+            )
+            stackData = stackItem["looping"] + stackData
+
+
+def step(function, filename):
+    return {"function": function, "class": "step", "settings": {"filename": filename}}
+
+
+def loop(function, *items):
+    return {"function": function, "class": "loop", "settings": {"filename": function}, "looping": list(items)}
+
+
+RECIPE = [
+    step("sweep", "start"),
+    loop(
+        "itc503",
+        loop("affineMove", step("sweep", "iv"), step("specSMU", "spectrum"), step("sweep", "iv2")),
+        step("specSMU", "after"),
+    ),
+    step("sweep", "end"),
+]
+
+
+def run_both(recipe, plugin_args):
+    traces = []
+    for runner in ("reference", "compiled"):
+        trace = []
+        plugins = {name: FakePlugin(name, trace, **args) for name, args in plugin_args.items()}
+        instructions = {name: {"functions": plugin.functions()} for name, plugin in plugins.items()}
+        if runner == "reference":
+            reference_parser(recipe, instructions)
+        else:
+            SequenceExecutor(compile_recipe(copy.deepcopy(recipe)), instructions).run()
+        traces.append(trace)
+    return traces
+
+
+class TestSequenceProgram:
+    """Test compile_recipe and SequenceExecutor."""
+
+    def test_compile(self):
+        """Test that loops compile to loop, iterate, body and end with a jump back to iterate."""
+        program = compile_recipe([loop("itc503", step("sweep", "iv")), step("sweep", "end")])
+        assert [(i.op, i.function, i.target) for i in program] == [
+            (LOOP, "itc503", -1),
+            (ITERATE, "itc503", -1),
+            (STEP, "sweep", -1),
+            (END, "itc503", 1),
+            (STEP, "sweep", -1),
+        ]
+
+    def test_same_as_reference_parser(self):
+        """Test nested loops against the original parser, including a loop with zero iterations."""
+        for itc_iterations in (0, 1, 3):
+            reference, compiled = run_both(RECIPE, {"sweep": {}, "specSMU": {}, "itc503": {"iterations": itc_iterations}, "affineMove": {"iterations": 4}})
+            assert compiled == reference
+        assert ("sweep", "step", "iv_itc5030_affineMove3") in compiled
+
+    def test_failed_steps_skip_the_iteration(self):
+        """Test that a failed step skips the rest of the innermost iteration, like the original parser."""
+        reference, compiled = run_both(RECIPE, {"sweep": {"fail_steps": (3, 6)}, "specSMU": {"fail_steps": (1,)}, "itc503": {"iterations": 2}, "affineMove": {"iterations": 3}})
+        assert compiled == reference
+        assert len(compiled) < len(run_both(RECIPE, {"sweep": {}, "specSMU": {}, "itc503": {"iterations": 2}, "affineMove": {"iterations": 3}})[0])
+
+    def test_settings_are_set_when_needed(self):
+        """Test that every executed step starts from its own settings and settings are not set for skipped steps."""
+        trace = []
+        sweep = FakePlugin("sweep", trace, fail_steps=(1,))
+        camera = FakePlugin("camera", trace, iterations=2)
+        calls = []
+        functions = sweep.functions()
+        functions["setSettings"] = lambda settings: calls.append(settings["filename"]) or sweep.setSettings(settings)
+        recipe = [loop("camera", step("sweep", "a"), step("sweep", "b")), step("sweep", "c"), step("sweep", "c")]
+        executor = SequenceExecutor(compile_recipe(recipe), {"sweep": {"functions": functions}, "camera": {"functions": camera.functions()}})
+        executor.run()
+        # the first iteration fails at "a", so "b" is skipped
+        assert calls == ["a", "a", "b", "c", "c"]
+        assert [entry[2] for entry in trace if entry[1] == "step"] == ["a_camera0", "a_camera1", "b_camera1", "c", "c"]
+        assert executor.settings_skipped == 0
+
+    def test_repeated_settings_not_set_again(self):
+        """Test that settings set again without anything run in between are skipped."""
+        calls = []
+        executor = SequenceExecutor([], {"camera": {"functions": {"setSettings": calls.append}}})
+        settings = {"filename": "camera"}
+        executor._set_settings("camera", settings)
+        executor._set_settings("camera", dict(settings))
+        assert len(calls) == 1
+        assert executor.settings_skipped == 1
+
+    def test_nested_loops_keep_unchanged_settings(self):
+        """Test that a loop entered again keeps its settings unless a related plugin has run or was set."""
+        recipe = [loop("itc503", loop("affineMove", step("sweep", "iv")))]
+        dependencies = {"itc503": ("temperature", ""), "affineMove": ("move", "positioning,micromanipulator,camera"), "sweep": ("ivsweep", "smu"), "touchDetect": ("contactingmove", "contacting,micromanipulator,smu")}
+
+        def run(recipe):
+            trace, calls = [], []
+            plugins = {name: FakePlugin(name, trace, iterations={"itc503": 3, "affineMove": 2}.get(name, 0)) for name in dependencies}
+            instructions = {}
+            for name, plugin in plugins.items():
+                functions = plugin.functions()
+                functions["setSettings"] = lambda settings, name=name, plugin=plugin: calls.append(name) or plugin.setSettings(settings)
+                function, depends = dependencies[name]
+                instructions[name] = {"functions": functions, "function": function, "dependencies": {d for d in depends.split(",") if d}}
+            executor = SequenceExecutor(compile_recipe(copy.deepcopy(recipe)), instructions)
+            executor.run()
+            return trace, calls, executor
+
+        trace, calls, executor = run(recipe)
+        assert calls.count("affineMove") == 1
+        assert calls.count("sweep") == 6
+        assert executor.settings_skipped == 2
+        # the steps and iterations are the same as with the original parser
+        reference_trace = []
+        plugins = {name: FakePlugin(name, reference_trace, iterations={"itc503": 3, "affineMove": 2}.get(name, 0)) for name in dependencies}
+        reference_parser(recipe, {name: {"functions": plugin.functions()} for name, plugin in plugins.items()})
+        assert trace == reference_trace
+
+        # touchDetect uses the micromanipulator too, affineMove gets its settings again after it
+        _, calls, executor = run([loop("itc503", step("touchDetect", "contact"), loop("affineMove", step("sweep", "iv")))])
+        assert calls.count("affineMove") == 3
+        assert executor.settings_skipped == 0
+
+    def test_failed_iteration_stops_the_sequence(self):
+        """Test that a failed loopingIteration raises ValueError with the error of the plugin."""
+        trace = []
+        camera = FakePlugin("camera", trace, iterations=2)
+        functions = camera.functions()
+        functions["loopingIteration"] = lambda iteration: [1, {"Error message": "no camera"}]
+        executor = SequenceExecutor(compile_recipe([loop("camera", step("camera", "a"))]), {"camera": {"functions": functions}})
+        with pytest.raises(ValueError):
+            executor.run()
+        assert trace == []
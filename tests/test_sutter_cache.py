@@ -0,0 +1,149 @@
+"""
+Tests for the state cache of the Sutter MPC-325 driver
+
+This module tests that positions, the active device and the device status are answered from the cache,
+updated from moves, and read from the device again after stops, timeouts, with verify and before moves.
+"""
+
+import os
+import struct
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "plugins", "Sutter"))
+
+try:
+    from Sutter import Mpc325
+except ImportError as e:
+    pytest.skip(f"Cannot import required modules: {e}", allow_module_level=True)
+
+
+class FakeSerial:
+    """Answers the MPC-325 commands used by the driver and counts them."""
+
+    def __init__(self):
+        self.is_open = True
+        self.timeout = 3
+        self.active = 1
+        self.steps = {1: [0, 0, 0], 2: [16000, 16000, 16000]}
+        self.commands = []
+        self.response = b""
+        self.pending = None
+        self.drop_response = False
+
+    def reset_input_buffer(self):
+        pass
+
+    def reset_output_buffer(self):
+        pass
+
+    def flush(self):
+        pass
+
+    def write(self, data):
+        if self.pending is not None:
+            # second part of a move command
+            self.steps[self.active] = list(struct.unpack("<3I", data))
+            self.pending = None
+            self.response = b"\r"
+            return
+        command = chr(data[0])
+        self.commands.append(command)
+        if command == "U":
+            self.response = struct.pack("6B", 2, 1, 1, 0, 0, 13)
+        elif command == "K":
+            self.response = struct.pack("4B", self.active, 1, 0, 13)
+        elif command == "I":
+            self.active = data[1]
+            self.response = struct.pack("2B", self.active, 13)
+        elif command == "C":
+            self.response = struct.pack("=BIIIB", self.active, *self.steps[self.active], 13)
+        elif command in "MS":
+            self.pending = command
+
+    def read(self, size):
+        response, self.response = self.response[:size], self.response[size:]
+        return b"" if self.drop_response else response
+
+    def count(self, command):
+        return self.commands.count(command)
+
+
+@pytest.fixture
+def hal():
+    hal = Mpc325()
+    hal.ser = FakeSerial()
+    return hal
+
+
+class TestPositionCache:
+    """Test the state cache of Mpc325."""
+
+    def test_repeated_queries_read_once(self, hal):
+        """Test that repeated queries go to the device once and verify reads it again."""
+        for _ in range(3):
+            assert hal.get_current_position() == (0, 0, 0)
+            assert hal.get_active_device() == 1
+            assert hal.get_connected_devices_status() == (2, (1, 1, 0, 0))
+        assert (hal.ser.count("C"), hal.ser.count("K"), hal.ser.count("U")) == (1, 1, 1)
+        hal.ser.steps[1] = [160, 0, 0]  # moved by hand
+        assert hal.get_current_position() == (0, 0, 0)
+        assert hal.get_current_position(verify=True) == (10, 0, 0)
+        assert hal.get_current_position() == (10, 0, 0)
+
+    def test_moves_update_the_cache(self, hal):
+        """Test that the position after a move is known without reading the device."""
+        position = hal.move(100.03, 200, 300, segment=True, segment_length=100)
+        assert hal.ser.count("C") == 1
+        assert hal.ser.count("M") > 1
+        assert position == hal.get_current_position()
+        assert hal.ser.count("C") == 1
+        assert hal.get_current_position(verify=True) == position
+        hal.slow_move_to(5, 5, 5, 3)
+        assert hal.get_current_position() == (5, 5, 5)
+
+    def test_moves_start_from_the_device(self, hal):
+        """Test that moves read the position from the device, which may have been moved by hand on the ROE-200."""
+        hal.move(100, 200, 300, segment=False)
+        hal.ser.steps[1] = [1600, 3200, 800]  # moved by hand to (100, 200, 50)
+        assert hal.get_current_position() == (100, 200, 300)
+        # a z-only move keeps x and y where the manipulator is now
+        hal.move(z=100, segment=False)
+        assert hal.ser.steps[1] == [1600, 3200, 1600]
+        # the cache says the manipulator is at the target already, the device does not
+        hal.ser.steps[1] = [0, 0, 0]
+        assert hal.move(100, 200, 100, segment=False) == (100, 200, 100)
+        assert hal.ser.steps[1] == [1600, 3200, 1600]
+        assert hal.ser.count("M") == 3
+
+    def test_device_changes(self, hal):
+        """Test that positions are cached per device and device changes are always sent."""
+        hal.change_active_device(2)
+        assert hal.get_current_position() == (1000, 1000, 1000)
+        hal.change_active_device(1)
+        assert hal.get_current_position() == (0, 0, 0)
+        hal.change_active_device(2)
+        hal.ser.active = 1  # changed on the ROE-200
+        hal.change_active_device(2)
+        assert hal.ser.active == 2
+        assert hal.get_current_position() == (1000, 1000, 1000)
+        assert hal.ser.count("I") == 4
+        assert hal.ser.count("C") == 2
+        with pytest.raises(ValueError):
+            hal.change_active_device(5)
+
+    def test_stop_and_timeout_clear_the_cache(self, hal):
+        """Test that positions are read again after a stop and the whole state after a timeout."""
+        hal.get_current_position()
+        hal.stop()
+        hal.get_current_position()
+        assert hal.ser.count("C") == 2
+        assert hal.ser.count("K") == 1
+        hal.ser.drop_response = True
+        with pytest.raises(struct.error):
+            hal.quick_move_to(1, 2, 3)
+        hal.ser.drop_response = False
+        hal.get_current_position()
+        assert hal.ser.count("C") == 3
+        assert hal.ser.count("K") == 2
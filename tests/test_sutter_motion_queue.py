@@ -0,0 +1,150 @@
+"""
+Tests for the Sutter motion queue
+
+This module tests queued moves on the virtual MPC-325: order, per-move completion and progress,
+cancellation of the moves after a failed one, waiting for the moves of a device, and relative moves of the plugin
+that start after the queued moves.
+"""
+
+import os
+import struct
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "plugins", "Sutter"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "components"))
+
+try:
+    from motionQueue import MotionQueue
+    from PyQt6.QtWidgets import QApplication
+    from sutterGUI import SutterGUI
+    from virtual import VirtualMpc325
+except ImportError as e:
+    pytest.skip(f"Cannot import required modules: {e}", allow_module_level=True)
+
+app = QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def hal():
+    hal = VirtualMpc325()
+    hal.open("virtual")
+    return hal
+
+
+class TestMotionQueue:
+    """Test the MotionQueue class."""
+
+    def test_moves_run_in_order(self, hal):
+        """Test that moves of several devices run in the queued order and report the position reached."""
+        moved = []
+        queue = MotionQueue(lambda: hal, threading.RLock(), on_device_changed=moved.append)
+        first = queue.submit(2, 1000, 2000, 3000, segment=False)
+        second = queue.submit(1, 100, 200, None, segment=False)
+        third = queue.submit(2, 1500, None, None, segment=False)
+        assert third.wait(5)
+        assert first.done() and second.done()
+        assert moved == [2, 1, 2]
+        assert first.result()[0] == 0
+        assert second.position == (100, 200, 21000 * hal._S2MCONV)
+        assert third.position == (1500, 2000, 3000)
+        hal.change_active_device(1)
+        assert hal.get_current_position() == second.position
+        assert queue.wait() == (0, {"Error message": "Sutter finished 3 queued moves"})
+        assert queue.idle()
+
+    def test_progress_per_segment(self, hal):
+        """Test that a segmented move reports its progress after every segment."""
+        progress = []
+        queue = MotionQueue(lambda: hal, threading.RLock())
+        move = queue.submit(1, 1000, 0, 0, on_progress=lambda m: progress.append((m.progress, m.position)), segment=True, segment_length=250)
+        assert move.wait(5)
+        hal.change_active_device(1)
+        start = (0, 0, 21000 * hal._S2MCONV)
+        assert [p for p, _ in progress] == pytest.approx([i / len(progress) for i in range(1, len(progress) + 1)])
+        assert progress[-1][1] == pytest.approx((1000, 0, 0), abs=0.1)
+        assert len(progress) == len(hal.segment_move(start, (1000, 0, 0), 250))
+
+    def test_failed_move_cancels_the_rest(self, hal):
+        """Test that the moves queued after a failed move are cancelled and the failure is reported."""
+        queue = MotionQueue(lambda: hal, threading.RLock())
+        gate = threading.Event()
+        blocker = queue.submit(1, 10, 10, None, on_progress=lambda m: gate.wait(5), segment=False)
+        failing = queue.submit(5, 10, 10, None, segment=False)
+        after = queue.submit(2, 10, 10, None, segment=False)
+        gate.set()
+        assert after.wait(5)
+        assert blocker.result()[0] == 0
+        assert failing.result()[0] == 1
+        assert after.cancelled
+        status, state = queue.wait()
+        assert status == 1
+        assert "device 5" in state["Error message"]
+        assert queue.wait() == (0, {"Error message": "Sutter finished 0 queued moves"})
+
+    def test_cancel_and_wait_per_device(self, hal):
+        """Test that cancel drops moves that did not start and wait reports only the given device."""
+        queue = MotionQueue(lambda: hal, threading.RLock())
+        started, gate = threading.Event(), threading.Event()
+        running = queue.submit(1, 10, 10, None, on_progress=lambda m: started.set() or gate.wait(5), segment=False)
+        waiting = queue.submit(2, 10, 10, None, segment=False)
+        assert started.wait(5)
+        assert [m.device for m in queue.pending()] == [1, 2]
+        assert queue.cancel() == 1
+        gate.set()
+        assert queue.join(5)
+        assert queue.wait(1)[0] == 0
+        assert running.result()[0] == 0
+        status, state = queue.wait(2)
+        assert status == 4
+        assert "cancelled" in state["Error message"]
+        assert waiting.cancelled
+
+    def test_unexpected_error_fails_the_move(self, hal, monkeypatch):
+        """Test that an unexpected error, like a short serial read, fails the move and the queue keeps running."""
+        queue = MotionQueue(lambda: hal, threading.RLock())
+        original_move = hal.move
+
+        def short_read(*args, **kwargs):
+            monkeypatch.setattr(hal, "move", original_move)
+            raise struct.error("unpack requires a buffer of 14 bytes")
+
+        monkeypatch.setattr(hal, "move", short_read)
+        failing = queue.submit(1, 10, 10, None, segment=False)
+        after = queue.submit(2, 10, 10, None, segment=False)
+        assert queue.join(5)
+        assert failing.result()[0] == 4
+        assert "buffer" in failing.result()[1]["Error message"]
+        assert after.cancelled
+        assert queue.submit(1, 20, 20, None, segment=False).wait(5)
+        assert queue.wait()[0] == 4
+        assert queue.wait() == (0, {"Error message": "Sutter finished 0 queued moves"})
+
+    def test_relative_moves_wait_for_the_queue(self):
+        """Test that relative and z moves read the position only after the queued moves, under the motion lock."""
+        gui = SutterGUI()
+        gui.settings = {"backend": "virtual", "quickmove": True, "speed": 7, "segment_move": False, "segment_length": 500}
+        gui.hal.open("virtual")
+        start = gui.hal.get_current_position()
+        gate = threading.Event()
+        status, move = gui.mm_queue_move(1000, 2000, 3000, manipulator_number=2, on_progress=lambda m: gate.wait(5))
+        assert status == 0
+        results = []
+        relative = threading.Thread(target=lambda: results.append(gui.mm_move_relative(x_change=10)))
+        zmove = threading.Thread(target=lambda: results.append(gui.mm_zmove(100)))
+        relative.start()
+        zmove.start()
+        time.sleep(0.2)
+        assert relative.is_alive() and zmove.is_alive()
+        gate.set()
+        relative.join(10)
+        zmove.join(10)
+        assert [status for status, _ in results] == [0, 0]
+        # both moves start from where the queued move left device 2, the active device after the queue
+        assert gui.hal.get_active_device() == 2
+        assert gui.hal.get_current_position() == pytest.approx((1010, 2000, 3100), abs=0.1)
+        gui.hal.change_active_device(1)
+        assert gui.hal.get_current_position() == start
@@ -0,0 +1,138 @@
+"""
+Tests for TLCCS.py
+
+This module tests the scan processing of the CCSDRV driver and the ScanEngine without a device.
+"""
+
+import os
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+# Add the plugin directory to the path so we can import the module
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "plugins", "TLCCS"))
+
+try:
+    import TLCCS_const as const
+    from mock_tlccs import MockCCSDRV
+    from TLCCS import CCSDRV, ScanEngine
+except ImportError as e:
+    pytest.skip(f"Cannot import required modules: {e}", allow_module_level=True)
+
+
+class FakeIO:
+    """Stands in for LLIO, bulk reads fill the buffer with a fixed raw scan."""
+
+    def __init__(self, raw: np.ndarray):
+        self.raw = raw
+        self.reads = []
+
+    def read_raw(self, readTo):
+        self.reads.append(readTo)
+        np.frombuffer(readTo, dtype=np.uint16)[:] = self.raw
+
+
+def raw_scan(seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 0xFFFF, const.CCS_SERIES_NUM_RAW_PIXELS, dtype=np.uint16)
+
+
+class TestScanProcessing:
+    """Test normalization of raw scans in CCSDRV."""
+
+    def test_matches_per_pixel_normalization(self):
+        """Test that the vectorized processing gives the same result as the per pixel formula."""
+        raw = raw_scan()
+        drv = CCSDRV()
+
+        data = drv._process_raw_scan_data(raw)
+
+        dark = np.sum(raw[const.DARK_PIXELS_OFFSET : const.DARK_PIXELS_OFFSET + const.NO_DARK_PIXELS]) / const.NO_DARK_PIXELS
+        expected = [(raw[const.SCAN_PIXELS_OFFSET + i] - dark) / (const.MAX_ADC_VALUE - dark) for i in range(const.CCS_SERIES_NUM_PIXELS)]
+        assert data.dtype == np.float64
+        assert np.allclose(data, expected, rtol=1e-12, atol=0)
+
+    def test_scan_into_out_reuses_buffers(self):
+        """Test that the raw buffer is allocated once and the scan is written into the given array."""
+        drv = CCSDRV()
+        drv._io = FakeIO(raw_scan(1))
+        out = np.empty(const.CCS_SERIES_NUM_PIXELS)
+
+        result = drv.get_scan_data(out=out)
+        drv._io.raw = raw_scan(2)
+        second = drv.get_scan_data()
+
+        assert result is out
+        assert drv._io.reads[0] is drv._io.reads[1]
+        assert not np.shares_memory(second, out)
+        assert not np.allclose(second, out)
+
+
+class TestScanEngine:
+    """Test background acquisition with ScanEngine on the mock driver."""
+
+    def test_continuous_scans_are_published_in_order(self):
+        """Test that next returns only new scans and latest does not wait."""
+        engine = ScanEngine(MockCCSDRV(), continuous=True)
+        assert engine.latest() is None
+        engine.start()
+        try:
+            first = engine.next(timeout=2)
+            second = engine.next(timeout=2)
+            latest = engine.latest()
+        finally:
+            engine.stop()
+
+        assert first is not None and second is not None
+        assert second[0] > first[0]
+        assert latest[0] >= second[0]
+        assert first[1].shape == (const.CCS_SERIES_NUM_PIXELS,)
+        # returned scans are copies, not the engine buffers
+        assert not any(np.shares_memory(first[1], buffer) for buffer in engine._buffers)
+        assert not engine.running
+
+    def test_triggered_scan(self):
+        """Test that in single mode a scan is read only after trigger."""
+        drv = MockCCSDRV()
+        engine = ScanEngine(drv, continuous=False)
+        engine.start()
+        try:
+            assert engine.next(timeout=0.1) is None
+            engine.trigger()
+            assert engine.wait_integrated(timeout=2)
+            scan = engine.next(timeout=2)
+            assert engine.next(timeout=0.1) is None
+        finally:
+            engine.stop()
+
+        assert scan is not None and scan[0] == 1
+        assert engine.error is None
+
+    def test_published_scan_is_not_refilled_during_a_copy(self):
+        """Test that the worker waits to publish while a consumer copies, so the copied buffer is not overwritten."""
+
+        class CountingDriver:
+            scans = 0
+
+            def get_scan_data(self, out):
+                self.scans += 1
+                out[:] = self.scans
+                return out
+
+        engine = ScanEngine(CountingDriver())
+        engine._read_scan()
+        published = engine._scans[-1][1]
+        # a consumer in the middle of a copy holds the lock
+        with engine._lock:
+            worker = threading.Thread(target=lambda: [engine._read_scan() for _ in range(2)])
+            worker.start()
+            worker.join(0.2)
+            assert worker.is_alive()
+            assert np.all(published == 1)
+        worker.join(2)
+
+        seq, scan = engine.latest()
+        assert seq == 3
+        assert np.all(scan == 3)
@@ -0,0 +1,235 @@
+"""
+Tests for parallel and predictive probing in touchDetect
+
+This module tests grouping manipulators into batches, the ProbeScheduler that serializes
+the access of concurrently probing manipulators to the micromanipulator and the SMU, and
+the approach from contact heights predicted by the ContactHeightCache.
+"""
+
+import os
+import sys
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "plugins", "touchDetect-0.1.0"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "components"))
+
+try:
+    from threadStopped import ThreadStopped
+    from touchDetect import ContactHeightCache, ManipulatorInfo, ProbeScheduler, touchDetect
+except ImportError as e:
+    pytest.skip(f"Cannot import required modules: {e}", allow_module_level=True)
+
+
+class FakeStation:
+    """Manipulators over a sample surface, contact when a probe is below the surface.
+
+    The surface is the contact height of each manipulator, a number or a function of the XY position.
+    """
+
+    def __init__(self, surface):
+        self.surface = surface
+        self.z = dict.fromkeys(surface, 0)
+        self.xy = {number: (0.0, 0.0) for number in surface}
+        self.active = None
+        self.channel = {}
+        self.busy = threading.Lock()
+        self.overlapping_calls = 0
+        self.zmoves = 0
+
+    def surface_at(self, number):
+        surface = self.surface[number]
+        return surface(*self.xy[number]) if callable(surface) else surface
+
+    def _exclusive(self):
+        if not self.busy.acquire(blocking=False):
+            self.overlapping_calls += 1
+            self.busy.acquire()
+        time.sleep(0.001)
+        self.busy.release()
+
+    def mm(self):
+        def change_active_device(number):
+            self.active = number
+            return (0, {"Error message": "OK"})
+
+        def move(x=None, y=None, z=None):
+            self._exclusive()
+            self.z[self.active] = z
+            return (0, {"Error message": "OK"})
+
+        def zmove(z_change, absolute=False):
+            self._exclusive()
+            self.zmoves += 1
+            self.z[self.active] = z_change if absolute else self.z[self.active] + z_change
+            return (0, {"Error message": "OK"})
+
+        def current_position(manipulator_name=None, verify=False):
+            number = self.active if manipulator_name is None else manipulator_name
+            return (*self.xy[number], self.z[number])
+
+        return {"mm_change_active_device": change_active_device, "mm_move": move, "mm_zmove": zmove, "mm_current_position": current_position}
+
+    def smu(self, infos):
+        self.channel = {info.smu_channel: info.mm_number for info in infos}
+
+        def resmes(channel):
+            number = self.channel[channel]
+            return (0, 1.0 if self.z[number] >= self.surface_at(number) else 1e6)
+
+        return {"smu_setup_resmes": Mock(return_value=(0, {})), "smu_resmes": resmes}
+
+
+def info(number, smu_channel, condet_channel, last_z=1000):
+    return ManipulatorInfo(number, smu_channel, condet_channel, 50, 10, 100.0, "", last_z=last_z)
+
+
+class TestParallelProbing:
+    """Test batching and the probe scheduler."""
+
+    def test_batches_use_distinct_channels(self):
+        """Test that manipulators share a batch only with different SMU channels and contact detection lines."""
+        td = touchDetect()
+        infos = [info(1, "smua", "Hi"), info(2, "smub", "Lo"), info(3, "smua", "Lo"), info(4, "smub", "Hi")]
+        assert [[i.mm_number for i in batch] for batch in td._parallel_batches(infos)] == [[1, 2], [3, 4]]
+        infos = [info(1, "smua", "Hi"), info(2, "smub", "Hi")]
+        assert [[i.mm_number for i in batch] for batch in td._parallel_batches(infos)] == [[1], [2]]
+        td.PARALLEL_PROBING = False
+        assert len(td._parallel_batches([info(1, "smua", "Hi"), info(2, "smub", "Lo")])) == 2
+
+    def test_batch_setup_enables_both_lines(self):
+        """Test that both contact detection lines are on after the setup of a batch."""
+        td = touchDetect()
+        con = {"deviceHiCheck": Mock(), "deviceLoCheck": Mock()}
+        smu = {"smu_setup_resmes": Mock(return_value=(0, {}))}
+        status, _ = td._batch_measurement_setup({}, smu, con, [info(1, "smua", "Hi"), info(2, "smub", "Lo")])
+        assert status == 0
+        con["deviceHiCheck"].assert_called_with(True)
+        con["deviceLoCheck"].assert_called_with(True)
+        assert [c.args for c in smu["smu_setup_resmes"].call_args_list] == [("smua",), ("smub",)]
+
+    def test_concurrent_approach_moves_each_manipulator(self):
+        """Test that concurrent approaches reach contact on the right manipulator and do not overlap on the serial port."""
+        td = touchDetect()
+        station = FakeStation({1: 870, 2: 930})
+        infos = [info(1, "smua", "Hi"), info(2, "smub", "Lo")]
+        smu = station.smu(infos)
+        results = td._run_batch(station.mm(), smu, td._approach_contact, infos)
+        assert [status for status, _ in results] == [0, 0]
+        assert 870 <= station.z[1] < 880
+        assert 930 <= station.z[2] < 940
+        assert station.overlapping_calls == 0
+
+    def test_error_stops_other_workers(self):
+        """Test that an exception of one worker stops the others and is raised in the calling thread."""
+
+        def function(mm, smu, info):
+            if info.mm_number == 1:
+                raise RuntimeError("probe broken")
+            while True:
+                smu["smu_resmes"](info.smu_channel)
+
+        scheduler = ProbeScheduler({"mm_change_active_device": Mock(return_value=(0, {}))}, {"smu_resmes": Mock(return_value=(0, 1.0))})
+        with pytest.raises(RuntimeError, match="probe broken"):
+            scheduler.run(function, [info(1, "smua", "Hi"), info(2, "smub", "Lo")])
+
+    def test_worker_thread_stopped_is_raised(self):
+        """Test that ThreadStopped from a worker reaches the calling thread."""
+
+        def function(mm, smu, info):
+            raise ThreadStopped()
+
+        scheduler = ProbeScheduler({"mm_change_active_device": Mock(return_value=(0, {}))}, {})
+        with pytest.raises(ThreadStopped):
+            scheduler.run(function, [info(1, "smua", "Hi"), info(2, "smub", "Lo")])
+
+
+class TestPredictiveApproach:
+    """Test the contact height cache and the approach planned from it."""
+
+    def test_plane_fit(self):
+        """Test that a tilted plane is predicted inside the contacts, and few contacts fall back to the nearest one."""
+        cache = ContactHeightCache()
+        assert cache.predict(1, 0, 0) is None
+        cache.add(1, 0, 0, 1000)
+        cache.add(1, 100, 0, 1010)
+        assert cache.predict(1, 90, 0) == (1010, None)
+        cache.add(1, 0, 100, 995)
+        # three contacts always fit a plane exactly, the residual says nothing
+        assert cache.predict(1, 20, 20) == (1000, None)
+        cache.add(1, 100, 100, 1005)
+        z, rms = cache.predict(1, 20, 30)
+        assert z == pytest.approx(1000 + 0.1 * 20 - 0.05 * 30)
+        assert rms == pytest.approx(0, abs=1e-9)
+        cache.clear(1)
+        assert cache.predict(1, 0, 0) is None
+
+    def test_no_extrapolation(self):
+        """Test that positions outside the contacts use the nearest contact instead of extrapolating the plane."""
+        cache = ContactHeightCache()
+        for x, y in [(0, 0), (100, 0), (0, 100), (100, 100)]:
+            cache.add(1, x, y, 1000 + 0.1 * x)
+        assert cache.predict(1, 100.5, 50)[1] is not None
+        assert cache.predict(1, 5000, 50) == (1010, None)
+
+    def test_contacts_on_a_line_use_nearest(self):
+        """Test that contacts on a line do not give a plane."""
+        cache = ContactHeightCache()
+        for x in (0, 100, 200):
+            cache.add(1, x, 0, 1000 + x)
+        assert cache.predict(1, 190, 50) == (1200, None)
+
+    def test_predicted_approach_takes_fewer_steps(self):
+        """Test that after a few contacts the approach over a tilted sample needs a fraction of the steps."""
+        td = touchDetect()
+        station = FakeStation({1: lambda x, y: 900 + 0.05 * x + 0.02 * y})
+        mm = station.mm()
+        station.active = 1
+        manipulator = info(1, "smua", "Hi", last_z=900)
+        smu = station.smu([manipulator])
+        steps = []
+        for x, y in [(0, 0), (1000, 0), (0, 1000), (1000, 1000), (500, 300)]:
+            station.xy[1] = (x, y)
+            station.z[1] = 0
+            station.zmoves = 0
+            status, _ = td._approach_contact(mm, smu, manipulator)
+            assert status == 0
+            assert station.surface_at(1) <= station.z[1] < station.surface_at(1) + manipulator.stride
+            steps.append(station.zmoves)
+        assert steps[-1] * 4 <= steps[0]
+
+    def test_prediction_miss_continues_search(self):
+        """Test that a contact below the fine search range is still found."""
+        td = touchDetect()
+        station = FakeStation({1: 1000})
+        mm = station.mm()
+        station.active = 1
+        manipulator = info(1, "smua", "Hi", last_z=1000)
+        smu = station.smu([manipulator])
+        for x, y in [(0, 0), (100, 0), (0, 100), (100, 100)]:
+            td.contact_heights.add(1, x, y, 1000)
+        station.surface[1] = 1080
+        station.xy[1] = (50, 50)
+        status, _ = td._approach_contact(mm, smu, manipulator)
+        assert status == 0
+        assert 1080 <= station.z[1] < 1090
+
+    def test_prediction_overshoot_retracts(self):
+        """Test that a probe already in contact at the predicted start height is retracted and approached again."""
+        td = touchDetect()
+        station = FakeStation({1: 1000})
+        mm = station.mm()
+        station.active = 1
+        manipulator = info(1, "smua", "Hi", last_z=1000)
+        smu = station.smu([manipulator])
+        for x, y in [(0, 0), (100, 0), (0, 100), (100, 100)]:
+            td.contact_heights.add(1, x, y, 1000)
+        station.surface[1] = 900
+        station.xy[1] = (50, 50)
+        status, _ = td._approach_contact(mm, smu, manipulator)
+        assert status == 0
+        assert 900 <= station.z[1] < 910
+        assert td.contact_heights.predict(1, 50, 50)[0] < 1000